@@ -2,15 +2,22 @@ import random
 import logging
 from config import PERSONA
 from safety import SafetyGuard
+from keyword_matcher import THREAT_KEYWORDS
 from analyzer import ScamAnalyzer
+from analysis_engine import EngineSaturated
 
 logging.basicConfig(level=logging.INFO, format='%(asctime)s - [AGENT] - %(message)s')
 
 class HoneypotAgent:
-    def __init__(self):
+    def __init__(self, verify_analysis=False, engine=None):
         self.conversation_history = {} # store history per conversation_id
         self.classification_cache = {}
-        self.analyzer = ScamAnalyzer()
+        self.engine = engine # optional AnalysisEngine: per-message NLP runs in its worker processes
+        self.analyzer = ScamAnalyzer(
+            verify_incremental=verify_analysis,
+            feature_extractor=self._extract_features if engine is not None else None
+        )
+        self.analysis_states = {} # running analyzer state per conv_id
         self.sophistication_cache = {} # store sophistication score per conv_id
 
     def ingest(self, message):
@@ -33,9 +40,11 @@ class HoneypotAgent:
         classification = self._classify(safe_text)
         self.classification_cache[conv_id] = classification
         
-        # 3. Analyze Sophistication
-        score, category = self.analyzer.analyze_behavior(self.conversation_history[conv_id])
-        self.sophistication_cache[conv_id] = {"score": score, "category": category}
+        # 3. Analyze Sophistication (incrementally - only the new message is tokenized)
+        if conv_id not in self.analysis_states:
+            self.analysis_states[conv_id] = self.analyzer.new_state()
+        result = self.analyzer.analyze_incremental(self.analysis_states[conv_id], self.conversation_history[conv_id])
+        self.sophistication_cache[conv_id] = {"score": result.score, "category": result.classification, "intent": result.intent}
         
         # 4. Extract IOCs
         self._extract_iocs(safe_text)
@@ -55,19 +64,24 @@ class HoneypotAgent:
         logging.info(f"📄 [AUTO-REPORT] Generating Evidence_Report_{conversation_id}.pdf...")
         logging.info(f"✅ [AUTO-REPORT] Successfully transmitted to Cyber Cell reporting portal.")
 
+    def _extract_features(self, text):
+        # Offload tokenization + sentiment to the engine; score locally if it's saturated
+        try:
+            return self.engine.message_features(text)
+        except EngineSaturated:
+            return self.analyzer.message_features(text)
+
     def _classify(self, text):
         """
         Simple keyword-based classifier for demonstration.
         In a real system, this would be an ML model.
         """
-        scam_keywords = ["verify your wallet", "private key", "bank details", "earn $", "compromised", "limited spots"]
-        text_lower = text.lower()
-        
-        for kw in scam_keywords:
-            if kw in text_lower:
-                return "scam"
-        
-        if "http" in text_lower or ".com" in text_lower:
+        categories = {match.category for match in THREAT_KEYWORDS.find_all(text)}
+
+        if "scam" in categories:
+            return "scam"
+
+        if "link" in categories:
             return "likely_scam"
             
         return "benign"
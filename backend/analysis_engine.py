@@ -0,0 +1,211 @@
+import time
+import queue
+import asyncio
+import logging
+import threading
+import multiprocessing
+from concurrent.futures import Future, ProcessPoolExecutor
+
+from analyzer import ScamAnalyzer
+from text_backend import get_text_backend
+
+class EngineSaturated(Exception):
+    """
+    Raised by AnalysisEngine.submit when the pending-job queue is full.
+    Callers should shed load (the API answers 503) instead of queueing without bound.
+    """
+
+# --- Worker process side ---
+# Each worker keeps one warm analyzer for its whole lifetime, so the tokenizer,
+# sentiment lexicon and compiled topic index are built once per process, not per job.
+_worker_analyzer = None
+_worker_version = None
+_STALE = "stale"
+
+def _init_worker(backend_name, version, lexicons):
+    global _worker_analyzer, _worker_version
+    logging.disable(logging.INFO)
+    _worker_analyzer = ScamAnalyzer(backend=get_text_backend(backend_name))
+    _worker_analyzer.reload_lexicons(lexicons)
+    _worker_version = version
+
+def _warm_up():
+    return _worker_version
+
+def _run_batch(version, lexicons, jobs):
+    """
+    Runs a micro-batch of (kind, payload) jobs in one IPC round-trip.
+    Lexicons only travel with a batch after a hot reload; a worker still on an older
+    version answers _STALE and the dispatcher resends the batch with them attached.
+    """
+    global _worker_version
+    if version != _worker_version:
+        if lexicons is None:
+            return _STALE
+        _worker_analyzer.reload_lexicons(lexicons)
+        _worker_version = version
+
+    results = []
+    for kind, payload in jobs:
+        started = time.perf_counter()
+        try:
+            if kind == "analyze":
+                value = _worker_analyzer.analyze_behavior(payload)
+            else:
+                value = _worker_analyzer.message_features(payload)
+            results.append((True, value, time.perf_counter() - started))
+        except Exception as e:
+            results.append((False, e, time.perf_counter() - started))
+    return results
+
+class AnalysisEngine:
+    """
+    Distributes CPU-bound NLP scoring across a warm process pool, sidestepping the GIL.
+    Jobs wait in a bounded queue; a dispatcher thread drains it into micro-batches
+    (up to `batch_size` jobs, or whatever arrives within `batch_window` seconds) so
+    pickling and IPC are paid once per batch rather than once per call.
+    Results are identical to calling the parent analyzer directly.
+    """
+
+    def __init__(self, analyzer, workers=4, max_pending=1024, batch_size=32, batch_window=0.002):
+        self.analyzer = analyzer
+        self.workers = workers
+        self.batch_size = batch_size
+        self.batch_window = batch_window
+        self._queue = queue.Queue(maxsize=max_pending)
+        self._stopped = threading.Event()
+        # At most two batches per worker in flight: one running, one already pickled and waiting
+        self._inflight = threading.Semaphore(workers * 2)
+
+        self._lexicon = analyzer._compiled
+        self._version = 0
+        self._pool = ProcessPoolExecutor(
+            max_workers=workers,
+            mp_context=multiprocessing.get_context("spawn"),
+            initializer=_init_worker,
+            initargs=(analyzer.backend.name, self._version, self._lexicon_payload()),
+        )
+
+        start_time = time.time()
+        for future in [self._pool.submit(_warm_up) for _ in range(workers)]:
+            future.result()
+        logging.info(f"[NLP Core] Analysis engine ready: {workers} worker processes in {time.time() - start_time:.2f}s")
+
+        self._dispatcher = threading.Thread(target=self._dispatch, name="analysis-dispatch", daemon=True)
+        self._dispatcher.start()
+
+    def _lexicon_payload(self):
+        return {name: list(terms) for name, terms in self._lexicon.lexicons.items()}
+
+    # --- Submission ---
+    def submit(self, kind, payload):
+        """
+        Queues one job ("analyze" with a history, or "features" with a lowercased message).
+        Returns a Future resolving to (result, queue_wait, processing_time) in seconds.
+        Raises EngineSaturated if the queue is full or the engine is shutting down.
+        """
+        if self._stopped.is_set():
+            raise EngineSaturated("Analysis engine is shutting down")
+        future = Future()
+        try:
+            self._queue.put_nowait((kind, payload, future, time.perf_counter()))
+        except queue.Full:
+            raise EngineSaturated(f"Analysis queue is full ({self._queue.maxsize} pending jobs)")
+        return future
+
+    def analyze(self, history):
+        return self.submit("analyze", history).result()[0]
+
+    async def analyze_async(self, history):
+        """
+        Awaitable analyze_behavior; returns (result, queue_wait, processing_time).
+        """
+        return await asyncio.wrap_future(self.submit("analyze", history))
+
+    def message_features(self, text):
+        """
+        Drop-in for ScamAnalyzer.message_features (see ScamAnalyzer's feature_extractor).
+        """
+        return self.submit("features", text).result()[0]
+
+    def shutdown(self):
+        """
+        Stops accepting jobs and waits for queued ones to finish.
+        Never blocks on a full queue: the oldest pending jobs are failed with
+        EngineSaturated until the stop sentinel fits behind the rest.
+        """
+        self._stopped.set()
+        while True:
+            try:
+                self._queue.put_nowait(None)
+                break
+            except queue.Full:
+                pass
+            try:
+                _, _, future, _ = self._queue.get_nowait()
+            except queue.Empty:
+                continue
+            future.set_exception(EngineSaturated("Analysis engine shut down before the job ran"))
+        self._dispatcher.join()
+        self._pool.shutdown(wait=True)
+
+    # --- Dispatch ---
+    def _dispatch(self):
+        running = True
+        while running:
+            job = self._queue.get()
+            if job is None:
+                break
+            batch = [job]
+            deadline = time.perf_counter() + self.batch_window
+            while len(batch) < self.batch_size:
+                remaining = deadline - time.perf_counter()
+                try:
+                    job = self._queue.get(timeout=remaining) if remaining > 0 else self._queue.get_nowait()
+                except queue.Empty:
+                    break
+                if job is None:
+                    running = False
+                    break
+                batch.append(job)
+
+            self._inflight.acquire()
+            self._send(batch, with_lexicons=False)
+
+    def _send(self, batch, with_lexicons):
+        if self.analyzer._compiled is not self._lexicon:
+            self._lexicon = self.analyzer._compiled
+            self._version += 1
+        version = self._version
+        lexicons = self._lexicon_payload() if with_lexicons else None
+        try:
+            future = self._pool.submit(_run_batch, version, lexicons, [(kind, payload) for kind, payload, _, _ in batch])
+        except Exception as e:
+            self._fail(batch, e)
+            return
+        future.add_done_callback(lambda done: self._complete(batch, done))
+
+    def _complete(self, batch, done):
+        try:
+            results = done.result()
+        except Exception as e:
+            self._fail(batch, e)
+            return
+        if results == _STALE:
+            # Keep the in-flight slot and resend once with the current lexicons attached
+            self._send(batch, with_lexicons=True)
+            return
+
+        self._inflight.release()
+        finished = time.perf_counter()
+        for (_, _, future, submitted), (ok, value, processing_time) in zip(batch, results):
+            if ok:
+                future.set_result((value, max(finished - submitted - processing_time, 0.0), processing_time))
+            else:
+                future.set_exception(value)
+
+    def _fail(self, batch, error):
+        self._inflight.release()
+        logging.error(f"[NLP Core] Analysis batch of {len(batch)} jobs failed: {error}")
+        for _, _, future, _ in batch:
+            future.set_exception(error)
@@ -1,8 +1,107 @@
 ﻿import re
 import logging
 import math
-from textblob import TextBlob
-from collections import Counter
+from dataclasses import dataclass, asdict
+from types import MappingProxyType
+from collections import Counter, namedtuple
+from config import TEXT_BACKEND
+from text_backend import get_text_backend
+from feature_cache import FEATURE_CACHE
+
+@dataclass(frozen=True, slots=True)
+class AnalysisResult:
+    """
+    Immutable outcome of one analysis. Safe to share across threads and to pickle across
+    processes. Unpacks as (score, classification) for callers of the old tuple API.
+    """
+    score: float
+    classification: str
+    intent: str
+    vector_scores: tuple = () # ((intent, magnitude), ...)
+
+    def __iter__(self):
+        return iter((self.score, self.classification))
+
+    def as_dict(self):
+        data = asdict(self)
+        data["vector_scores"] = dict(self.vector_scores)
+        return data
+
+UNKNOWN_RESULT = AnalysisResult(0.0, "unknown", "unknown")
+
+# Output of the CPU-heavy per-message step (tokenize + sentiment); small and picklable
+MessageFeatures = namedtuple("MessageFeatures", ["words", "subjectivity", "polarity"])
+
+class CompiledLexicon:
+    """
+    Frozen token -> category-bitmask index, built once per lexicon set.
+    Every category count comes out of a single pass over the token stream.
+    """
+
+    def __init__(self, lexicons):
+        self.categories = tuple(lexicons)
+        self.bits = MappingProxyType({name: 1 << i for i, name in enumerate(self.categories)})
+        self.lexicons = MappingProxyType({name: tuple(terms) for name, terms in lexicons.items()})
+
+        index = {}
+        for name, terms in self.lexicons.items():
+            for term in terms:
+                index[term] = index.get(term, 0) | self.bits[name]
+        self.index = MappingProxyType(index)
+
+    def mask(self, *categories):
+        mask = 0
+        for name in categories:
+            mask |= self.bits[name]
+        return mask
+
+    def mask_counts(self, words):
+        # One dict probe per token; misses collapse into the None bucket
+        return Counter(map(self.index.get, words))
+
+    def category_counts(self, mask_counts):
+        counts = dict.fromkeys(self.categories, 0)
+        for mask, n in mask_counts.items():
+            if not mask:
+                continue
+            for name, bit in self.bits.items():
+                if mask & bit:
+                    counts[name] += n
+        return counts
+
+    @staticmethod
+    def hits(mask_counts, mask):
+        return sum(n for m, n in mask_counts.items() if m and m & mask)
+
+class ConversationState:
+    """
+    Compact running analysis state for one conversation: per-message urgency densities,
+    cumulative term counts, the unique-word set and a resumable sentiment scan over the
+    scammer's messages (see TextBackend.sentiment_scan).
+    """
+
+    # Longest possible structural link match: "download" + 30 chars + "attachment"
+    LINK_WINDOW = 48
+
+    __slots__ = ("lexicon", "consumed", "urgency_graph", "mask_counts", "word_counts", "total_words",
+                 "crypto_hits", "lottery_hits", "kindly", "link_hit", "tail", "full_text",
+                 "sentiment", "polarity")
+
+    def __init__(self, lexicon, sentiment=None):
+        self.lexicon = lexicon
+        self.consumed = 0
+        self.urgency_graph = []
+        self.mask_counts = Counter()
+        self.word_counts = Counter()
+        self.total_words = 0
+        self.crypto_hits = 0
+        self.lottery_hits = 0
+        self.kindly = False
+        self.link_hit = False
+        self.tail = ""
+        self.full_text = None
+        self.sentiment = sentiment
+        self.polarity = 0.0
 
 class ScamAnalyzer:
     """
@@ -10,70 +109,204 @@ class ScamAnalyzer:
     Replaces basic heuristics with Psychological Urgency Graphing, TF-IDF style sentence vectoring,
     and Dynamic Coercion Escalation tracking.
     """
+
+    REQUIRED_CATEGORIES = ("financial_assets", "identity_assets", "coercion_vectors", "time_compression", "action_verbs")
+
+    # Cross-Vector weights: intent -> {feature: weight}, where features are lexicon densities and signature rates
+    INTENT_WEIGHTS = {
+        "FINANCIAL_THEFT": {"financial_assets": 1.5, "action_verbs": 1.0},
+        "GENERAL_PHISHING": {"identity_assets": 1.8, "action_verbs": 1.0},
+        "AUTHORITY_IMPERSONATION": {"coercion_vectors": 2.0, "financial_assets": 0.5},
+        "CRYPTO_SCAM": {"financial_assets": 1.2, "crypto_terms": 3.0},
+        "LOTTERY_SCAM": {"financial_assets": 0.8, "lottery_terms": 2.5}
+    }
     
-    def __init__(self):
-        self.sophistication_score = 0.0
-        self.intent = "unknown"
+    def __init__(self, verify_incremental=False, backend=None, feature_extractor=None, feature_cache=FEATURE_CACHE):
+        self.verify_incremental = verify_incremental
+        self.backend = backend or get_text_backend(TEXT_BACKEND)
+        # Per-message feature step; can be pointed at a remote executor (e.g. AnalysisEngine.message_features)
+        self.extract_features = feature_extractor or self.message_features
+        # Memo in front of extract_features (None = featurize every message)
+        self.feature_cache = feature_cache
         
         # Vectorized Topic Lexicons (instead of binary triggers)
-        self.lexicons = {
+        self.reload_lexicons({
             "financial_assets": ["money", "card", "bank", "transfer", "wire", "deposit", "payment", "fee", "charge", "cost", "dollar", "rupee", "usd", "cash", "crypto", "btc", "wallet", "usdt", "eth", "coin"],
             "identity_assets": ["password", "pin", "otp", "code", "credential", "login", "ssn", "identity", "account", "social", "verification", "phrase", "seed"],
             "coercion_vectors": ["police", "lawsuit", "jail", "arrest", "warrant", "legal", "court", "suspended", "blocked", "banned", "fbi", "interpol", "frozen", "investigate", "seized"],
             "time_compression": ["urgent", "immediately", "now", "hurry", "fast", "seconds", "expires", "deadline", "today", "quick", "asap", "limited", "soon"],
             "action_verbs": ["send", "pay", "give", "share", "tell", "click", "download", "install", "submit", "verify", "confirm", "provide"]
+        })
+
+        # Substring signatures counted against the raw text (e.g. "crypto" inside "cryptocurrency")
+        self.signatures = {
+            "crypto_terms": ("crypto", "btc", "wallet"),
+            "lottery_terms": ("won", "prize", "lottery")
         }
 
+    @property
+    def lexicons(self):
+        return self._compiled.lexicons
+
+    def reload_lexicons(self, lexicons):
+        """
+        Hot-swaps the topic lexicons without a restart.
+        The new index is fully built before it replaces the old one, so in-flight
+        analyses keep scoring against a consistent snapshot.
+        """
+        compiled = CompiledLexicon(lexicons)
+        missing = [name for name in self.REQUIRED_CATEGORIES if name not in compiled.bits]
+        if missing:
+            raise ValueError(f"Lexicon set is missing required categories: {missing}")
+        self._compiled = compiled
+        logging.info(f"[NLP Core] Lexicon index compiled: {len(compiled.index)} terms across {len(compiled.categories)} categories")
+
     def analyze_behavior(self, history):
+        """
+        Full recompute over the whole conversation history.
+        This is the reference path that incremental states are verified against.
+        """
         if not history:
-            return 0.0, "unknown"
+            return UNKNOWN_RESULT
 
         scammer_msgs = [m["content"] for m in history if m["role"] == "scammer"]
         if not scammer_msgs:
-            return 0.0, "unknown"
+            return UNKNOWN_RESULT
+
+        lexicon = self._compiled
+        urgency_mask = lexicon.mask("time_compression", "coercion_vectors")
+        state = ConversationState(lexicon)
 
         # 1. Psychological Urgency Graphing
         # Analyze the *rate of change* in urgency over the conversation
-        urgency_graph = []
+        feature_texts = []
         for msg in scammer_msgs:
-            blob = TextBlob(msg.lower())
+            feature_text, features = self.featurize(msg)
+            feature_texts.append(feature_text)
             # Count time compression + coercion tokens in this specific message
-            urgency_tokens = sum(1 for word in blob.words if word in self.lexicons["time_compression"] or word in self.lexicons["coercion_vectors"])
+            urgency_tokens = lexicon.hits(lexicon.mask_counts(features.words), urgency_mask)
             # Normalize by message length to find word density, plus base sentiment subjectivity
-            density = (urgency_tokens / max(len(blob.words), 1)) + (blob.sentiment.subjectivity * 0.2)
-            urgency_graph.append(density)
-
-        # Detect Exponential Escalation (scammer getting impatient/aggressive)
-        escalation_multiplier = 1.0
-        if len(urgency_graph) >= 3:
-            # If the last two messages have higher urgency density than the first half average
-            early_avg = sum(urgency_graph[:len(urgency_graph)//2]) / max(len(urgency_graph[:len(urgency_graph)//2]), 1)
-            late_avg = sum(urgency_graph[len(urgency_graph)//2:]) / max(len(urgency_graph[len(urgency_graph)//2:]), 1)
-            
-            if late_avg > early_avg + 0.1: # Noticeable spike in pressure
-                escalation_multiplier = 1.4 # 40% Threat Spike
-                logging.info("[NLP Core] Coercion Escalation Detected: Scammer is applying pressure.")
+            density = (urgency_tokens / max(len(features.words), 1)) + (features.subjectivity * 0.2)
+            state.urgency_graph.append(density)
 
         # 2. Vectorized Intent Processing (TF-IDF approximation for contexts)
         full_text = " ".join(scammer_msgs).lower()
-        blob = TextBlob(full_text)
-        words = blob.words
-        word_freq = Counter(words)
-        total_words = max(len(words), 1)
+        if len(scammer_msgs) == 1:
+            # The full text is the single message itself - reuse its features
+            words, polarity = features.words, features.polarity
+        else:
+            feature_text = " ".join(feature_texts)
+            words, polarity = self.backend.words(feature_text), self.backend.sentiment(feature_text).polarity
+        state.word_counts = Counter(words)
+        state.total_words = len(words)
+
+        # Calculate Lexicon Densities (Term Frequencies) in a single pass over the tokens
+        state.mask_counts = lexicon.mask_counts(words)
+        state.crypto_hits = sum(full_text.count(term) for term in self.signatures["crypto_terms"])
+        state.lottery_hits = sum(full_text.count(term) for term in self.signatures["lottery_terms"])
+        state.kindly = "kindly" in full_text
+        state.polarity = polarity
+        state.full_text = full_text
+
+        return self._score(state)
+
+    def message_features(self, text):
+        """
+        Tokenizes and sentiment-scores one lowercased message.
+        """
+        sentiment = self.backend.sentiment(text)
+        return MessageFeatures(self.backend.words(text), sentiment.subjectivity, sentiment.polarity)
+
+    def featurize(self, content):
+        """
+        Returns (text, features) for one message: the lowercased message and its features, memoized
+        when the feature cache is on (or the normalized message, for a normalizing cache).
+        """
+        if self.feature_cache is None:
+            text = content.lower()
+            return text, self.extract_features(text)
+        return self.feature_cache.features(content, self.extract_features, self.backend.name)
+
+    def new_state(self):
+        return ConversationState(self._compiled, self.backend.sentiment_scan())
+
+    def observe(self, state, message):
+        """
+        Folds one message into a running ConversationState in O(len(message)) (with the TextBlob
+        backend, polarity is rescored over the joined messages). Non-scammer messages only advance
+        the history cursor.
+        """
+        state.consumed += 1
+        if message["role"] != "scammer":
+            return
+
+        lexicon = state.lexicon
+        text = message["content"].lower()
+        feature_text, features = self.featurize(message["content"])
+        words = features.words
+
+        mask_counts = lexicon.mask_counts(words)
+        urgency_tokens = lexicon.hits(mask_counts, lexicon.mask("time_compression", "coercion_vectors"))
+        state.urgency_graph.append((urgency_tokens / max(len(words), 1)) + (features.subjectivity * 0.2))
+
+        state.mask_counts.update(mask_counts)
+        state.word_counts.update(words)
+        state.total_words += len(words)
+        state.crypto_hits += sum(text.count(term) for term in self.signatures["crypto_terms"])
+        state.lottery_hits += sum(text.count(term) for term in self.signatures["lottery_terms"])
+        state.kindly = state.kindly or "kindly" in text
+
+        # Link phrases may straddle the " " that joins messages, so rescan the carried-over tail too
+        window = f"{state.tail} {text}" if len(state.urgency_graph) > 1 else text
+        if not state.link_hit:
+            state.link_hit = self._structural_link_check(window) == "MALICIOUS_LINK"
+        state.tail = window[-ConversationState.LINK_WINDOW:]
+
+        # Polarity is scored over the joined messages (negations, modifiers and "!" reach into the
+        # next message), exactly as analyze_behavior scores the full text
+        state.polarity = state.sentiment.feed(feature_text).polarity()
 
-        # Calculate Lexicon Densities (Term Frequencies)
-        tf_finance = sum(word_freq[w] for w in self.lexicons["financial_assets"] if w in word_freq) / total_words
-        tf_identity = sum(word_freq[w] for w in self.lexicons["identity_assets"] if w in word_freq) / total_words
-        tf_coercion = sum(word_freq[w] for w in self.lexicons["coercion_vectors"] if w in word_freq) / total_words
-        tf_action = sum(word_freq[w] for w in self.lexicons["action_verbs"] if w in word_freq) / total_words
+    def analyze_incremental(self, state, history):
+        """
+        Scores a conversation from its running state, folding in only the messages
+        appended to `history` since the last call. States built against a previous
+        lexicon set are replayed from scratch.
+        When verify_incremental is enabled the result is checked against a full recompute.
+        """
+        if state.lexicon is not self._compiled:
+            state.__init__(self._compiled, self.backend.sentiment_scan())
+
+        for message in history[state.consumed:]:
+            self.observe(state, message)
+
+        if not state.urgency_graph:
+            result = UNKNOWN_RESULT
+        else:
+            result = self._score(state)
+
+        if self.verify_incremental:
+            expected = self.analyze_behavior(history)
+            if not (math.isclose(result.score, expected.score, abs_tol=1e-9) and result.classification == expected.classification):
+                logging.warning(f"[NLP Core] Incremental state drifted from full recompute: {result} != {expected}")
+                return expected
+
+        return result
+
+    def _score(self, state):
+        escalation_multiplier = self._escalation(state.urgency_graph)
+        if escalation_multiplier > 1.0:
+            logging.info("[NLP Core] Coercion Escalation Detected: Scammer is applying pressure.")
+
+        total_words = max(state.total_words, 1)
+        term_counts = state.lexicon.category_counts(state.mask_counts)
+        term_counts["crypto_terms"] = state.crypto_hits
+        term_counts["lottery_terms"] = state.lottery_hits
+        densities = {feature: count / total_words for feature, count in term_counts.items()}
 
         # Cross-Vector Matrix Multiplication to determine Intent
         vector_scores = {
-            "FINANCIAL_THEFT": (tf_finance * 1.5) + (tf_action * 1.0),
-            "GENERAL_PHISHING": (tf_identity * 1.8) + (tf_action * 1.0),
-            "AUTHORITY_IMPERSONATION": (tf_coercion * 2.0) + (tf_finance * 0.5),
-            "CRYPTO_SCAM": (tf_finance * 1.2) + (full_text.count("crypto") + full_text.count("btc") + full_text.count("wallet")) / total_words * 3.0,
-            "LOTTERY_SCAM": (tf_finance * 0.8) + (full_text.count("won") + full_text.count("prize") + full_text.count("lottery")) / total_words * 2.5
+            intent: sum(densities[feature] * weight for feature, weight in weights.items())
+            for intent, weights in self.INTENT_WEIGHTS.items()
         }
 
         # Find the dominant intent vector
@@ -81,9 +314,12 @@ class ScamAnalyzer:
         
         # If the highest vector score is negligible, fallback to regex structural checks for deep-linked malware/phishing
         if dominant_intent[1] < 0.05:
-            self.intent = self._structural_link_check(full_text)
+            if state.full_text is not None:
+                intent = self._structural_link_check(state.full_text)
+            else:
+                intent = "MALICIOUS_LINK" if state.link_hit else "GENERAL_INQUIRY"
         else:
-            self.intent = dominant_intent[0]
+            intent = dominant_intent[0]
 
         # 3. Final Mathematical Risk Calculation
         # Base risk is the magnitude of the dominant intent vector, scaled
@@ -93,33 +329,45 @@ class ScamAnalyzer:
         mathematical_risk = base_risk * escalation_multiplier
         
         # Add Sentiment Penality
-        if blob.sentiment.polarity < -0.3: # Highly negative/threatening language
+        if state.polarity < -0.3: # Highly negative/threatening language
             mathematical_risk += 0.2
             
         # Sophistication Logic 
-        unique_words = len(set(words))
+        unique_words = len(state.word_counts)
         vocab_richness = unique_words / total_words
         
         # Smart scammers use rich vocabulary; dumb scammers script-kiddie paste
         sophistication = 0.5
         if vocab_richness > 0.6: sophistication += 0.2
-        if "kindly" in full_text: sophistication -= 0.3 # Classic script giveaway
+        if state.kindly: sophistication -= 0.3 # Classic script giveaway
         
-        self.sophistication_score = max(0.0, min(1.0, mathematical_risk + (sophistication * 0.2)))
+        sophistication_score = max(0.0, min(1.0, mathematical_risk + (sophistication * 0.2)))
 
         # Map to Threat Classification based on rigorous threshold
-        if mathematical_risk > 0.65 or self.intent in ["MALICIOUS_LINK"]:
+        if mathematical_risk > 0.65 or intent in ["MALICIOUS_LINK"]:
             threat_classification = "scam"
-            self.sophistication_score = max(self.sophistication_score, 0.90)
+            sophistication_score = max(sophistication_score, 0.90)
         elif mathematical_risk > 0.35:
             threat_classification = "likely_scam"
-            self.sophistication_score = max(self.sophistication_score, 0.70)
+            sophistication_score = max(sophistication_score, 0.70)
         else:
             threat_classification = "benign"
-            self.intent = "GENERAL_INQUIRY"
+            intent = "GENERAL_INQUIRY"
 
         logging.info(f"[NLP Core] Vector Magnitude: {dominant_intent[1]:.4f} | Escalation: {escalation_multiplier} | Threat: {threat_classification}")
-        return self.sophistication_score, threat_classification
+        return AnalysisResult(sophistication_score, threat_classification, intent, tuple(vector_scores.items()))
+
+    @staticmethod
+    def _escalation(urgency_graph):
+        # Detect Exponential Escalation (scammer getting impatient/aggressive)
+        if len(urgency_graph) >= 3:
+            # If the last two messages have higher urgency density than the first half average
+            early_avg = sum(urgency_graph[:len(urgency_graph)//2]) / max(len(urgency_graph[:len(urgency_graph)//2]), 1)
+            late_avg = sum(urgency_graph[len(urgency_graph)//2:]) / max(len(urgency_graph[len(urgency_graph)//2:]), 1)
+            
+            if late_avg > early_avg + 0.1: # Noticeable spike in pressure
+                return 1.4 # 40% Threat Spike
+        return 1.0
 
     def _structural_link_check(self, text):
         link_pattern = r"(click|tap|visit|open|download|install).{0,30}(link|url|website|page|attachment|app|.apk|.exe)"
@@ -0,0 +1,34 @@
+"""
+Request bodies of the /api endpoints, validated by FastAPI before a handler runs.
+"""
+from pydantic import BaseModel
+from typing import List, Optional, Dict, Any
+
+class AnalysisRequest(BaseModel):
+    text: str
+    context: Optional[str] = "general"
+    deep_scan: Optional[bool] = False # opt-in cosmetic "Deep Scan" delay
+
+class ConversationMessage(BaseModel):
+    # What the analyzer reads from each message; other keys (id, timestamp, ...) are ignored
+    role: str
+    content: str
+
+class BatchAnalysisRequest(BaseModel):
+    texts: Optional[List[str]] = None
+    conversations: Optional[List[List[ConversationMessage]]] = None
+    batch_size: Optional[int] = 512
+
+class ReportRequest(BaseModel):
+    conversationId: str
+    scammerName: Optional[str] = "Unknown"
+    platform: Optional[str] = "chat"
+    classification: str
+    confidenceScore: float
+    transcript: List[Dict[str, Any]]
+    iocs: Dict[str, Any]
+    timestamp: str
+
+class LoginRequest(BaseModel):
+    username: str
+    password: str
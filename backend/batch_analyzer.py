@@ -0,0 +1,154 @@
+import logging
+import numpy as np
+from analyzer import AnalysisResult, UNKNOWN_RESULT
+
+class BatchScorer:
+    """
+    Vectorized scoring for large batches of archived texts and conversations.
+    Each batch is turned into sparse (document x lexicon-term) count matrices built from
+    COO triplets; urgency and category counts come out of matrix multiplies and every
+    intent vector is scored for the whole batch at once instead of per document.
+    Results are identical to ScamAnalyzer.analyze_behavior.
+    """
+
+    def __init__(self, analyzer):
+        self.analyzer = analyzer
+        self.lexicon = None
+
+    def _compile(self, lexicon):
+        analyzer = self.analyzer
+        self.vocab = {term: i for i, term in enumerate(lexicon.index)}
+
+        # term -> category incidence, and the time_compression|coercion_vectors urgency column
+        incidence = np.zeros((len(self.vocab), len(lexicon.categories)))
+        urgency = np.zeros(len(self.vocab))
+        urgency_mask = lexicon.mask("time_compression", "coercion_vectors")
+        for term, i in self.vocab.items():
+            mask = lexicon.index[term]
+            for j, name in enumerate(lexicon.categories):
+                if mask & lexicon.bits[name]:
+                    incidence[i, j] = 1.0
+            if mask & urgency_mask:
+                urgency[i] = 1.0
+        self.incidence = incidence
+        self.urgency = urgency
+
+        # Intent vectors as (feature column, weight) pairs mirroring ScamAnalyzer.INTENT_WEIGHTS.
+        # They are applied as ordered column sums rather than a BLAS matmul so fused
+        # multiply-adds can't flip near-tied intents against the single-text scorer.
+        self.features = lexicon.categories + tuple(analyzer.signatures)
+        self.intents = tuple(analyzer.INTENT_WEIGHTS)
+        self.weights = [
+            [(self.features.index(feature), weight) for feature, weight in analyzer.INTENT_WEIGHTS[intent].items()]
+            for intent in self.intents
+        ]
+        self.lexicon = lexicon
+        logging.info(f"[NLP Core] Batch scorer compiled: {len(self.vocab)} terms x {len(self.intents)} intent vectors")
+
+    def _count_matrix(self, rows, cols, n_rows):
+        # Accumulate (row, term) COO triplets straight into a dense count block
+        n_terms = len(self.vocab)
+        flat = np.asarray(rows, dtype=np.int64) * n_terms + np.asarray(cols, dtype=np.int64)
+        return np.bincount(flat, minlength=n_rows * n_terms).reshape(n_rows, n_terms).astype(np.float64)
+
+    def score(self, histories):
+        """
+        Scores a list of conversation histories (lists of {"role", "content"} dicts).
+        Returns one AnalysisResult per history, in order.
+        """
+        analyzer = self.analyzer
+        if analyzer._compiled is not self.lexicon:
+            self._compile(analyzer._compiled)
+        backend = analyzer.backend
+        vocab = self.vocab
+
+        results = [UNKNOWN_RESULT] * len(histories)
+        active = []                                      # result index of every scored document
+        msg_rows, msg_cols, msg_lens, msg_subjectivity = [], [], [], []
+        doc_rows, doc_cols, doc_lens, doc_unique = [], [], [], []
+        signature_hits, polarity, kindly, full_texts, spans = [], [], [], [], []
+
+        for position, history in enumerate(histories):
+            scammer_msgs = [m["content"] for m in history if m["role"] == "scammer"]
+            if not scammer_msgs:
+                continue
+            doc = len(active)
+            active.append(position)
+
+            start = len(msg_lens)
+            feature_texts = []
+            for msg in scammer_msgs:
+                feature_text, features = analyzer.featurize(msg)
+                feature_texts.append(feature_text)
+                words, doc_polarity = features.words, features.polarity
+                ids = [vocab[w] for w in words if w in vocab]
+                msg_rows.extend([len(msg_lens)] * len(ids))
+                msg_cols.extend(ids)
+                msg_lens.append(len(words))
+                msg_subjectivity.append(features.subjectivity)
+            spans.append((start, len(msg_lens)))
+
+            full_text = " ".join(scammer_msgs).lower()
+            if len(scammer_msgs) > 1:
+                feature_text = " ".join(feature_texts)
+                words = backend.words(feature_text)
+                doc_polarity = backend.sentiment(feature_text).polarity
+            ids = [vocab[w] for w in words if w in vocab]
+            doc_rows.extend([doc] * len(ids))
+            doc_cols.extend(ids)
+            doc_lens.append(len(words))
+            doc_unique.append(len(set(words)))
+            signature_hits.append([sum(full_text.count(term) for term in terms) for terms in analyzer.signatures.values()])
+            polarity.append(doc_polarity)
+            kindly.append("kindly" in full_text)
+            full_texts.append(full_text)
+
+        if not active:
+            return results
+
+        # 1. Psychological Urgency Graphing: per-message urgency densities in one multiply
+        message_counts = self._count_matrix(msg_rows, msg_cols, len(msg_lens))
+        urgency_tokens = message_counts @ self.urgency
+        densities = (urgency_tokens / np.maximum(np.asarray(msg_lens, dtype=np.float64), 1)) + (np.asarray(msg_subjectivity) * 0.2)
+        escalation = np.array([analyzer._escalation(densities[a:b].tolist()) for a, b in spans])
+
+        # 2. Vectorized Intent Processing: (docs x terms) @ (terms x categories), then one pass per intent vector
+        doc_counts = self._count_matrix(doc_rows, doc_cols, len(active))
+        total_words = np.maximum(np.asarray(doc_lens, dtype=np.float64), 1)
+        features = np.column_stack([doc_counts @ self.incidence, np.asarray(signature_hits, dtype=np.float64)]) / total_words[:, None]
+        vector_scores = np.column_stack([
+            sum(features[:, column] * weight for column, weight in intent_weights)
+            for intent_weights in self.weights
+        ])
+        dominant = vector_scores.argmax(axis=1)
+        magnitude = vector_scores[np.arange(len(active)), dominant]
+
+        # 3. Final Mathematical Risk Calculation
+        risk = np.minimum(magnitude * 10.0, 0.6) * escalation
+        risk = np.where(np.asarray(polarity) < -0.3, risk + 0.2, risk)
+        sophistication = np.full(len(active), 0.5)
+        sophistication = np.where(np.asarray(doc_unique) / total_words > 0.6, sophistication + 0.2, sophistication)
+        sophistication = np.where(np.asarray(kindly), sophistication - 0.3, sophistication)
+        scores = np.clip(risk + (sophistication * 0.2), 0.0, 1.0)
+
+        for doc, position in enumerate(active):
+            if magnitude[doc] < 0.05:
+                intent = analyzer._structural_link_check(full_texts[doc])
+            else:
+                intent = self.intents[dominant[doc]]
+            score = float(scores[doc])
+
+            if risk[doc] > 0.65 or intent in ["MALICIOUS_LINK"]:
+                classification = "scam"
+                score = max(score, 0.90)
+            elif risk[doc] > 0.35:
+                classification = "likely_scam"
+                score = max(score, 0.70)
+            else:
+                classification = "benign"
+                intent = "GENERAL_INQUIRY"
+
+            scored_vectors = tuple(zip(self.intents, vector_scores[doc].tolist()))
+            results[position] = AnalysisResult(score, classification, intent, scored_vectors)
+
+        return results
@@ -0,0 +1,140 @@
+import json
+import base64
+import binascii
+from datetime import datetime
+from sqlalchemy import select, and_, or_
+from database import Case, CaseTranscript, parse_case_timestamp
+
+# API field name -> column, in the order /api/cases has always returned them
+CASE_FIELDS = {
+    "id": Case.id,
+    "scammerName": Case.scammer_name,
+    "platform": Case.platform,
+    "status": Case.status,
+    "threatLevel": Case.threat_level,
+    "iocs": Case.iocs,
+    "transcript": CaseTranscript.messages,
+    "timestamp": Case.timestamp,
+    "autoReported": Case.auto_reported,
+}
+
+def parse_fields(fields):
+    """
+    Parses a comma-separated `fields=` projection; None/empty selects every field.
+    """
+    if not fields:
+        return list(CASE_FIELDS)
+    selected = [name.strip() for name in fields.split(",") if name.strip()]
+    unknown = [name for name in selected if name not in CASE_FIELDS]
+    if unknown:
+        raise ValueError(f"Unknown case field(s): {', '.join(unknown)}")
+    return list(dict.fromkeys(selected))
+
+def parse_bound(value):
+    """
+    Parses a since/until query value into an aware UTC datetime (None passes through).
+    """
+    if value is None:
+        return None
+    parsed = parse_case_timestamp(value)
+    if parsed is None:
+        raise ValueError(f"Invalid timestamp: {value}")
+    return parsed
+
+def encode_cursor(reported_at, case_id):
+    """
+    Opaque resume token for the (reported_at, id) keyset of the last row returned.
+    """
+    key = [reported_at.isoformat() if reported_at else None, case_id]
+    return base64.urlsafe_b64encode(json.dumps(key).encode("utf-8")).decode("ascii").rstrip("=")
+
+def decode_cursor(cursor):
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        reported_at, case_id = json.loads(base64.urlsafe_b64decode(padded.encode("ascii")))
+        if not isinstance(case_id, str):
+            raise ValueError
+        return (datetime.fromisoformat(reported_at) if reported_at is not None else None), case_id
+    except (ValueError, TypeError, binascii.Error, UnicodeError):
+        raise ValueError("Invalid cursor")
+
+def _after(cursor):
+    # Rows strictly after the cursor in (reported_at DESC NULLS LAST, id DESC) order
+    reported_at, case_id = cursor
+    if reported_at is None:
+        return and_(Case.reported_at.is_(None), Case.id < case_id)
+    return or_(
+        Case.reported_at < reported_at,
+        and_(Case.reported_at == reported_at, Case.id < case_id),
+        Case.reported_at.is_(None),
+    )
+
+def case_select(fields, threat_levels=None, platform=None, since=None, until=None, cursor=None):
+    """
+    Newest-first SELECT over cases of only the projected `fields` (plus the keyset columns),
+    so list views never load transcripts unless they ask for them. Cases whose timestamp
+    could not be parsed sort last. Runs on a Session or an AsyncSession alike.
+    """
+    columns = [CASE_FIELDS[name].label(name) for name in fields]
+    statement = select(Case.reported_at.label("_reported_at"), Case.id.label("_id"), *columns)
+    if "transcript" in fields:
+        statement = statement.outerjoin(CaseTranscript, CaseTranscript.case_id == Case.id)
+    if threat_levels:
+        statement = statement.where(Case.threat_level.in_(threat_levels))
+    if platform:
+        statement = statement.where(Case.platform == platform)
+    if since is not None:
+        statement = statement.where(Case.reported_at >= since)
+    if until is not None:
+        statement = statement.where(Case.reported_at < until)
+    if cursor is not None:
+        statement = statement.where(_after(cursor))
+    return statement.order_by(Case.reported_at.desc().nulls_last(), Case.id.desc())
+
+def case_detail(db, case_id):
+    """
+    Full case (transcript included) by id, or None.
+    """
+    fields = list(CASE_FIELDS)
+    row = db.execute(case_select(fields).where(Case.id == case_id)).first()
+    return row_to_case(row, fields) if row else None
+
+def cases_by_id(db, case_ids, fields):
+    """
+    {id: case} for the given ids that exist, projected to `fields`.
+    """
+    rows = db.execute(case_select(fields).where(Case.id.in_(case_ids))).all() if case_ids else []
+    return {row._id: row_to_case(row, fields) for row in rows}
+
+def case_summary(case):
+    """
+    Every field but the transcript of a Case object, named as /api/cases returns them.
+    """
+    return {name: getattr(case, column.key) for name, column in CASE_FIELDS.items() if name != "transcript"}
+
+def row_to_case(row, fields):
+    return {name: getattr(row, name) for name in fields}
+
+def fetch_page(db, statement, fields, limit):
+    """
+    Returns (cases, next_cursor); next_cursor is None on the last page.
+    """
+    rows = db.execute(statement.limit(limit + 1)).all()
+    page = rows[:limit]
+    next_cursor = encode_cursor(page[-1]._reported_at, page[-1]._id) if len(rows) > limit else None
+    return [row_to_case(row, fields) for row in page], next_cursor
+
+def stream_ndjson(db, statement, fields, batch_size):
+    """
+    Yields one JSON document per case, pulling rows from the DB `batch_size` at a time.
+    """
+    for row in db.execute(statement.execution_options(yield_per=batch_size)):
+        yield json.dumps(row_to_case(row, fields)) + "\n"
+
+async def stream_ndjson_async(db, statement, fields, batch_size):
+    """
+    stream_ndjson for an AsyncSession: a server-side result consumed `batch_size` rows at a time.
+    """
+    result = await db.stream(statement.execution_options(yield_per=batch_size))
+    async for row in result:
+        yield json.dumps(row_to_case(row, fields)) + "\n"
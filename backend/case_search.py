@@ -0,0 +1,129 @@
+import re
+import logging
+import weakref
+from sqlalchemy import select, insert, func, inspect, text
+from database import CaseSearchDoc
+
+SEARCH_TABLE = "case_search"
+# bm25 column weights (scammer_name, iocs, transcript): an IOC or name hit outranks a word in the chat
+RANK_WEIGHTS = (4.0, 8.0, 1.0)
+SNIPPET_OPEN, SNIPPET_CLOSE, SNIPPET_TOKENS = "[", "]", 16
+MAX_QUERY_TERMS = 16
+
+_available = weakref.WeakKeyDictionary()
+
+def create_search_index(engine):
+    """
+    Creates the case_search FTS5 table and the triggers that keep it in step with edits to and
+    deletions of cases. Returns False (and leaves search off) on other databases or a SQLite
+    built without FTS5.
+    Rows are inserted by index_cases() rather than a trigger: transcripts are stored compressed,
+    so SQL can't read their text.
+    """
+    if engine.dialect.name != "sqlite":
+        _available[engine] = False
+        return False
+    CaseSearchDoc.__table__.create(bind=engine, checkfirst=True)
+    weights = ", ".join(str(w) for w in RANK_WEIGHTS)
+    try:
+        with engine.begin() as conn:
+            if not inspect(conn).has_table(SEARCH_TABLE):
+                conn.exec_driver_sql(f"CREATE VIRTUAL TABLE {SEARCH_TABLE} USING fts5("
+                                     "scammer_name, iocs, transcript, tokenize='unicode61 remove_diacritics 2')")
+                conn.exec_driver_sql(f"INSERT INTO {SEARCH_TABLE} ({SEARCH_TABLE}, rank) VALUES ('rank', 'bm25({weights})')")
+                logging.info("[DB] Created the case_search full-text index")
+            conn.exec_driver_sql(f"""
+                CREATE TRIGGER IF NOT EXISTS case_search_update AFTER UPDATE OF scammer_name, iocs ON cases BEGIN
+                    UPDATE {SEARCH_TABLE} SET scammer_name = new.scammer_name,
+                        iocs = (SELECT group_concat(value, ' ') FROM json_tree(new.iocs) WHERE type IN ('text', 'integer', 'real'))
+                    WHERE rowid = (SELECT doc FROM case_search_docs WHERE case_id = new.id);
+                END""")
+            conn.exec_driver_sql(f"""
+                CREATE TRIGGER IF NOT EXISTS case_search_delete AFTER DELETE ON cases BEGIN
+                    DELETE FROM {SEARCH_TABLE} WHERE rowid = (SELECT doc FROM case_search_docs WHERE case_id = old.id);
+                    DELETE FROM case_search_docs WHERE case_id = old.id;
+                END""")
+    except Exception as e:
+        if "fts5" not in str(e).lower():
+            raise
+        logging.warning(f"[DB] Full-text case search disabled: SQLite was built without FTS5 ({e})")
+        _available[engine] = False
+        return False
+    _available[engine] = True
+    return True
+
+def has_search_index(db):
+    conn = db.connection()
+    if conn.engine not in _available:
+        _available[conn.engine] = conn.dialect.name == "sqlite" and inspect(conn).has_table(SEARCH_TABLE)
+    return _available[conn.engine]
+
+def ioc_text(iocs):
+    """
+    Every string/number leaf of a case's IOC document, space-separated (what the update trigger's json_tree yields).
+    """
+    if isinstance(iocs, dict):
+        return " ".join(filter(None, (ioc_text(value) for value in iocs.values())))
+    if isinstance(iocs, list):
+        return " ".join(filter(None, (ioc_text(value) for value in iocs)))
+    if isinstance(iocs, (str, int, float)) and not isinstance(iocs, bool):
+        return str(iocs)
+    return ""
+
+def transcript_search_text(transcript):
+    return "\n".join(m["content"] for m in transcript or [] if isinstance(m, dict) and isinstance(m.get("content"), str))
+
+def index_cases(db, cases):
+    """
+    Adds (case_id, scammer_name, iocs, transcript) tuples to the full-text index in the caller's
+    transaction. Returns how many were indexed (0 when search is unavailable).
+    """
+    cases = list(cases)
+    if not cases or not has_search_index(db):
+        return 0
+    first = db.execute(select(func.coalesce(func.max(CaseSearchDoc.doc), 0))).scalar() + 1
+    db.execute(insert(CaseSearchDoc), [{"doc": first + i, "case_id": case[0]} for i, case in enumerate(cases)])
+    db.execute(text(f"INSERT INTO {SEARCH_TABLE} (rowid, scammer_name, iocs, transcript) "
+                    "VALUES (:doc, :scammer_name, :iocs, :transcript)"), [
+        {"doc": first + i, "scammer_name": scammer_name or "", "iocs": ioc_text(iocs), "transcript": transcript_search_text(transcript)}
+        for i, (_, scammer_name, iocs, transcript) in enumerate(cases)
+    ])
+    return len(cases)
+
+def match_expression(query):
+    """
+    FTS5 MATCH expression for a user query: every word or "quoted phrase" must appear (in any
+    column), a trailing * makes a word a prefix. Punctuation inside a term (phone numbers, URLs,
+    emails) becomes a phrase of its parts, so it never reaches FTS5's query syntax.
+    """
+    terms = []
+    for phrase, word in re.findall(r'"([^"]*)"|(\S+)', query or ""):
+        term = phrase or word
+        prefix = not phrase and term.endswith("*")
+        term = term.rstrip("*") if prefix else term
+        if re.search(r"\w", term):
+            terms.append('"' + term.replace('"', '""') + '"' + ("*" if prefix else ""))
+    if not terms:
+        raise ValueError("Search query has no words")
+    if len(terms) > MAX_QUERY_TERMS:
+        raise ValueError(f"Search query exceeds {MAX_QUERY_TERMS} terms")
+    return " ".join(terms)
+
+def search_cases(db, query, limit, offset=0):
+    """
+    Ranked (bm25) matches for `query`: [(case_id, score, snippet)], best first, plus whether more
+    follow this page. Raises ValueError for an empty query, LookupError when search is unavailable.
+    """
+    expression = match_expression(query)
+    if not has_search_index(db):
+        raise LookupError("Full-text search needs SQLite with FTS5")
+    rows = db.execute(text(
+        f"SELECT d.case_id, {SEARCH_TABLE}.rank, "
+        f"snippet({SEARCH_TABLE}, -1, :open, :close, '…', :tokens) "
+        f"FROM {SEARCH_TABLE} JOIN case_search_docs d ON d.doc = {SEARCH_TABLE}.rowid "
+        f"WHERE {SEARCH_TABLE} MATCH :expression ORDER BY {SEARCH_TABLE}.rank, {SEARCH_TABLE}.rowid LIMIT :limit OFFSET :offset"
+    ), {"expression": expression, "open": SNIPPET_OPEN, "close": SNIPPET_CLOSE, "tokens": SNIPPET_TOKENS,
+        "limit": limit + 1, "offset": offset}).all()
+    # Unrounded: bm25 of a word most cases contain is ~1e-6 and would round to 0
+    hits = [(case_id, -rank, snippet) for case_id, rank, snippet in rows[:limit]]
+    return hits, len(rows) > limit
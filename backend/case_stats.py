@@ -0,0 +1,390 @@
+import zlib
+import hashlib
+import logging
+import numpy as np
+from collections import Counter
+from datetime import datetime, timedelta, timezone
+from sqlalchemy import func, case, and_, or_, distinct, insert
+from sqlalchemy.dialects import sqlite, postgresql
+from sqlalchemy.exc import IntegrityError
+from database import Case, StatsCounter, StatsTypeCount, StatsRollup, StatsRollupScammer, StatsRollupScammerHLL, StatsRollupSketch
+from hyperloglog import HyperLogLog, precision_for_error
+from config import SCAMMER_COUNT_MODE, SCAMMER_HLL_ERROR
+
+THREAT_TYPES = ["ROMANCE", "CRYPTO", "JOB", "IMPERSONATION", "LOTTERY", "TECHNICAL_SUPPORT", "AUTHORITY", "OTHER"]
+
+# Dashboard windows, narrowest first
+STATS_WINDOWS = (("today", timedelta(days=1)), ("week", timedelta(days=7)), ("month", timedelta(days=30)))
+HOUR = timedelta(hours=1)
+ROLLUP_INSERT_BATCH = 5000
+
+def threat_type(threat_level):
+    """
+    Folds a case's free-form threat_level into one of THREAT_TYPES.
+    """
+    ctype = threat_level.upper() if threat_level else "OTHER"
+    return ctype if ctype in THREAT_TYPES else "OTHER"
+
+def hour_bucket(moment):
+    return moment.astimezone(timezone.utc).replace(minute=0, second=0, microsecond=0)
+
+def scammer_hash(name):
+    """
+    Stable signed 64-bit hash of a scammer name (fits a BIGINT column).
+    """
+    return int.from_bytes(hashlib.blake2b(name.encode("utf-8"), digest_size=8).digest(), "big", signed=True)
+
+def _window_result(counts, breakdowns, scammers):
+    stats = {}
+    for i, (name, _) in enumerate(STATS_WINDOWS):
+        stats[name] = counts[i]
+        stats[f"{name}_types"] = breakdowns[i]
+        stats[f"{name}_scammers"] = scammers[i]
+    return stats
+
+def window_stats(db, now=None):
+    """
+    Case counts, per-type breakdowns and distinct scammers for every STATS_WINDOWS window,
+    computed in the database: one GROUP BY threat_level pass plus one distinct-count pass,
+    both index range scans over reported_at (covering threat_level and scammer_name).
+    Returns {"<window>": count, "<window>_types": {...}, "<window>_scammers": n} per window.
+    """
+    now = now or datetime.now(timezone.utc)
+    in_window = [Case.reported_at > now - span for _, span in STATS_WINDOWS]
+    widest = in_window[-1]
+
+    # 1. Counts per raw threat_level and window; folding into THREAT_TYPES happens in Python
+    # so the upper-casing matches the original str.upper() exactly
+    rows = (
+        db.query(Case.threat_level, *[func.count(case((condition, 1))) for condition in in_window])
+        .filter(widest)
+        .group_by(Case.threat_level)
+        .all()
+    )
+    counts = [0] * len(STATS_WINDOWS)
+    breakdowns = [{t: 0 for t in THREAT_TYPES} for _ in STATS_WINDOWS]
+    for threat_level, *window_counts in rows:
+        ctype = threat_type(threat_level)
+        for i, n in enumerate(window_counts):
+            counts[i] += n
+            breakdowns[i][ctype] += n
+
+    # 2. Distinct (non-empty) scammer names per window
+    named = and_(Case.scammer_name.isnot(None), Case.scammer_name != "")
+    scammers = (
+        db.query(*[func.count(distinct(case((and_(condition, named), Case.scammer_name)))) for condition in in_window])
+        .filter(widest)
+        .one()
+    )
+
+    return _window_result(counts, breakdowns, scammers)
+
+# --- Hourly rollups ---
+UPSERT_RETRIES = 5
+
+def _dialect_insert(db):
+    """
+    The dialect's INSERT with ON CONFLICT support, or None (other databases use _generic_upsert).
+    """
+    dialect = db.get_bind().dialect.name
+    if dialect == "sqlite":
+        return sqlite.insert
+    if dialect == "postgresql":
+        return postgresql.insert
+    return None
+
+def _generic_upsert(db, model, row, changes):
+    """
+    Portable upsert of one row, keyed by the model's primary key: SELECT ... FOR UPDATE, then
+    UPDATE with `changes` (None: leave an existing row alone) or INSERT in a savepoint. An
+    IntegrityError means a concurrent transaction inserted the row first; retry against it.
+    """
+    keys = [column.key for column in model.__table__.primary_key]
+    match = and_(*(getattr(model, key) == row[key] for key in keys))
+    for _ in range(UPSERT_RETRIES):
+        if db.query(getattr(model, keys[0])).filter(match).with_for_update().first() is not None:
+            if changes:
+                db.query(model).filter(match).update(changes, synchronize_session=False)
+            return
+        try:
+            with db.begin_nested():
+                db.execute(insert(model).values(**row))
+            return
+        except IntegrityError:
+            continue
+    raise RuntimeError(f"Upsert into {model.__tablename__} kept conflicting after {UPSERT_RETRIES} attempts")
+
+def _upsert_add(db, model, column, rows):
+    """
+    Inserts each row, or adds its `column` value onto the existing row with the same primary key.
+    """
+    dialect_insert = _dialect_insert(db)
+    if dialect_insert is None:
+        for row in rows:
+            _generic_upsert(db, model, row, {column: getattr(model, column) + row[column]})
+        return
+    upsert = dialect_insert(model)
+    keys = [c.key for c in model.__table__.primary_key]
+    db.execute(upsert.on_conflict_do_update(index_elements=keys, set_={column: getattr(model, column) + upsert.excluded[column]}), rows)
+
+def _insert_missing(db, model, rows):
+    """
+    Inserts the rows whose primary key isn't stored yet, leaving existing ones untouched.
+    """
+    dialect_insert = _dialect_insert(db)
+    if dialect_insert is None:
+        for row in rows:
+            _generic_upsert(db, model, row, None)
+        return
+    db.execute(dialect_insert(model).on_conflict_do_nothing(), rows)
+
+# --- Lifetime report counters ---
+REPORT_COUNTERS = ("reports_filed", "scams_detected")
+
+def record_report_counts(db, classifications):
+    """
+    Counts received reports into the lifetime totals and per-type counts inside the caller's
+    transaction. Each counter is a `count = count + n` upsert on its own row, so concurrent
+    reporters neither lose increments nor serialize on one shared row; rows are touched in key
+    order so concurrent batches lock them consistently.
+    """
+    types = Counter(classification.upper() for classification in classifications)
+    if not types:
+        return
+    _upsert_add(db, StatsCounter, "count", [{"name": name, "count": sum(types.values())} for name in sorted(REPORT_COUNTERS)])
+    _upsert_add(db, StatsTypeCount, "count", [{"threat_type": ctype, "count": n} for ctype, n in sorted(types.items())])
+
+def report_counts(db):
+    """
+    Returns {"reports_filed": n, "scams_detected": n, "types": {type: n}} from the counter tables.
+    """
+    totals = dict(db.query(StatsCounter.name, StatsCounter.count))
+    counts = {name: totals.get(name, 0) for name in REPORT_COUNTERS}
+    counts["types"] = dict(db.query(StatsTypeCount.threat_type, StatsTypeCount.count).order_by(StatsTypeCount.threat_type))
+    return counts
+
+class ExactScammerSketch:
+    """
+    Exact distinct-scammer counts: one 64-bit name hash per scammer per hour bucket.
+    Space grows with distinct scammers per hour; fine for small deployments.
+    """
+    mode = "exact"
+    key = "exact"
+    table = StatsRollupScammer
+
+    def record(self, db, bucket_hashes):
+        _insert_missing(db, StatsRollupScammer, [{"bucket": bucket, "scammer_hash": h} for bucket, h in set(bucket_hashes)])
+
+    def clear(self, db):
+        db.query(StatsRollupScammer).delete()
+
+    def rebuild_rows(self, bucket_hashes):
+        return [{"bucket": bucket, "scammer_hash": h} for bucket, h in bucket_hashes]
+
+    def count_windows(self, db, firsts, edge_hashes):
+        # Union of the bucket hash sets, plus edge names not already in them
+        scammers = list(
+            db.query(*[func.count(distinct(case((StatsRollupScammer.bucket >= first, StatsRollupScammer.scammer_hash))))
+                       for first in firsts])
+            .filter(StatsRollupScammer.bucket >= firsts[-1])
+            .one()
+        )
+        for i, hashes in enumerate(edge_hashes):
+            if hashes:
+                seen = (
+                    db.query(func.count(distinct(StatsRollupScammer.scammer_hash)))
+                    .filter(StatsRollupScammer.bucket >= firsts[i], StatsRollupScammer.scammer_hash.in_(hashes))
+                    .scalar()
+                )
+                scammers[i] += len(hashes) - seen
+        return scammers
+
+class HLLScammerSketch:
+    """
+    Estimated distinct-scammer counts from per-bucket HyperLogLog sketches. A window merges
+    at most 720 fixed-size register arrays (register-wise max) however many scammers it saw;
+    the relative standard error is 1.04 / sqrt(2^precision).
+    """
+    mode = "hll"
+    table = StatsRollupScammerHLL
+
+    def __init__(self, relative_error):
+        self.precision = precision_for_error(relative_error)
+        self.key = f"hll:{self.precision}"
+
+    def record(self, db, bucket_hashes):
+        T = StatsRollupScammerHLL
+        by_bucket = {}
+        for bucket, h in bucket_hashes:
+            by_bucket.setdefault(bucket, []).append(h)
+        for bucket, hashes in by_bucket.items():
+            key = and_(T.precision == self.precision, T.bucket == bucket)
+            # Make sure the bucket row exists, then read-modify-write it under a row lock
+            # (SQLite already holds the write lock from the rollup upsert at this point)
+            _insert_missing(db, T, [{"precision": self.precision, "bucket": bucket, "registers": HyperLogLog(self.precision).to_bytes()}])
+            packed = db.query(T.registers).filter(key).with_for_update().scalar()
+            sketch = HyperLogLog.from_bytes(self.precision, packed)
+            before = bytes(sketch.registers)
+            for h in hashes:
+                sketch.add(h)
+            if sketch.registers != before:
+                db.query(T).filter(key).update({T.registers: sketch.to_bytes()}, synchronize_session=False)
+
+    def clear(self, db):
+        db.query(StatsRollupScammerHLL).filter(StatsRollupScammerHLL.precision == self.precision).delete()
+
+    def rebuild_rows(self, bucket_hashes):
+        sketches = {}
+        for bucket, h in bucket_hashes:
+            if bucket not in sketches:
+                sketches[bucket] = HyperLogLog(self.precision)
+            sketches[bucket].add(h)
+        return [{"precision": self.precision, "bucket": bucket, "registers": sketch.to_bytes()}
+                for bucket, sketch in sketches.items()]
+
+    def count_windows(self, db, firsts, edge_hashes):
+        # Walk buckets newest first keeping a running register-wise max; each window takes a
+        # snapshot once the walk passes its first bucket, then folds in its edge-hour names
+        T = StatsRollupScammerHLL
+        rows = (
+            db.query(T.bucket, T.registers)
+            .filter(T.precision == self.precision, T.bucket >= firsts[-1])
+            .order_by(T.bucket.desc())
+            .all()
+        )
+        order = sorted(range(len(firsts)), key=lambda i: firsts[i], reverse=True)
+        merged = np.zeros(1 << self.precision, dtype=np.uint8)
+        snapshots = [None] * len(firsts)
+        position = 0
+        for i in order:
+            while position < len(rows) and rows[position].bucket >= firsts[i]:
+                np.maximum(merged, np.frombuffer(zlib.decompress(rows[position].registers), dtype=np.uint8), out=merged)
+                position += 1
+            snapshots[i] = HyperLogLog(self.precision, merged.tobytes())
+
+        for sketch, hashes in zip(snapshots, edge_hashes):
+            for h in hashes:
+                sketch.add(h)
+        return [sketch.count() for sketch in snapshots]
+
+def make_scammer_sketch(mode, relative_error=SCAMMER_HLL_ERROR):
+    if mode == "exact":
+        return ExactScammerSketch()
+    if mode == "hll":
+        return HLLScammerSketch(relative_error)
+    raise ValueError(f"Unknown scammer count mode '{mode}'. Available: ['exact', 'hll']")
+
+SCAMMER_SKETCH = make_scammer_sketch(SCAMMER_COUNT_MODE)
+
+def record_case_rollup(db, case_row, sketch=None):
+    """
+    Folds one new case into its hour bucket inside the caller's transaction.
+    Every write is a single upsert, so concurrent reports never lose an increment.
+    """
+    record_case_rollups(db, [case_row], sketch)
+
+def record_case_rollups(db, case_rows, sketch=None):
+    """
+    Folds a batch of new cases into their hour buckets inside the caller's transaction:
+    one upsert per (bucket, threat type) touched, adding that pair's case count.
+    """
+    counts, bucket_hashes = Counter(), []
+    for case_row in case_rows:
+        if case_row.reported_at is None:
+            continue
+        bucket = hour_bucket(case_row.reported_at)
+        counts[bucket, threat_type(case_row.threat_level)] += 1
+        if case_row.scammer_name:
+            bucket_hashes.append((bucket, scammer_hash(case_row.scammer_name)))
+    if not counts:
+        return
+    _upsert_add(db, StatsRollup, "cases", [{"bucket": bucket, "threat_type": ctype, "cases": n} for (bucket, ctype), n in counts.items()])
+    if bucket_hashes:
+        (sketch or SCAMMER_SKETCH).record(db, bucket_hashes)
+
+def rollup_window_stats(db, now=None, sketch=None):
+    """
+    Same result as window_stats, served from the hourly rollups: every window sums its whole
+    hour buckets (at most 720 for the month) and only the partial hour at its start is read
+    from the cases table. Distinct scammers come from the configured sketch - exact, or a
+    HyperLogLog estimate in "hll" mode.
+    """
+    now = now or datetime.now(timezone.utc)
+    starts = [now - span for _, span in STATS_WINDOWS]
+    # First bucket lying entirely inside each window (bounds are exclusive, like window_stats)
+    firsts = [hour_bucket(start) + HOUR for start in starts]
+
+    # 1. Whole hours straight from the rollup
+    rows = (
+        db.query(StatsRollup.threat_type,
+                 *[func.sum(case((StatsRollup.bucket >= first, StatsRollup.cases), else_=0)) for first in firsts])
+        .filter(StatsRollup.bucket >= firsts[-1])
+        .group_by(StatsRollup.threat_type)
+        .all()
+    )
+    counts = [0] * len(STATS_WINDOWS)
+    breakdowns = [{t: 0 for t in THREAT_TYPES} for _ in STATS_WINDOWS]
+    for ctype, *window_counts in rows:
+        for i, n in enumerate(window_counts):
+            counts[i] += n
+            breakdowns[i][ctype] += n
+
+    # 2. The partial hour at the start of each window, from the cases index
+    edges = [and_(Case.reported_at > start, Case.reported_at < first) for start, first in zip(starts, firsts)]
+    edge_hashes = [set() for _ in STATS_WINDOWS]
+    for threat_level, scammer_name, reported_at in (
+        db.query(Case.threat_level, Case.scammer_name, Case.reported_at).filter(or_(*edges)).all()
+    ):
+        for i, (start, first) in enumerate(zip(starts, firsts)):
+            if start < reported_at < first:
+                counts[i] += 1
+                breakdowns[i][threat_type(threat_level)] += 1
+                if scammer_name:
+                    edge_hashes[i].add(scammer_hash(scammer_name))
+
+    # 3. Distinct scammers
+    scammers = (sketch or SCAMMER_SKETCH).count_windows(db, firsts, edge_hashes)
+
+    return _window_result(counts, breakdowns, scammers)
+
+def maintained_sketch(db):
+    """
+    Key of the scammer sketch the rollups were last rebuilt with, or None if never recorded.
+    """
+    return db.query(StatsRollupSketch.sketch).filter(StatsRollupSketch.id == 1).scalar()
+
+def set_maintained_sketch(db, sketch):
+    db.merge(StatsRollupSketch(id=1, sketch=sketch.key))
+
+def rebuild_rollups(db, sketch=None):
+    """
+    Recomputes every rollup bucket (and the configured scammer sketch) from the raw cases
+    table in one transaction, and records that sketch as the maintained one.
+    Returns (type buckets, scammer sketch rows) written.
+    """
+    sketch = sketch or SCAMMER_SKETCH
+    start_time = datetime.now()
+    sketch.clear(db)
+    db.query(StatsRollup).delete()
+
+    counts, hashes = Counter(), set()
+    for reported_at, threat_level, scammer_name in (
+        db.query(Case.reported_at, Case.threat_level, Case.scammer_name)
+        .filter(Case.reported_at.isnot(None))
+        .yield_per(ROLLUP_INSERT_BATCH)
+    ):
+        bucket = hour_bucket(reported_at)
+        counts[(bucket, threat_type(threat_level))] += 1
+        if scammer_name:
+            hashes.add((bucket, scammer_hash(scammer_name)))
+
+    rollups = [{"bucket": bucket, "threat_type": ctype, "cases": n} for (bucket, ctype), n in counts.items()]
+    sketches = sketch.rebuild_rows(hashes)
+    for table, rows in ((StatsRollup, rollups), (sketch.table, sketches)):
+        for i in range(0, len(rows), ROLLUP_INSERT_BATCH):
+            db.execute(insert(table), rows[i:i + ROLLUP_INSERT_BATCH])
+    set_maintained_sketch(db, sketch)
+    db.commit()
+    logging.info(f"[Stats] Rebuilt rollups: {len(rollups)} type buckets, {len(sketches)} {sketch.mode} scammer "
+                 f"sketch rows in {(datetime.now() - start_time).total_seconds():.2f}s")
+    return len(rollups), len(sketches)
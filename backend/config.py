@@ -1,4 +1,5 @@
 import re
+import os
 
 # Persona Configuration
 PERSONA = {
@@ -57,3 +58,94 @@ SENSITIVE_PATTERNS = {
 UNSAFE_KEYWORDS = [
     "send money", "transfer", "bank account", "password", "login", "otp", "pin", "cvv"
 ]
+
+# Agent Classification (substring hits in the lowercased message)
+SCAM_KEYWORDS = ["verify your wallet", "private key", "bank details", "earn $", "compromised", "limited spots"]
+LINK_MARKERS = ["http", ".com"]
+
+# NLP Text Backend ("regex" = built-in tokenizer + lexicon sentiment, "textblob" = TextBlob compatibility)
+TEXT_BACKEND = os.environ.get("TEXT_BACKEND", "regex")
+
+# Per-message feature memo (tokens + sentiment keyed by the hash of the lowercased message): entry cap (0 = off),
+# eviction policy ("lru" / "lfu"), and a JSON file that keeps it across restarts ("" = don't).
+# FEATURE_CACHE_NORMALIZE=1 featurizes the PII-redacted, case-folded, whitespace-collapsed text instead, so scripted
+# messages that differ only in phone numbers/emails share an entry; this changes scores, as PII tokens are replaced
+FEATURE_CACHE_SIZE = int(os.environ.get("FEATURE_CACHE_SIZE", 50000))
+FEATURE_CACHE_POLICY = os.environ.get("FEATURE_CACHE_POLICY", "lfu")
+FEATURE_CACHE_PATH = os.environ.get("FEATURE_CACHE_PATH", "")
+FEATURE_CACHE_NORMALIZE = os.environ.get("FEATURE_CACHE_NORMALIZE", "0") == "1"
+
+# Analysis Execution (bounded worker pool for CPU-bound scoring; cosmetic "Deep Scan" delay is opt-in per request)
+ANALYSIS_WORKERS = int(os.environ.get("ANALYSIS_WORKERS", os.cpu_count() or 4))
+DEEP_SCAN_DELAY = 0.5
+
+# Process-pool analysis engine (0 = disabled, score on the in-process thread pool above)
+ANALYSIS_PROCESSES = int(os.environ.get("ANALYSIS_PROCESSES", 0))
+ANALYSIS_QUEUE_LIMIT = int(os.environ.get("ANALYSIS_QUEUE_LIMIT", 1024))
+ANALYSIS_BATCH_SIZE = int(os.environ.get("ANALYSIS_BATCH_SIZE", 32))
+
+# Distinct-scammer counts in /api/stats ("exact" = per-hour hash sets, "hll" = HyperLogLog sketches
+# whose relative standard error stays within SCAMMER_HLL_ERROR, in constant space per hour)
+SCAMMER_COUNT_MODE = os.environ.get("SCAMMER_COUNT_MODE", "exact")
+SCAMMER_HLL_ERROR = float(os.environ.get("SCAMMER_HLL_ERROR", 0.01))
+
+# /api/cases paging (page size when `limit` is omitted, hard cap per page, rows per DB fetch when streaming NDJSON)
+CASES_PAGE_SIZE = int(os.environ.get("CASES_PAGE_SIZE", 100))
+CASES_MAX_PAGE_SIZE = int(os.environ.get("CASES_MAX_PAGE_SIZE", 1000))
+CASES_STREAM_BATCH = int(os.environ.get("CASES_STREAM_BATCH", 1000))
+
+# Case transcript storage: "zlib" or "zstd" (needs the zstandard package), optionally against a preset
+# dictionary trained from the first TRANSCRIPT_DICT_SAMPLES stored transcripts once at least
+# TRANSCRIPT_DICT_MIN_SAMPLES exist (zlib dictionaries are capped at 32 KB)
+TRANSCRIPT_COMPRESSION = os.environ.get("TRANSCRIPT_COMPRESSION", "zlib")
+TRANSCRIPT_COMPRESSION_LEVEL = int(os.environ.get("TRANSCRIPT_COMPRESSION_LEVEL", 6))
+TRANSCRIPT_DICTIONARY = os.environ.get("TRANSCRIPT_DICTIONARY", "1") == "1"
+TRANSCRIPT_DICT_SIZE = int(os.environ.get("TRANSCRIPT_DICT_SIZE", 32768))
+TRANSCRIPT_DICT_MIN_SAMPLES = int(os.environ.get("TRANSCRIPT_DICT_MIN_SAMPLES", 200))
+TRANSCRIPT_DICT_SAMPLES = int(os.environ.get("TRANSCRIPT_DICT_SAMPLES", 5000))
+# While serving, each worker checks this often (seconds) for dictionaries stored by other workers, and trains
+# the first one once enough transcripts exist; a dictionary is only written with after two such periods
+TRANSCRIPT_DICT_REFRESH = float(os.environ.get("TRANSCRIPT_DICT_REFRESH", 60))
+
+# Database connections. SQLITE_DB_PATH overrides the default backend/scam_honeypot.db file; SQLITE_TUNING=1 applies
+# WAL + synchronous=NORMAL, a busy timeout, mmap'd reads, a larger page cache and in-memory temp storage to every
+# SQLite connection (0 keeps SQLite's defaults: rollback journal, synchronous=FULL, fail fast on a locked database)
+SQLITE_DB_PATH = os.environ.get("SQLITE_DB_PATH", "")
+SQLITE_TUNING = os.environ.get("SQLITE_TUNING", "1") == "1"
+SQLITE_SYNCHRONOUS = os.environ.get("SQLITE_SYNCHRONOUS", "NORMAL")
+SQLITE_BUSY_TIMEOUT_MS = int(os.environ.get("SQLITE_BUSY_TIMEOUT_MS", 15000))
+SQLITE_MMAP_SIZE = int(os.environ.get("SQLITE_MMAP_SIZE", 256 * 1024 * 1024))
+SQLITE_CACHE_SIZE_KB = int(os.environ.get("SQLITE_CACHE_SIZE_KB", 64 * 1024))
+DB_POOL_SIZE = int(os.environ.get("DB_POOL_SIZE", 10))
+DB_MAX_OVERFLOW = int(os.environ.get("DB_MAX_OVERFLOW", 20))
+DB_POOL_TIMEOUT = int(os.environ.get("DB_POOL_TIMEOUT", 30))
+
+# Per-client API rate limits (slowapi); RATE_LIMIT_ENABLED=0 turns them off, e.g. for load testing
+RATE_LIMIT_ENABLED = os.environ.get("RATE_LIMIT_ENABLED", "1") == "1"
+
+# Response cache for /api/stats and /api/cases JSON pages (invalidated by every report write, ETag/304 for polls).
+# RESPONSE_CACHE_BACKEND=redis keeps the invalidation counter in Redis (RESPONSE_CACHE_REDIS_URL, needs the redis
+# package) so every uvicorn worker drops its entries when any worker stores a report; "local" is per process
+RESPONSE_CACHE_ENABLED = os.environ.get("RESPONSE_CACHE_ENABLED", "1") == "1"
+RESPONSE_CACHE_BACKEND = os.environ.get("RESPONSE_CACHE_BACKEND", "local")
+RESPONSE_CACHE_REDIS_URL = os.environ.get("RESPONSE_CACHE_REDIS_URL", "redis://localhost:6379/0")
+RESPONSE_CACHE_MAX_ENTRIES = int(os.environ.get("RESPONSE_CACHE_MAX_ENTRIES", 512))
+STATS_CACHE_TTL = float(os.environ.get("STATS_CACHE_TTL", 15))
+CASES_CACHE_TTL = float(os.environ.get("CASES_CACHE_TTL", 60))
+
+# Push feed (GET /api/stream): queued events per client before stats deltas coalesce / old events drop, events
+# kept for resuming clients, seconds between keepalive comments
+PUSH_MAX_PENDING = int(os.environ.get("PUSH_MAX_PENDING", 256))
+PUSH_HISTORY = int(os.environ.get("PUSH_HISTORY", 1024))
+PUSH_KEEPALIVE = float(os.environ.get("PUSH_KEEPALIVE", 15))
+
+# Near-duplicate script index (MinHash + LSH over case transcripts, GET /api/cases/{id}/similar): signature length,
+# LSH bands (candidates share a whole band of NUM_PERM/BANDS rows; 128/32 catches Jaccard >= ~0.5), the default
+# similarity cut-off and where the index is saved on shutdown
+SIMILARITY_NUM_PERM = int(os.environ.get("SIMILARITY_NUM_PERM", 128))
+SIMILARITY_BANDS = int(os.environ.get("SIMILARITY_BANDS", 32))
+SIMILARITY_THRESHOLD = float(os.environ.get("SIMILARITY_THRESHOLD", 0.5))
+SIMILARITY_INDEX_PATH = os.environ.get("SIMILARITY_INDEX_PATH", os.path.join(os.path.dirname(os.path.abspath(__file__)), "similarity_index.npz"))
+# Startup catch-up re-checks cases reported up to this many seconds before the saved index's high-water mark
+# (reports committed out of timestamp order); older stragglers are indexed on their first /similar request
+SIMILARITY_CATCH_UP_OVERLAP = float(os.environ.get("SIMILARITY_CATCH_UP_OVERLAP", 3600))
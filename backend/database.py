@@ -1,27 +1,127 @@
-from sqlalchemy import create_engine, Column, Integer, String, Float, Text, Boolean, JSON, DateTime
+from sqlalchemy import create_engine, event, Column, Integer, BigInteger, String, Float, Text, Boolean, JSON, DateTime, Index, LargeBinary, ForeignKey
+from sqlalchemy.types import TypeDecorator
+from sqlalchemy.engine import make_url
+from sqlalchemy.ext.asyncio import create_async_engine, async_sessionmaker
 from sqlalchemy.ext.declarative import declarative_base
-from sqlalchemy.orm import sessionmaker
+from sqlalchemy.orm import sessionmaker, relationship
+from sqlalchemy.ext.associationproxy import association_proxy
 import datetime
 import os
+from transcript_codec import TRANSCRIPT_CODEC
+from config import SQLITE_DB_PATH, SQLITE_TUNING, SQLITE_SYNCHRONOUS, SQLITE_BUSY_TIMEOUT_MS, SQLITE_MMAP_SIZE, SQLITE_CACHE_SIZE_KB
+from config import DB_POOL_SIZE, DB_MAX_OVERFLOW, DB_POOL_TIMEOUT
 
 # Determine database URL - always use a path we can write to
 _db_url = os.environ.get("DATABASE_URL", "")
 
 if not _db_url or _db_url.startswith("sqlite"):
     # Use a path inside the working directory (always writable in Docker)
-    _db_file = os.path.join(os.path.dirname(os.path.abspath(__file__)), "scam_honeypot.db")
+    _db_file = SQLITE_DB_PATH or os.path.join(os.path.dirname(os.path.abspath(__file__)), "scam_honeypot.db")
     SQLALCHEMY_DATABASE_URL = f"sqlite:///{_db_file}"
     # Ensure parent directory exists
-    os.makedirs(os.path.dirname(_db_file), exist_ok=True)
+    os.makedirs(os.path.dirname(os.path.abspath(_db_file)), exist_ok=True)
 else:
     SQLALCHEMY_DATABASE_URL = _db_url
 
+def apply_sqlite_profile(engine):
+    """
+    Runs the tuning PRAGMAs on every new connection of a SQLite `engine`. WAL lets dashboard
+    readers proceed while a report is being written (and vice versa); synchronous=NORMAL only
+    fsyncs at checkpoints, which is still crash-safe under WAL; busy_timeout makes a writer wait
+    for the lock instead of failing with "database is locked".
+    """
+    @event.listens_for(engine, "connect")
+    def _apply_pragmas(dbapi_connection, connection_record):
+        cursor = dbapi_connection.cursor()
+        cursor.execute("PRAGMA journal_mode=WAL")
+        cursor.execute(f"PRAGMA synchronous={SQLITE_SYNCHRONOUS}")
+        cursor.execute(f"PRAGMA busy_timeout={SQLITE_BUSY_TIMEOUT_MS}")
+        cursor.execute(f"PRAGMA mmap_size={SQLITE_MMAP_SIZE}")
+        cursor.execute(f"PRAGMA cache_size={-SQLITE_CACHE_SIZE_KB}")
+        cursor.execute("PRAGMA temp_store=MEMORY")
+        cursor.close()
+
 connect_args = {"check_same_thread": False} if SQLALCHEMY_DATABASE_URL.startswith("sqlite") else {}
-engine = create_engine(SQLALCHEMY_DATABASE_URL, connect_args=connect_args)
+engine = create_engine(
+    SQLALCHEMY_DATABASE_URL, connect_args=connect_args,
+    pool_size=DB_POOL_SIZE, max_overflow=DB_MAX_OVERFLOW, pool_timeout=DB_POOL_TIMEOUT
+)
+if SQLALCHEMY_DATABASE_URL.startswith("sqlite") and SQLITE_TUNING:
+    apply_sqlite_profile(engine)
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
 
+def async_database_url(url):
+    """
+    The same database behind an asyncio driver: aiosqlite for SQLite, asyncpg for Postgres.
+    """
+    url = make_url(url)
+    backend = url.get_backend_name()
+    if backend == "sqlite":
+        return url.set(drivername="sqlite+aiosqlite")
+    if backend in ("postgresql", "postgres"):
+        return url.set(drivername="postgresql+asyncpg")
+    return url
+
+# Async engine for the `async def` endpoints; same database, pool sizing and SQLite profile
+async_engine = create_async_engine(
+    async_database_url(SQLALCHEMY_DATABASE_URL),
+    pool_size=DB_POOL_SIZE, max_overflow=DB_MAX_OVERFLOW, pool_timeout=DB_POOL_TIMEOUT
+)
+if SQLALCHEMY_DATABASE_URL.startswith("sqlite") and SQLITE_TUNING:
+    apply_sqlite_profile(async_engine.sync_engine)
+AsyncSessionLocal = async_sessionmaker(async_engine, autoflush=False, expire_on_commit=False)
+
 Base = declarative_base()
 
+class UTCDateTime(TypeDecorator):
+    """
+    Timezone-aware DateTime that always round-trips as UTC.
+    Backends without native timezone support (SQLite) store naive UTC, so values
+    sort and range-compare correctly as plain column values.
+    """
+    impl = DateTime(timezone=True)
+    cache_ok = True
+
+    def process_bind_param(self, value, dialect):
+        if value is None:
+            return None
+        if value.tzinfo is None:
+            value = value.replace(tzinfo=datetime.timezone.utc)
+        value = value.astimezone(datetime.timezone.utc)
+        return value.replace(tzinfo=None) if dialect.name == "sqlite" else value
+
+    def process_result_value(self, value, dialect):
+        if value is not None and value.tzinfo is None:
+            value = value.replace(tzinfo=datetime.timezone.utc)
+        return value
+
+class CompressedJSON(TypeDecorator):
+    """
+    JSON document stored as compressed bytes (see transcript_codec). Values are encoded on
+    write and decoded when the row is loaded; legacy plain-JSON values still read back.
+    """
+    impl = LargeBinary
+    cache_ok = True
+
+    def process_bind_param(self, value, dialect):
+        return TRANSCRIPT_CODEC.encode(value) if value is not None else None
+
+    def process_result_value(self, value, dialect):
+        return TRANSCRIPT_CODEC.decode(value)
+
+def parse_case_timestamp(value):
+    """
+    Parses a report's ISO timestamp ('Z' suffix, explicit offset, or naive = UTC) into an aware
+    UTC datetime. Returns None for missing or unparseable values.
+    """
+    try:
+        parsed = datetime.datetime.fromisoformat(value.replace('Z', '+00:00'))
+    except (AttributeError, TypeError, ValueError):
+        return None
+    if parsed.tzinfo is None:
+        parsed = parsed.replace(tzinfo=datetime.timezone.utc)
+    return parsed.astimezone(datetime.timezone.utc)
+
 class User(Base):
     __tablename__ = "users"
 
@@ -40,17 +140,106 @@ class Case(Base):
     status = Column(String)
     threat_level = Column(String)
     iocs = Column(JSON)
-    transcript = Column(JSON)
-    timestamp = Column(String)
+    timestamp = Column(String) # ISO string exactly as reported (API-facing)
+    reported_at = Column(UTCDateTime) # parsed `timestamp`, for indexed time-window queries
     auto_reported = Column(Boolean, default=True)
 
+    # Transcripts live in case_transcripts so list/stats queries never page them in;
+    # `case.transcript` reads (lazily) and writes them like a plain column
+    transcript_record = relationship("CaseTranscript", uselist=False, lazy="select", cascade="all, delete-orphan")
+    transcript = association_proxy("transcript_record", "messages", creator=lambda messages: CaseTranscript(messages=messages))
+
+    __table_args__ = (
+        # Covers the stats window query: range scan on reported_at, grouped by threat_level, distinct scammers
+        Index("ix_cases_reported_at_threat_scammer", "reported_at", "threat_level", "scammer_name"),
+        # Keyset order for paging /api/cases newest-first
+        Index("ix_cases_reported_at_id", "reported_at", "id"),
+    )
+
+class CaseTranscript(Base):
+    __tablename__ = "case_transcripts"
+
+    case_id = Column(String, ForeignKey("cases.id", ondelete="CASCADE"), primary_key=True)
+    messages = Column(CompressedJSON)
+
+class CaseSearchDoc(Base):
+    __tablename__ = "case_search_docs"
+
+    # rowid of each case's row in the case_search FTS5 table (created by migrations, SQLite only)
+    doc = Column(Integer, primary_key=True)
+    case_id = Column(String, unique=True, nullable=False)
+
+class CompressionDictionary(Base):
+    __tablename__ = "compression_dictionaries"
+
+    # Preset dictionaries for CompressedJSON; rows are never deleted while data encoded with them exists
+    id = Column(Integer, primary_key=True)
+    algorithm = Column(String, nullable=False)
+    data = Column(LargeBinary, nullable=False)
+    created_at = Column(UTCDateTime, default=lambda: datetime.datetime.now(datetime.timezone.utc))
+
+    __table_args__ = (
+        # One dictionary per algorithm: workers training at the same time race on this, the loser adopts the winner's
+        Index("ux_compression_dictionaries_algorithm", "algorithm", unique=True),
+    )
+
 class Stats(Base):
     __tablename__ = "stats"
 
+    # Legacy single-row counters, read once by migrations.move_report_counters; no longer written
     id = Column(Integer, primary_key=True, index=True)
     reports_filed = Column(Integer, default=0)
     scams_detected = Column(Integer, default=0)
     types_json = Column(JSON, default={}) # Store scam types count as JSON
 
+class StatsCounter(Base):
+    __tablename__ = "stats_counters"
+
+    # Lifetime report totals ("reports_filed", "scams_detected"), bumped with atomic upserts;
+    # supersedes the columns of the single `stats` row, which migrations copy in once
+    name = Column(String, primary_key=True)
+    count = Column(Integer, nullable=False, default=0)
+
+class StatsTypeCount(Base):
+    __tablename__ = "stats_type_counts"
+
+    # Lifetime reports per upper-cased classification, bumped with atomic upserts (supersedes stats.types_json)
+    threat_type = Column(String, primary_key=True)
+    count = Column(Integer, nullable=False, default=0)
+
+class StatsRollup(Base):
+    __tablename__ = "stats_rollup"
+
+    # Case counts per (hour bucket, folded threat type), maintained on write by submit_report
+    bucket = Column(UTCDateTime, primary_key=True)
+    threat_type = Column(String, primary_key=True)
+    cases = Column(Integer, default=0, nullable=False)
+
+class StatsRollupScammer(Base):
+    __tablename__ = "stats_rollup_scammers"
+
+    # Distinct-scammer sketch per hour bucket: one 64-bit name hash per scammer seen in that hour
+    bucket = Column(UTCDateTime, primary_key=True)
+    scammer_hash = Column(BigInteger, primary_key=True)
+
+class StatsRollupScammerHLL(Base):
+    __tablename__ = "stats_rollup_scammer_hll"
+
+    # HyperLogLog distinct-scammer sketch per hour bucket: zlib-packed 2^precision byte registers
+    precision = Column(Integer, primary_key=True)
+    bucket = Column(UTCDateTime, primary_key=True)
+    registers = Column(LargeBinary, nullable=False)
+
+class StatsRollupSketch(Base):
+    __tablename__ = "stats_rollup_sketch"
+
+    # Which scammer sketch the rollups were last rebuilt and maintained with ("exact", "hll:<precision>");
+    # the other sketch tables stop receiving writes, so a different configured sketch means a rebuild
+    id = Column(Integer, primary_key=True)
+    sketch = Column(String, nullable=False)
+
 def init_db():
-    Base.metadata.create_all(bind=engine)
+    from migrations import migration_lock, run_migrations
+    with migration_lock(engine):
+        Base.metadata.create_all(bind=engine)
+    run_migrations(engine)
@@ -0,0 +1,174 @@
+import os
+import json
+import hashlib
+import logging
+import threading
+from collections import OrderedDict, defaultdict
+from safety import PII_REDACTOR
+from config import FEATURE_CACHE_SIZE, FEATURE_CACHE_POLICY, FEATURE_CACHE_PATH, FEATURE_CACHE_NORMALIZE
+
+POLICIES = ("lru", "lfu")
+FORMAT_VERSION = 2
+
+def normalize_text(text):
+    """
+    PII redacted, case-folded, whitespace collapsed: scripted messages that differ only in
+    names/numbers/spacing normalize to the same text.
+    """
+    return " ".join(PII_REDACTOR.redact(text)[0].casefold().split())
+
+class FeatureCache:
+    """
+    Bounded memo of per-message NLP features (tokens + sentiment, see MessageFeatures) keyed by a
+    hash of the text backend name and the text that is featurized: the lowercased message, so
+    results are exactly those without the memo. With `normalize`, messages are featurized as
+    normalize_text() instead, so copies of a script that differ only in PII share one entry;
+    that changes scores (redaction placeholders replace the PII tokens) and is opt-in.
+    Evicts the least recently ("lru") or least frequently ("lfu", ties to the least recent) used
+    entry once `max_entries` is reached. Thread-safe; misses are computed outside the lock.
+    """
+
+    def __init__(self, max_entries=50000, policy="lru", path=None, normalize=False):
+        if policy not in POLICIES:
+            raise ValueError(f"Unknown feature cache policy '{policy}'. Available: {list(POLICIES)}")
+        self.max_entries = max_entries
+        self.policy = policy
+        self.path = path
+        self.normalize = normalize
+        self._entries = {}                     # key -> [features, frequency]
+        self._recency = OrderedDict()          # lru: keys, least recent first
+        self._by_frequency = defaultdict(OrderedDict)  # lfu: frequency -> keys, least recent first
+        self._min_frequency = 0
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    @staticmethod
+    def key(backend_name, feature_text):
+        return hashlib.blake2b(f"{backend_name}\0{feature_text}".encode("utf-8"), digest_size=16).digest()
+
+    def features(self, text, extract, backend_name):
+        """
+        Returns (feature_text, features of feature_text), calling `extract` only on a miss.
+        """
+        feature_text = normalize_text(text) if self.normalize else text.lower()
+        key = self.key(backend_name, feature_text)
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                self.hits += 1
+                self._touch(key, entry)
+                return feature_text, entry[0]
+            self.misses += 1
+        features = extract(feature_text)
+        with self._lock:
+            if key not in self._entries:
+                self._insert(key, features, 1)
+        return feature_text, features
+
+    def _touch(self, key, entry):
+        if self.policy == "lru":
+            self._recency.move_to_end(key)
+            return
+        frequency = entry[1]
+        bucket = self._by_frequency[frequency]
+        del bucket[key]
+        if not bucket:
+            del self._by_frequency[frequency]
+            if self._min_frequency == frequency:
+                self._min_frequency = frequency + 1
+        entry[1] = frequency + 1
+        self._by_frequency[frequency + 1][key] = None
+
+    def _insert(self, key, features, frequency):
+        if self.max_entries <= 0:
+            return
+        while len(self._entries) >= self.max_entries:
+            self._evict()
+        self._entries[key] = [features, frequency]
+        if self.policy == "lru":
+            self._recency[key] = None
+        else:
+            self._by_frequency[frequency][key] = None
+            self._min_frequency = frequency if len(self._entries) == 1 else min(self._min_frequency, frequency)
+
+    def _evict(self):
+        if self.policy == "lru":
+            key, _ = self._recency.popitem(last=False)
+        else:
+            while not self._by_frequency.get(self._min_frequency):
+                self._min_frequency = min(self._by_frequency)
+            bucket = self._by_frequency[self._min_frequency]
+            key, _ = bucket.popitem(last=False)
+            if not bucket:
+                del self._by_frequency[self._min_frequency]
+        del self._entries[key]
+        self.evictions += 1
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._recency.clear()
+            self._by_frequency.clear()
+            self._min_frequency = 0
+
+    def save(self, path=None):
+        """
+        Writes the entries (with their use counts) to a JSON file, replacing it atomically.
+        """
+        path = path or self.path
+        if not path:
+            return 0
+        with self._lock:
+            order = list(self._recency) if self.policy == "lru" else [k for f in sorted(self._by_frequency) for k in self._by_frequency[f]]
+            entries = [[key.hex(), self._entries[key][1], *self._entries[key][0]] for key in order]
+        tmp_path = f"{path}.tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump({"version": FORMAT_VERSION, "entries": entries}, f)
+        os.replace(tmp_path, path)
+        logging.info(f"[NLP Core] Saved {len(entries)} cached message features to {path}")
+        return len(entries)
+
+    def load(self, path=None, features_type=None):
+        """
+        Restores entries written by save(); a missing or unreadable file leaves the cache empty.
+        """
+        path = path or self.path
+        if not path or not os.path.exists(path):
+            return 0
+        if features_type is None:
+            from analyzer import MessageFeatures as features_type
+        try:
+            with open(path, "r", encoding="utf-8") as f:
+                data = json.load(f)
+            entries = data["entries"]
+        except (OSError, ValueError, KeyError) as e:
+            logging.warning(f"[NLP Core] Ignoring unreadable feature cache {path}: {e}")
+            return 0
+        if data.get("version") != FORMAT_VERSION:
+            logging.warning(f"[NLP Core] Ignoring feature cache {path}: written in another format")
+            return 0
+        with self._lock:
+            for key, frequency, words, subjectivity, polarity in entries[-self.max_entries:] if self.max_entries > 0 else []:
+                key = bytes.fromhex(key)
+                if key not in self._entries:
+                    self._insert(key, features_type(words, subjectivity, polarity), frequency if self.policy == "lfu" else 1)
+        logging.info(f"[NLP Core] Loaded {len(self._entries)} cached message features from {path}")
+        return len(self._entries)
+
+    def metrics(self):
+        lookups = self.hits + self.misses
+        return {
+            "policy": self.policy,
+            "entries": len(self._entries),
+            "max_entries": self.max_entries,
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+            "hit_rate": round(self.hits / lookups, 4) if lookups else 0.0,
+        }
+
+FEATURE_CACHE = FeatureCache(
+    FEATURE_CACHE_SIZE, FEATURE_CACHE_POLICY, FEATURE_CACHE_PATH or None, FEATURE_CACHE_NORMALIZE
+) if FEATURE_CACHE_SIZE > 0 else None
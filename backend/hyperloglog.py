@@ -0,0 +1,75 @@
+import math
+import zlib
+
+HASH_BITS = 64
+MIN_PRECISION = 4
+MAX_PRECISION = 18
+
+def precision_for_error(relative_error):
+    """
+    Smallest precision whose standard error (1.04 / sqrt(2^p)) is within `relative_error`.
+    """
+    if relative_error <= 0:
+        raise ValueError("HyperLogLog error bound must be positive")
+    precision = math.ceil(2 * math.log2(1.04 / relative_error))
+    return max(MIN_PRECISION, min(precision, MAX_PRECISION))
+
+class HyperLogLog:
+    """
+    HyperLogLog distinct counter over 64-bit hashes: 2^precision one-byte registers,
+    so memory is fixed no matter how many distinct values are added. Sketches with the
+    same precision merge by register-wise max, which is what lets per-bucket sketches
+    be combined into any window.
+    """
+
+    def __init__(self, precision, registers=None):
+        if not MIN_PRECISION <= precision <= MAX_PRECISION:
+            raise ValueError(f"HyperLogLog precision must be in [{MIN_PRECISION}, {MAX_PRECISION}]")
+        self.precision = precision
+        self.m = 1 << precision
+        self.registers = bytearray(registers) if registers is not None else bytearray(self.m)
+
+    @property
+    def standard_error(self):
+        return 1.04 / math.sqrt(self.m)
+
+    def register_of(self, hash_value):
+        """
+        Returns (register index, rank) for a 64-bit hash (signed or unsigned).
+        """
+        hash_value &= (1 << HASH_BITS) - 1
+        suffix_bits = HASH_BITS - self.precision
+        suffix = hash_value & ((1 << suffix_bits) - 1)
+        return hash_value >> suffix_bits, suffix_bits - suffix.bit_length() + 1
+
+    def add(self, hash_value):
+        index, rank = self.register_of(hash_value)
+        if rank > self.registers[index]:
+            self.registers[index] = rank
+
+    def to_bytes(self):
+        # Registers of lightly used sketches are mostly zero, so they pack very small
+        return zlib.compress(bytes(self.registers), 1)
+
+    @classmethod
+    def from_bytes(cls, precision, data):
+        return cls(precision, zlib.decompress(data))
+
+    def merge(self, other):
+        if other.precision != self.precision:
+            raise ValueError("Cannot merge HyperLogLog sketches of different precision")
+        self.registers = bytearray(map(max, self.registers, other.registers))
+        return self
+
+    def count(self):
+        m = self.m
+        if m >= 128:
+            alpha = 0.7213 / (1 + 1.079 / m)
+        else:
+            alpha = {16: 0.673, 32: 0.697, 64: 0.709}[m]
+        estimate = alpha * m * m / math.fsum(2.0 ** -r for r in self.registers)
+        zeros = self.registers.count(0)
+        if estimate <= 2.5 * m and zeros:
+            # Small-range correction (linear counting); 64-bit hashes need no large-range correction
+            estimate = m * math.log(m / zeros)
+        return int(round(estimate))
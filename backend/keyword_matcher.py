@@ -0,0 +1,101 @@
+import logging
+from collections import deque, namedtuple
+from types import MappingProxyType
+from config import SCAM_KEYWORDS, LINK_MARKERS, UNSAFE_KEYWORDS
+
+KeywordMatch = namedtuple("KeywordMatch", ["category", "keyword", "start", "end"])
+
+class KeywordAutomaton:
+    """
+    Immutable Aho-Corasick automaton over every keyword list, built once.
+    One left-to-right scan of a text reports every hit of every keyword - overlapping
+    ones included - so the cost no longer grows with the number of keywords.
+    """
+
+    def __init__(self, categories):
+        self.categories = MappingProxyType({
+            name: tuple(dict.fromkeys(keyword.lower() for keyword in keywords if keyword))
+            for name, keywords in categories.items()
+        })
+
+        # 1. Trie of all keywords; outputs[state] = (category, keyword) pairs ending at that state
+        goto, outputs = [{}], [[]]
+        for name, keywords in self.categories.items():
+            for keyword in keywords:
+                state = 0
+                for ch in keyword:
+                    nxt = goto[state].get(ch)
+                    if nxt is None:
+                        nxt = len(goto)
+                        goto[state][ch] = nxt
+                        goto.append({})
+                        outputs.append([])
+                    state = nxt
+                outputs[state].append((name, keyword))
+
+        # 2. Failure links (longest proper suffix that is also a trie path), breadth first
+        fail = [0] * len(goto)
+        pending = deque(goto[0].values())
+        while pending:
+            state = pending.popleft()
+            for ch, nxt in goto[state].items():
+                pending.append(nxt)
+                f = fail[state]
+                while f and ch not in goto[f]:
+                    f = fail[f]
+                fail[nxt] = goto[f].get(ch, 0)
+                outputs[nxt].extend(outputs[fail[nxt]])
+
+        self.goto = goto
+        self.fail = fail
+        self.outputs = [tuple(out) for out in outputs]
+
+    def find_all(self, text):
+        """
+        Returns a KeywordMatch per hit, ordered by end offset. Offsets index into text.lower().
+        """
+        goto, fail, outputs = self.goto, self.fail, self.outputs
+        state = 0
+        matches = []
+        for i, ch in enumerate(text.lower()):
+            while state and ch not in goto[state]:
+                state = fail[state]
+            state = goto[state].get(ch, 0)
+            for name, keyword in outputs[state]:
+                matches.append(KeywordMatch(name, keyword, i + 1 - len(keyword), i + 1))
+        return matches
+
+class KeywordMatcher:
+    """
+    Shared keyword scanner for the agent classifier and the safety policy.
+    """
+    REQUIRED_CATEGORIES = ("scam", "link", "unsafe")
+
+    def __init__(self, categories):
+        self.reload_keywords(categories)
+
+    @property
+    def keywords(self):
+        return self._automaton.categories
+
+    def reload_keywords(self, categories):
+        """
+        Hot-swaps the keyword lists without a restart.
+        The new automaton is fully built before it replaces the old one, so in-flight
+        scans finish against a consistent snapshot.
+        """
+        automaton = KeywordAutomaton(categories)
+        missing = [name for name in self.REQUIRED_CATEGORIES if name not in automaton.categories]
+        if missing:
+            raise ValueError(f"Keyword set is missing required categories: {missing}")
+        self._automaton = automaton
+        logging.info(f"[Keywords] Automaton compiled: {sum(map(len, automaton.categories.values()))} keywords, "
+                     f"{len(automaton.goto)} states")
+
+    def find_all(self, text, category=None):
+        matches = self._automaton.find_all(text)
+        if category is not None:
+            matches = [match for match in matches if match.category == category]
+        return matches
+
+THREAT_KEYWORDS = KeywordMatcher({"scam": SCAM_KEYWORDS, "link": LINK_MARKERS, "unsafe": UNSAFE_KEYWORDS})
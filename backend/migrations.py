@@ -0,0 +1,284 @@
+"""
+Idempotent schema migrations for databases created before a column or index existed.
+Runs automatically from init_db(); can also be run by hand:
+    python backend/migrations.py
+"""
+import json
+import logging
+import contextlib
+from sqlalchemy import inspect, select, insert, update, bindparam, func, cast, literal_column, LargeBinary, Text
+from sqlalchemy.orm import Session
+from sqlalchemy.exc import IntegrityError
+from database import Case, CaseTranscript, CaseSearchDoc, CompressionDictionary, Stats, StatsCounter, StatsTypeCount, StatsRollup, StatsRollupScammer, StatsRollupScammerHLL, StatsRollupSketch, parse_case_timestamp
+
+try:
+    import fcntl
+except ImportError:  # Windows: SQLite migrations of concurrently starting workers are not serialized
+    fcntl = None
+
+BACKFILL_BATCH = 5000
+# Advisory lock key serializing migrations across workers (PostgreSQL pg_advisory_lock / MySQL GET_LOCK)
+MIGRATION_LOCK_KEY = 0x5CA3_0001
+
+def add_case_reported_at(engine):
+    """
+    Adds cases.reported_at (native timezone-aware DateTime), backfills it from the
+    legacy `timestamp` strings in id-ordered batches, and creates its covering index.
+    """
+    columns = {column["name"] for column in inspect(engine).get_columns("cases")}
+    if "reported_at" not in columns:
+        column_type = Case.__table__.c.reported_at.type.impl.compile(dialect=engine.dialect)
+        with engine.begin() as conn:
+            conn.exec_driver_sql(f"ALTER TABLE cases ADD COLUMN reported_at {column_type}")
+        logging.info("[DB] Added cases.reported_at")
+
+    backfilled, last_id = 0, ""
+    pending = select(Case.id, Case.timestamp).where(Case.reported_at.is_(None), Case.timestamp.isnot(None))
+    set_reported_at = (
+        update(Case.__table__).where(Case.__table__.c.id == bindparam("case_id")).values(reported_at=bindparam("parsed"))
+    )
+    while True:
+        with engine.begin() as conn:
+            rows = conn.execute(pending.where(Case.id > last_id).order_by(Case.id).limit(BACKFILL_BATCH)).all()
+            if not rows:
+                break
+            last_id = rows[-1].id
+            params = [{"case_id": row.id, "parsed": parse_case_timestamp(row.timestamp)} for row in rows]
+            params = [p for p in params if p["parsed"] is not None]
+            if params:
+                conn.execute(set_reported_at, params)
+            backfilled += len(params)
+    if backfilled:
+        logging.info(f"[DB] Backfilled reported_at for {backfilled} cases")
+
+    for index in Case.__table__.indexes:
+        index.create(bind=engine, checkfirst=True)
+
+def build_stats_rollups(engine, sketch=None):
+    """
+    Builds the hourly stats rollups for databases that already had cases before rollups existed,
+    or whose configured scammer sketch (exact / HyperLogLog precision) is not the one recorded as
+    maintained: while one sketch is configured the others miss every new case, so switching
+    exact -> hll -> exact (or changing the HLL error) rebuilds instead of reading stale rows.
+    """
+    from case_stats import rebuild_rollups, maintained_sketch, set_maintained_sketch, SCAMMER_SKETCH
+    sketch = sketch or SCAMMER_SKETCH
+    for table in (StatsRollup.__table__, StatsRollupScammer.__table__, StatsRollupScammerHLL.__table__, StatsRollupSketch.__table__):
+        table.create(bind=engine, checkfirst=True)
+    with Session(engine) as db:
+        maintained = maintained_sketch(db)
+        if maintained == sketch.key and db.query(StatsRollup).first() is not None:
+            return
+        if db.query(Case.id).filter(Case.reported_at.isnot(None)).first():
+            if maintained is not None and maintained != sketch.key:
+                logging.info(f"[DB] Scammer sketch changed from {maintained} to {sketch.key}, rebuilding stats rollups")
+            rebuild_rollups(db, sketch)
+        elif maintained != sketch.key:
+            set_maintained_sketch(db, sketch)
+            db.commit()
+
+def move_case_transcripts(engine):
+    """
+    Moves transcripts out of the legacy cases.transcript JSON column into case_transcripts
+    (encoded, in id-ordered batches), drops the column, and (SQLite) vacuums so the shrunken
+    case rows are repacked.
+    """
+    from transcript_codec import TRANSCRIPT_CODEC
+    if "transcript" not in {column["name"] for column in inspect(engine).get_columns("cases")}:
+        return
+    for table in (CaseTranscript.__table__, CompressionDictionary.__table__):
+        table.create(bind=engine, checkfirst=True)
+    with Session(engine) as db:
+        load_transcript_dictionaries(db, TRANSCRIPT_CODEC)
+
+    # Read the legacy JSON as text and write through the model, so the messages are encoded the
+    # way the column stores them on every dialect (BYTEA on PostgreSQL, not a JSON literal)
+    legacy = literal_column("transcript")
+    unmoved = select(Case.id, cast(legacy, Text)).where(legacy.isnot(None), Case.id.not_in(select(CaseTranscript.case_id)))
+    moved, last_id = 0, ""
+    while True:
+        with engine.begin() as conn:
+            rows = conn.execute(unmoved.where(Case.id > last_id).order_by(Case.id).limit(BACKFILL_BATCH)).all()
+            if not rows:
+                break
+            last_id = rows[-1][0]
+            transcripts = [{"case_id": case_id, "messages": json.loads(raw)} for case_id, raw in rows]
+            transcripts = [t for t in transcripts if t["messages"] is not None]  # JSON null
+            if transcripts:
+                conn.execute(insert(CaseTranscript), transcripts)
+            moved += len(transcripts)
+    with engine.begin() as conn:
+        conn.exec_driver_sql("ALTER TABLE cases DROP COLUMN transcript")
+    logging.info(f"[DB] Moved {moved} transcripts to case_transcripts")
+    if engine.dialect.name == "sqlite":
+        with engine.connect().execution_options(isolation_level="AUTOCOMMIT") as conn:
+            conn.exec_driver_sql("VACUUM")
+
+def load_transcript_dictionaries(db, codec, delay=0.0):
+    known = list(codec.dictionaries)
+    for row in db.query(CompressionDictionary).filter(CompressionDictionary.id.not_in(known)).order_by(CompressionDictionary.id):
+        codec.load_dictionary(row.id, row.algorithm, row.data, delay)
+
+def refresh_transcript_dictionaries(engine, codec=None, delay=0.0):
+    """
+    Loads transcript compression dictionaries stored since the last call (e.g. by another worker),
+    and trains the first one for the configured algorithm once enough transcripts exist. Runs in
+    compress_case_transcripts at startup and periodically while serving, so a deployment that
+    starts empty gets its dictionary without a restart; `delay` holds back encoding with a
+    dictionary until the other workers' periodic refresh has loaded it.
+    """
+    from transcript_codec import TRANSCRIPT_CODEC
+    from config import TRANSCRIPT_DICT_MIN_SAMPLES, TRANSCRIPT_DICT_SAMPLES
+    codec = codec or TRANSCRIPT_CODEC
+    table = CaseTranscript.__table__
+    stored = literal_column("messages") # raw column value: legacy JSON text or encoded bytes
+    with Session(engine) as db:
+        load_transcript_dictionaries(db, codec, delay)
+        if not codec.needs_dictionary or db.query(table.c.case_id).limit(TRANSCRIPT_DICT_MIN_SAMPLES).count() < TRANSCRIPT_DICT_MIN_SAMPLES:
+            return
+        rows = db.execute(select(stored).select_from(table).where(table.c.messages.isnot(None))
+                          .order_by(table.c.case_id).limit(TRANSCRIPT_DICT_SAMPLES)).scalars()
+        dictionary = CompressionDictionary(algorithm=codec.algorithm, data=codec.train([codec.decode(row) for row in rows]))
+        db.add(dictionary)
+        try:
+            db.commit()
+        except IntegrityError:
+            # Another worker stored its dictionary for this algorithm first: use that one
+            db.rollback()
+            load_transcript_dictionaries(db, codec, delay)
+        else:
+            codec.load_dictionary(dictionary.id, dictionary.algorithm, dictionary.data, delay)
+            logging.info(f"[DB] Trained {len(dictionary.data)}-byte {codec.algorithm} transcript dictionary")
+
+def compress_case_transcripts(engine, codec=None):
+    """
+    Loads the transcript compression dictionaries, trains the first one for the configured
+    algorithm once enough transcripts exist, and re-encodes transcripts still stored as plain JSON.
+    """
+    from transcript_codec import TRANSCRIPT_CODEC
+    codec = codec or TRANSCRIPT_CODEC
+    CompressionDictionary.__table__.create(bind=engine, checkfirst=True)
+    for index in CompressionDictionary.__table__.indexes:
+        try:
+            index.create(bind=engine, checkfirst=True)
+        except IntegrityError:
+            logging.warning(f"[DB] {index.name} not created: an earlier concurrent start stored two dictionaries for one algorithm")
+    refresh_transcript_dictionaries(engine, codec)
+    table = CaseTranscript.__table__
+    stored = literal_column("messages") # raw column value: legacy JSON text or encoded bytes
+
+    if engine.dialect.name == "sqlite":
+        legacy = func.typeof(stored) == "text"
+    else:
+        column_type = {c["name"]: c["type"] for c in inspect(engine).get_columns("case_transcripts")}["messages"]
+        if isinstance(column_type, LargeBinary):
+            return
+        with engine.begin() as conn:
+            conn.exec_driver_sql("ALTER TABLE case_transcripts ALTER COLUMN messages TYPE BYTEA "
+                                 "USING convert_to(messages::text, 'UTF8')")
+        legacy = stored.isnot(None)
+
+    encoded, last_id = 0, ""
+    set_messages = update(table).where(table.c.case_id == bindparam("key")).values(
+        messages=bindparam("encoded", type_=LargeBinary))
+    while True:
+        with engine.begin() as conn:
+            rows = conn.execute(select(table.c.case_id, stored).where(legacy, table.c.case_id > last_id)
+                                .order_by(table.c.case_id).limit(BACKFILL_BATCH)).all()
+            if not rows:
+                break
+            last_id = rows[-1][0]
+            conn.execute(set_messages, [{"key": case_id, "encoded": codec.encode(codec.decode(value))}
+                                        for case_id, value in rows])
+            encoded += len(rows)
+    if encoded:
+        logging.info(f"[DB] Compressed {encoded} stored transcripts")
+
+def move_report_counters(engine):
+    """
+    Seeds the stats_counters / stats_type_counts tables from the legacy single `stats` row.
+    """
+    for table in (StatsCounter.__table__, StatsTypeCount.__table__):
+        table.create(bind=engine, checkfirst=True)
+    if not inspect(engine).has_table(Stats.__tablename__):
+        return
+    with Session(engine) as db:
+        legacy = db.query(Stats).first()
+        if legacy is None or db.query(StatsCounter).first() is not None or db.query(StatsTypeCount).first() is not None:
+            return
+        db.add_all([StatsCounter(name="reports_filed", count=legacy.reports_filed or 0),
+                    StatsCounter(name="scams_detected", count=legacy.scams_detected or 0)])
+        db.add_all([StatsTypeCount(threat_type=ctype, count=n) for ctype, n in (legacy.types_json or {}).items()])
+        db.commit()
+        logging.info(f"[DB] Moved report counters from the legacy stats row ({legacy.reports_filed} reports)")
+
+def build_case_search_index(engine):
+    """
+    Creates the case_search full-text index (SQLite FTS5) and indexes cases stored before it
+    existed, in id-ordered batches. Runs after compress_case_transcripts so every transcript decodes.
+    """
+    from case_search import create_search_index, index_cases
+    if not create_search_index(engine):
+        return
+    indexed, last_id = 0, ""
+    unindexed = (select(Case.id, Case.scammer_name, Case.iocs, CaseTranscript.messages)
+                 .outerjoin(CaseTranscript, CaseTranscript.case_id == Case.id)
+                 .where(Case.id.not_in(select(CaseSearchDoc.case_id))))
+    while True:
+        with Session(engine) as db:
+            rows = db.execute(unindexed.where(Case.id > last_id).order_by(Case.id).limit(BACKFILL_BATCH)).all()
+            if not rows:
+                break
+            last_id = rows[-1].id
+            indexed += index_cases(db, rows)
+            db.commit()
+    if indexed:
+        logging.info(f"[DB] Indexed {indexed} cases for full-text search")
+
+MIGRATIONS = [add_case_reported_at, build_stats_rollups, move_case_transcripts, compress_case_transcripts, move_report_counters,
+              build_case_search_index]
+
+@contextlib.contextmanager
+def migration_lock(engine):
+    """
+    Held while migrations run, so workers started together (uvicorn --workers N) run them one at a
+    time: the later ones find every step already done. A server-side advisory lock on PostgreSQL
+    and MySQL, an exclusive lock on a file beside the database on SQLite (none for :memory:).
+    """
+    dialect = engine.dialect.name
+    if dialect in ("postgresql", "mysql"):
+        with engine.connect().execution_options(isolation_level="AUTOCOMMIT") as conn:
+            if dialect == "postgresql":
+                conn.exec_driver_sql(f"SELECT pg_advisory_lock({MIGRATION_LOCK_KEY})")
+            else:
+                conn.exec_driver_sql(f"SELECT GET_LOCK('migrations-{MIGRATION_LOCK_KEY}', -1)")
+            try:
+                yield
+            finally:
+                if dialect == "postgresql":
+                    conn.exec_driver_sql(f"SELECT pg_advisory_unlock({MIGRATION_LOCK_KEY})")
+                else:
+                    conn.exec_driver_sql(f"SELECT RELEASE_LOCK('migrations-{MIGRATION_LOCK_KEY}')")
+        return
+    database = engine.url.database if dialect == "sqlite" else None
+    if not database or database == ":memory:" or fcntl is None:
+        if dialect != "sqlite":
+            logging.warning(f"[DB] No migration lock for '{dialect}': start one worker first if several share the database")
+        yield
+        return
+    with open(f"{database}.migrate.lock", "a") as lock_file:
+        fcntl.flock(lock_file, fcntl.LOCK_EX)
+        try:
+            yield
+        finally:
+            fcntl.flock(lock_file, fcntl.LOCK_UN)
+
+def run_migrations(engine):
+    with migration_lock(engine):
+        for migration in MIGRATIONS:
+            migration(engine)
+
+if __name__ == "__main__":
+    from database import init_db
+    logging.basicConfig(level=logging.INFO, format='%(message)s')
+    init_db()
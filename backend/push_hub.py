@@ -0,0 +1,163 @@
+import json
+import time
+import asyncio
+import threading
+from collections import Counter, deque
+
+CASE_CREATED = "case.created"
+STATS_DELTA = "stats.delta"
+RESYNC = "resync"
+
+def report_delta(classifications, cases_created):
+    """
+    The change a batch of reports makes to /api/stats' lifetime counters, as a stats.delta payload.
+    """
+    types = Counter(classification.upper() for classification in classifications)
+    total = sum(types.values())
+    return {"reports_filed": total, "scams_detected": total, "types": dict(types), "cases_created": cases_created}
+
+def _merge_delta(into, delta):
+    for key, value in delta.items():
+        if key == "types":
+            for ctype, n in value.items():
+                into["types"][ctype] = into["types"].get(ctype, 0) + n
+        else:
+            into[key] = into.get(key, 0) + value
+
+class Subscriber:
+    """
+    One client's bounded event queue. Publishing never blocks: pending stats deltas coalesce
+    into one (moved to the newest position, so event ids stay in order), and when the queue is
+    full the oldest events are dropped. A client that lost events gets a resync event first,
+    telling it to refetch instead of trusting the feed.
+    """
+
+    def __init__(self, loop, max_pending):
+        self._loop = loop
+        self._max_pending = max_pending
+        self._pending = deque()
+        self._lock = threading.Lock()
+        self._ready = asyncio.Event()
+        self.dropped = 0
+
+    def push(self, event):
+        with self._lock:
+            if event["event"] == STATS_DELTA:
+                data = {**event["data"], "types": dict(event["data"]["types"])}
+                for pending in self._pending:
+                    if pending["event"] == STATS_DELTA:
+                        self._pending.remove(pending)
+                        _merge_delta(pending["data"], data)
+                        data = pending["data"]
+                        break
+                event = {**event, "data": data}
+            while len(self._pending) >= self._max_pending:
+                self._pending.popleft()
+                self.dropped += 1
+            self._pending.append(event)
+        try:
+            self._loop.call_soon_threadsafe(self._ready.set)
+        except RuntimeError:
+            pass  # loop already closed: the client is gone
+
+    async def next_batch(self, timeout):
+        """
+        Waits up to `timeout` seconds for events; returns (dropped_since_last_batch, events).
+        """
+        try:
+            await asyncio.wait_for(self._ready.wait(), timeout)
+        except asyncio.TimeoutError:
+            return 0, []
+        with self._lock:
+            self._ready.clear()
+            events, dropped = list(self._pending), self.dropped
+            self._pending.clear()
+            self.dropped = 0
+        return dropped, events
+
+class BroadcastHub:
+    """
+    In-process fan-out of report events to push-feed clients (one hub per uvicorn worker).
+    Events get ids "<hub epoch>-<sequence>"; the last `history` events are kept so a client
+    reconnecting with its last seen id gets exactly what it missed. Ids from another process
+    or older than the history window get a resync event instead.
+    publish() is safe to call from request threads as well as the event loop.
+    """
+
+    def __init__(self, max_pending=256, history=1024):
+        self.max_pending = max_pending
+        self.epoch = f"{int(time.time() * 1000):x}"
+        self._sequence = 0
+        self._history = deque(maxlen=history)
+        self._subscribers = set()
+        self._lock = threading.Lock()
+        self.published = 0
+
+    def publish(self, event_type, data):
+        with self._lock:
+            self._sequence += 1
+            event = {"id": f"{self.epoch}-{self._sequence}", "seq": self._sequence, "event": event_type, "data": data}
+            self._history.append(event)
+            subscribers = list(self._subscribers)
+            self.published += 1
+        for subscriber in subscribers:
+            subscriber.push(event)
+
+    def _replay(self, last_event_id):
+        # (events after last_event_id, complete?) - must hold self._lock
+        epoch, _, seq = (last_event_id or "").partition("-")
+        if epoch != self.epoch or not seq.isdigit():
+            return [], False
+        seq = int(seq)
+        if seq > self._sequence:
+            return [], False
+        missed = [event for event in self._history if event["seq"] > seq]
+        oldest = self._history[0]["seq"] if self._history else self._sequence + 1
+        return missed, seq + 1 >= oldest
+
+    def subscribe(self, last_event_id=None):
+        """
+        Registers a client. Returns (subscriber, replayed events, resync id); the resync id is
+        None when the replay is complete, else the id the client should resume from after refetching.
+        """
+        subscriber = Subscriber(asyncio.get_running_loop(), self.max_pending)
+        with self._lock:
+            replay, complete = self._replay(last_event_id) if last_event_id else ([], True)
+            resync_id = None if complete else f"{self.epoch}-{self._sequence}"
+            self._subscribers.add(subscriber)
+        return subscriber, replay, resync_id
+
+    def unsubscribe(self, subscriber):
+        with self._lock:
+            self._subscribers.discard(subscriber)
+
+    def metrics(self):
+        return {"subscribers": len(self._subscribers), "published": self.published, "last_id": f"{self.epoch}-{self._sequence}"}
+
+def format_sse(event_type, data, event_id=None):
+    lines = [f"id: {event_id}"] if event_id else []
+    lines += [f"event: {event_type}", f"data: {json.dumps(data)}"]
+    return "\n".join(lines) + "\n\n"
+
+async def sse_stream(hub, request, last_event_id=None, keepalive=15.0):
+    """
+    Server-sent event stream for one client: the replay (or a resync event), then live events,
+    with a comment line every `keepalive` seconds so proxies keep the connection open.
+    """
+    subscriber, replay, resync_id = hub.subscribe(last_event_id)
+    try:
+        if resync_id:
+            yield format_sse(RESYNC, {"reason": "cursor_expired"}, resync_id)
+        for event in replay:
+            yield format_sse(event["event"], event["data"], event["id"])
+        while not await request.is_disconnected():
+            dropped, events = await subscriber.next_batch(keepalive)
+            if not events:
+                yield ": keepalive\n\n"
+                continue
+            if dropped:
+                yield format_sse(RESYNC, {"reason": "slow_consumer", "dropped": dropped})
+            for event in events:
+                yield format_sse(event["event"], event["data"], event["id"])
+    finally:
+        hub.unsubscribe(subscriber)
@@ -0,0 +1,188 @@
+import time
+import hashlib
+import logging
+import threading
+from collections import OrderedDict
+from starlette.concurrency import run_in_threadpool
+from starlette.responses import JSONResponse, Response
+
+REDIS_GENERATION_KEY = "honeypot:response-cache:generation"
+
+class LocalGeneration:
+    """
+    In-process generation counter: invalidations are only seen by this worker.
+    """
+    blocking = False
+
+    def __init__(self):
+        self._value = 0
+        self._lock = threading.Lock()
+
+    def current(self):
+        return self._value
+
+    def bump(self):
+        with self._lock:
+            self._value += 1
+            return self._value
+
+class RedisGeneration:
+    """
+    Generation counter kept in Redis, so a write handled by one uvicorn worker invalidates the
+    cached responses of every worker. The redis package is imported lazily, only when selected.
+    If Redis is unreachable, current() returns None and callers skip the cache instead of failing.
+    Calls are network round trips on the synchronous client, so async callers run them in the
+    threadpool (blocking = True) rather than on the event loop.
+    """
+    blocking = True
+
+    def __init__(self, url, key=REDIS_GENERATION_KEY):
+        import redis
+        self._errors = redis.RedisError
+        self._client = redis.Redis.from_url(url, socket_timeout=0.5)
+        self._key = key
+
+    def current(self):
+        try:
+            return int(self._client.get(self._key) or 0)
+        except self._errors as e:
+            logging.warning(f"Response cache generation unavailable: {e}")
+            return None
+
+    def bump(self):
+        try:
+            return self._client.incr(self._key)
+        except self._errors as e:
+            logging.warning(f"Response cache invalidation failed: {e}")
+            return None
+
+def make_generation(backend, redis_url=None):
+    if backend == "local":
+        return LocalGeneration()
+    if backend == "redis":
+        return RedisGeneration(redis_url)
+    raise ValueError(f"Unknown response cache backend '{backend}'. Available: ['local', 'redis']")
+
+class CachedResponse:
+    __slots__ = ("body", "headers", "etag", "generation", "expires_at")
+
+    def __init__(self, body, headers, generation, expires_at):
+        self.body = body
+        self.headers = headers
+        self.etag = '"' + hashlib.blake2b(body, digest_size=12).hexdigest() + '"'
+        self.generation = generation
+        self.expires_at = expires_at
+
+def _etag_matches(if_none_match, etag):
+    if not if_none_match:
+        return False
+    tags = [tag.strip() for tag in if_none_match.split(",")]
+    return "*" in tags or any(tag.removeprefix("W/") == etag for tag in tags)
+
+class ResponseCache:
+    """
+    JSON response cache for read endpoints that only change when reports are written.
+    Entries are keyed by path + query parameters and are valid while both hold:
+    - their TTL has not run out;
+    - the generation counter has not moved since they were built. Writers call invalidate().
+    Every response carries an ETag (a hash of the body). A poll whose If-None-Match still
+    matches a fresh entry gets a 304 without the endpoint touching the database.
+    LRU-bounded to `max_entries`.
+    """
+
+    def __init__(self, generation=None, max_entries=512, enabled=True):
+        self.generation = generation or LocalGeneration()
+        self.max_entries = max_entries
+        self.enabled = enabled
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.not_modified = 0
+        self.invalidations = 0
+
+    @staticmethod
+    def key(request):
+        return request.url.path + "?" + "&".join(f"{k}={v}" for k, v in sorted(request.query_params.multi_items()))
+
+    def invalidate(self):
+        """
+        Bumps the generation and drops this worker's entries. From async endpoints use
+        invalidate_async(), which keeps a blocking generation backend off the event loop.
+        """
+        self.generation.bump()
+        self._clear()
+
+    async def invalidate_async(self):
+        if self.generation.blocking:
+            await run_in_threadpool(self.generation.bump)
+        else:
+            self.generation.bump()
+        self._clear()
+
+    def _clear(self):
+        with self._lock:
+            self.invalidations += 1
+            self._entries.clear()
+
+    async def _current_generation(self):
+        if self.generation.blocking:
+            return await run_in_threadpool(self.generation.current)
+        return self.generation.current()
+
+    def _get(self, key, generation, now):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            if entry.generation != generation or entry.expires_at <= now:
+                del self._entries[key]
+                return None
+            self._entries.move_to_end(key)
+            return entry
+
+    def _put(self, key, entry):
+        with self._lock:
+            self._entries[key] = entry
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    async def respond(self, request, build, ttl):
+        """
+        Serves `request` from the cache, or awaits `build()` -> (content, headers) for a fresh
+        JSON response and caches it for `ttl` seconds under the generation read before building.
+        """
+        generation = await self._current_generation() if self.enabled else None
+        if generation is None:
+            content, headers = await build()
+            return JSONResponse(content=content, headers=headers)
+
+        key, now = self.key(request), time.monotonic()
+        entry = self._get(key, generation, now)
+        if entry is None:
+            self.misses += 1
+            content, headers = await build()
+            entry = CachedResponse(JSONResponse(content=content).body, dict(headers or {}), generation, now + ttl)
+            self._put(key, entry)
+        else:
+            self.hits += 1
+
+        headers = {**entry.headers, "ETag": entry.etag, "Cache-Control": "no-cache"}
+        if _etag_matches(request.headers.get("if-none-match"), entry.etag):
+            self.not_modified += 1
+            return Response(status_code=304, headers=headers)
+        return Response(content=entry.body, media_type="application/json", headers=headers)
+
+    def metrics(self):
+        lookups = self.hits + self.misses
+        return {
+            "enabled": self.enabled,
+            "backend": type(self.generation).__name__,
+            "entries": len(self._entries),
+            "hits": self.hits,
+            "misses": self.misses,
+            "not_modified": self.not_modified,
+            "invalidations": self.invalidations,
+            "hit_rate": round(self.hits / lookups, 4) if lookups else 0.0,
+        }
@@ -1,30 +1,60 @@
 import re
 import logging
-from config import SENSITIVE_PATTERNS, UNSAFE_KEYWORDS
+from collections import namedtuple
+from config import SENSITIVE_PATTERNS
+from keyword_matcher import THREAT_KEYWORDS
 
 logging.basicConfig(level=logging.INFO, format='%(asctime)s - [SAFETY] - %(message)s')
 
+Redaction = namedtuple("Redaction", ["pii_type", "start", "end"])
+
+class RedactionEngine:
+    """
+    Compiles every PII pattern once into a single alternation of named groups and
+    redacts a text in one re.sub pass. Where patterns overlap, the leftmost match wins
+    (ties go to the pattern listed first), and text that is already redacted is never rescanned.
+    """
+
+    def __init__(self, patterns):
+        self.types = tuple(patterns)
+        alternation = "|".join(f"(?P<{pii_type}>{pattern})" for pii_type, pattern in patterns.items())
+        if all(pattern.startswith(r"\b") for pattern in patterns.values()):
+            # Hoist the shared leading word boundary so positions inside words fail once, not once per pattern
+            alternation = r"\b(?:" + "|".join(f"(?P<{pii_type}>{pattern[2:]})" for pii_type, pattern in patterns.items()) + ")"
+        self.pattern = re.compile(alternation)
+
+    def redact(self, text):
+        """
+        Returns (redacted_text, spans) where spans lists a Redaction(pii_type, start, end)
+        per replaced value, with offsets into the original text.
+        """
+        spans = []
+
+        def replace(match):
+            value = match.group()
+            # Patterns with optional leading separators (PHONE) can swallow the preceding space
+            start = match.start() + len(value) - len(value.lstrip())
+            spans.append(Redaction(match.lastgroup, start, match.end()))
+            return value[:start - match.start()] + f"[REDACTED: {match.lastgroup}]"
+
+        return self.pattern.sub(replace, text), spans
+
+PII_REDACTOR = RedactionEngine(SENSITIVE_PATTERNS)
+
 class SafetyGuard:
     @staticmethod
     def redact_pii(text):
         """
         Scans text for sensitive patterns and replaces them with [REDACTED: <TYPE>].
         """
-        redacted_text = text
-        
-        for pii_type, pattern in SENSITIVE_PATTERNS.items():
-            matches = re.findall(pattern, redacted_text)
-            for match in matches:
-                # Handle tuple matches from complex regex
-                if isinstance(match, tuple):
-                    match_str = "".join([m for m in match if m])
-                else:
-                    match_str = match
-                    
-                if match_str:
-                    redacted_text = redacted_text.replace(match_str, f"[REDACTED: {pii_type}]")
-        
-        return redacted_text
+        return PII_REDACTOR.redact(text)[0]
+
+    @staticmethod
+    def redact_pii_spans(text):
+        """
+        Like redact_pii, but also returns the Redaction spans (original-text offsets) that were replaced.
+        """
+        return PII_REDACTOR.redact(text)
 
     @staticmethod
     def check_policy(response_text):
@@ -33,9 +63,14 @@ class SafetyGuard:
         (e.g., promising money, asking for passwords).
         Returns True if safe, False if unsafe.
         """
-        response_lower = response_text.lower()
-        for keyword in UNSAFE_KEYWORDS:
-            if keyword in response_lower:
-                logging.warning(f"Policy Violation Detected! Found forbidden keyword: '{keyword}'")
-                return False
-        return True
+        violations = SafetyGuard.policy_violations(response_text)
+        for match in violations:
+            logging.warning(f"Policy Violation Detected! Found forbidden keyword: '{match.keyword}' at {match.start}")
+        return not violations
+
+    @staticmethod
+    def policy_violations(response_text):
+        """
+        Returns every forbidden-keyword hit in the text as KeywordMatch entries (empty if safe).
+        """
+        return THREAT_KEYWORDS.find_all(response_text, category="unsafe")
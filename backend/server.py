@@ -1,14 +1,21 @@
-from fastapi import FastAPI, HTTPException, Depends, Request
-from pydantic import BaseModel
+from fastapi import FastAPI, HTTPException, Depends, Request, Query
 from typing import List, Optional, Dict, Any
-from datetime import datetime, timedelta, timezone
 import logging
 import time
 import json
 import os
+import asyncio
+import threading
+from datetime import datetime, timezone
+from itertools import islice
+from concurrent.futures import ThreadPoolExecutor
 from fastapi.middleware.cors import CORSMiddleware
+from sqlalchemy import insert, select
+from sqlalchemy.exc import IntegrityError
 from sqlalchemy.orm import Session
-from fastapi.responses import JSONResponse
+from sqlalchemy.ext.asyncio import AsyncSession
+from fastapi.concurrency import run_in_threadpool
+from fastapi.responses import JSONResponse, StreamingResponse
 
 from slowapi import Limiter, _rate_limit_exceeded_handler
 from slowapi.util import get_remote_address
@@ -22,9 +29,27 @@ if backend_dir not in sys.path:
     sys.path.append(backend_dir)
 
 # Internal Modules
+from api_models import AnalysisRequest, BatchAnalysisRequest, ReportRequest, LoginRequest
 from analyzer import ScamAnalyzer
+from batch_analyzer import BatchScorer
+from case_stats import rollup_window_stats, record_case_rollup, record_case_rollups, record_report_counts, report_counts
+from case_search import index_cases, search_cases
+from case_listing import case_detail, parse_fields, parse_bound, decode_cursor, case_select, case_summary, cases_by_id, fetch_page, stream_ndjson_async
+from analysis_engine import AnalysisEngine, EngineSaturated
+from response_cache import ResponseCache, make_generation
+from feature_cache import FEATURE_CACHE
+from migrations import refresh_transcript_dictionaries
+from similarity_index import MinHashLSH, SCRIPT_PREFIX, transcript_text
+from mock_api import MockScammerAPI
+from push_hub import BroadcastHub, CASE_CREATED, STATS_DELTA, report_delta, sse_stream
 from agent import HoneypotAgent
-from database import SessionLocal, engine, init_db, User, Case, Stats
+from database import SessionLocal, AsyncSessionLocal, engine, async_engine, init_db, parse_case_timestamp, User, Case, CaseTranscript
+from config import ANALYSIS_WORKERS, ANALYSIS_PROCESSES, ANALYSIS_QUEUE_LIMIT, ANALYSIS_BATCH_SIZE, DEEP_SCAN_DELAY
+from config import CASES_PAGE_SIZE, CASES_MAX_PAGE_SIZE, CASES_STREAM_BATCH, RATE_LIMIT_ENABLED
+from config import RESPONSE_CACHE_ENABLED, RESPONSE_CACHE_BACKEND, RESPONSE_CACHE_REDIS_URL, RESPONSE_CACHE_MAX_ENTRIES
+from config import STATS_CACHE_TTL, CASES_CACHE_TTL, PUSH_MAX_PENDING, PUSH_HISTORY, PUSH_KEEPALIVE
+from config import TRANSCRIPT_DICT_REFRESH
+from config import SIMILARITY_NUM_PERM, SIMILARITY_BANDS, SIMILARITY_THRESHOLD, SIMILARITY_INDEX_PATH, SIMILARITY_CATCH_UP_OVERLAP
 import security
 
 # Setup logging
@@ -42,10 +67,11 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*", "X-Rakshak-Token"],
+    expose_headers=["X-Next-Cursor", "ETag"],
 )
 
 # Initialize Rate Limiter
-limiter = Limiter(key_func=get_remote_address, default_limits=["100/minute"])
+limiter = Limiter(key_func=get_remote_address, default_limits=["100/minute"], enabled=RATE_LIMIT_ENABLED)
 app.state.limiter = limiter
 app.add_exception_handler(RateLimitExceeded, _rate_limit_exceeded_handler)
 
@@ -68,9 +94,119 @@ async def secure_headers_and_obfuscation(request: Request, call_next):
     
     return response
 
+# Cached /api/stats and /api/cases responses, invalidated whenever a report is stored
+response_cache = ResponseCache(
+    make_generation(RESPONSE_CACHE_BACKEND, RESPONSE_CACHE_REDIS_URL),
+    max_entries=RESPONSE_CACHE_MAX_ENTRIES, enabled=RESPONSE_CACHE_ENABLED
+)
+
+# Push feed of stored reports (case.created + stats.delta events) for dashboards that would otherwise poll
+push_hub = BroadcastHub(max_pending=PUSH_MAX_PENDING, history=PUSH_HISTORY)
+
+def publish_reports(classifications, new_cases):
+    for case in new_cases:
+        push_hub.publish(CASE_CREATED, case_summary(case))
+    push_hub.publish(STATS_DELTA, report_delta(classifications, len(new_cases)))
+
+# Near-duplicate script index over case transcripts, seeded with the known scam scripts
+similarity_index = MinHashLSH.load(SIMILARITY_INDEX_PATH, num_perm=SIMILARITY_NUM_PERM, bands=SIMILARITY_BANDS)
+for scenario in MockScammerAPI.SCENARIOS:
+    similarity_index.add(SCRIPT_PREFIX + scenario["id"], " ".join(scenario["messages"]))
+
 # Initialize Core Logic
 analyzer = ScamAnalyzer()
-agent = HoneypotAgent()
+batch_scorer = BatchScorer(analyzer)
+analysis_engine = AnalysisEngine(
+    analyzer, workers=ANALYSIS_PROCESSES, max_pending=ANALYSIS_QUEUE_LIMIT, batch_size=ANALYSIS_BATCH_SIZE
+) if ANALYSIS_PROCESSES > 0 else None
+agent = HoneypotAgent(engine=analysis_engine)
+
+# Bounded pool for CPU-bound NLP scoring, kept apart from FastAPI's request threadpool
+analysis_executor = ThreadPoolExecutor(max_workers=ANALYSIS_WORKERS, thread_name_prefix="analysis")
+
+async def run_analysis(fn, *args):
+    """
+    Runs `fn(*args)` on the analysis pool without blocking the event loop.
+    Returns (result, queue_wait, processing_time) with both timings in seconds.
+    """
+    submitted = time.perf_counter()
+
+    def timed():
+        started = time.perf_counter()
+        result = fn(*args)
+        return result, started, time.perf_counter()
+
+    result, started, finished = await asyncio.get_running_loop().run_in_executor(analysis_executor, timed)
+    return result, started - submitted, finished - started
+
+@app.on_event("startup")
+def load_feature_cache():
+    if FEATURE_CACHE is not None:
+        FEATURE_CACHE.load()
+
+def refresh_dictionaries_periodically():
+    # Transcript reads only look dictionaries up in memory: new ones (trained here once enough cases
+    # exist, or by another worker) are loaded on this thread, never during a request
+    while True:
+        time.sleep(TRANSCRIPT_DICT_REFRESH)
+        try:
+            refresh_transcript_dictionaries(engine, delay=2 * TRANSCRIPT_DICT_REFRESH)
+        except Exception as e:
+            logging.warning(f"[DB] Transcript dictionary refresh failed: {e}")
+
+@app.on_event("startup")
+def start_dictionary_refresh():
+    threading.Thread(target=refresh_dictionaries_periodically, name="dictionary-refresh", daemon=True).start()
+
+def catch_up_similarity_index():
+    """
+    Indexes cases stored while the saved index was stale (crash, other workers, first start).
+    Only cases reported after the saved high-water mark (less SIMILARITY_CATCH_UP_OVERLAP) are
+    checked, so the scan covers what arrived since the last save rather than the whole table;
+    cases it misses (no reported_at, or reported far out of order) are indexed by /similar on demand.
+    """
+    watermark = similarity_index.watermark
+    recent = select(Case.id, Case.reported_at).where(Case.reported_at.isnot(None))
+    if watermark is not None:
+        recent = recent.where(Case.reported_at > datetime.fromtimestamp(watermark - SIMILARITY_CATCH_UP_OVERLAP, timezone.utc))
+    with SessionLocal() as db:
+        missing = []
+        for case_id, reported_at in db.execute(recent.execution_options(yield_per=5000)):
+            watermark = max(watermark or 0.0, reported_at.timestamp())
+            if case_id not in similarity_index:
+                missing.append(case_id)
+        for start in range(0, len(missing), 1000):
+            chunk = missing[start:start + 1000]
+            transcripts = dict(db.query(CaseTranscript.case_id, CaseTranscript.messages).filter(CaseTranscript.case_id.in_(chunk)))
+            for case_id in chunk:
+                # Cases without words (or a transcript) are recorded too, so they aren't re-read next start
+                similarity_index.add(case_id, transcript_text(transcripts.get(case_id)))
+    # Advanced only once everything up to it is indexed, so a crash mid-way rescans from the old mark
+    similarity_index.advance_watermark(watermark)
+    if missing:
+        logging.info(f"[Similarity] Indexed {len(missing)} cases missing from the saved index")
+        similarity_index.save(SIMILARITY_INDEX_PATH)
+
+@app.on_event("startup")
+def start_similarity_catch_up():
+    # MinHash over the missing transcripts runs beside the server instead of holding up startup
+    threading.Thread(target=catch_up_similarity_index, name="similarity-catch-up", daemon=True).start()
+
+@app.on_event("shutdown")
+def save_similarity_index():
+    similarity_index.save(SIMILARITY_INDEX_PATH)
+
+@app.on_event("shutdown")
+def shutdown_analysis():
+    analysis_executor.shutdown(wait=False)
+    if analysis_engine is not None:
+        analysis_engine.shutdown()
+    if FEATURE_CACHE is not None:
+        FEATURE_CACHE.save()
+
+@app.on_event("shutdown")
+async def shutdown_database():
+    await async_engine.dispose()
 
 # Dependency
 def get_db():
@@ -80,24 +216,10 @@ def get_db():
     finally:
         db.close()
 
-# --- Data Models ---
-class AnalysisRequest(BaseModel):
-    text: str
-    context: Optional[str] = "general"
-
-class ReportRequest(BaseModel):
-    conversationId: str
-    scammerName: Optional[str] = "Unknown"
-    platform: Optional[str] = "chat"
-    classification: str
-    confidenceScore: float
-    transcript: List[Dict[str, Any]]
-    iocs: Dict[str, Any]
-    timestamp: str
-
-class LoginRequest(BaseModel):
-    username: str
-    password: str
+async def get_async_db():
+    # AsyncSession for `async def` endpoints: DB waits yield the event loop instead of pinning a threadpool thread
+    async with AsyncSessionLocal() as db:
+        yield db
 
 # --- Endpoints ---
 
@@ -107,137 +229,247 @@ def read_root():
 
 @app.post("/api/analyze")
 @limiter.limit("20/minute")
-def analyze_text(payload: AnalysisRequest, request: Request):
+async def analyze_text(payload: AnalysisRequest, request: Request):
     """
     Performs deep heuristic analysis on a text snippet.
     """
-    start_time = time.time()
-    
-    analysis_result = analyzer.analyze_behavior([{"role": "scammer", "content": payload.text}])
-    score, threat_classification = analysis_result
-    
-    # Simulate processing delay for "Deep Scan" effect
-    time.sleep(0.5) 
-    
+    history = [{"role": "scammer", "content": payload.text}]
+    if analysis_engine is not None:
+        try:
+            result, queue_wait, processing_time = await analysis_engine.analyze_async(history)
+        except EngineSaturated:
+            raise HTTPException(status_code=503, detail="Analysis engine is busy, retry shortly")
+    else:
+        result, queue_wait, processing_time = await run_analysis(analyzer.analyze_behavior, history)
+
+    # Optional "Deep Scan" effect for the demo console - never holds a worker thread
+    if payload.deep_scan:
+        await asyncio.sleep(DEEP_SCAN_DELAY)
+
     return {
-        "classification": threat_classification,
-        "score": score,
-        "intent": analyzer.intent,
-        "processing_time": time.time() - start_time,
+        "classification": result.classification,
+        "score": result.score,
+        "intent": result.intent,
+        "vector_scores": dict(result.vector_scores),
+        "processing_time": processing_time,
+        "queue_wait": queue_wait,
         "verified": True
     }
 
-# --- Stats Management ---
-def get_or_create_stats(db: Session):
-    stats = db.query(Stats).first()
-    if not stats:
-        stats = Stats(reports_filed=0, scams_detected=0, types_json={})
-        db.add(stats)
-        db.commit()
-        db.refresh(stats)
-    return stats
+MAX_BATCH_ITEMS = 100000
+MAX_BATCH_SIZE = 5000
+
+@app.post("/api/analyze/batch")
+@limiter.limit("10/minute")
+def analyze_batch(payload: BatchAnalysisRequest, request: Request):
+    """
+    Scores archived texts and/or conversations in vectorized batches.
+    Results stream back as NDJSON ({"index", "score", "classification", "intent", "vector_scores"} per line,
+    texts first, then conversations) so memory stays bounded regardless of batch size.
+    """
+    texts = payload.texts or []
+    conversations = payload.conversations or []
+    total = len(texts) + len(conversations)
+    if total == 0:
+        raise HTTPException(status_code=400, detail="Provide at least one text or conversation")
+    if total > MAX_BATCH_ITEMS:
+        raise HTTPException(status_code=413, detail=f"Batch exceeds {MAX_BATCH_ITEMS} items")
+    batch_size = max(1, min(payload.batch_size or 512, MAX_BATCH_SIZE))
+
+    def histories():
+        for text in texts:
+            yield [{"role": "scammer", "content": text}]
+        for conversation in conversations:
+            yield [message.model_dump() for message in conversation]
+
+    def stream():
+        start_time = time.time()
+        items = histories()
+        index = 0
+        while True:
+            chunk = list(islice(items, batch_size))
+            if not chunk:
+                break
+            for result in batch_scorer.score(chunk):
+                yield json.dumps({"index": index, **result.as_dict()}) + "\n"
+                index += 1
+        logging.info(f"[BATCH] Scored {index} items in {time.time() - start_time:.2f}s (batch size {batch_size})")
+
+    return StreamingResponse(stream(), media_type="application/x-ndjson")
 
+# --- Stats Management ---
 @app.get("/api/stats")
 @limiter.limit("30/minute")
-def get_stats(request: Request, db: Session = Depends(get_db)):
-    # Calculate time-based stats dynamically from Cases
-    now = datetime.now(timezone.utc)
-    day_ago = now - timedelta(days=1)
-    week_ago = now - timedelta(days=7)
-    month_ago = now - timedelta(days=30)
-    
-    # helper to filter and count + breakdown + unique scammers
-    def get_stats_for_range(time_threshold):
-        cases = db.query(Case).all()
-        count = 0
-        breakdown = {t: 0 for t in ["ROMANCE", "CRYPTO", "JOB", "IMPERSONATION", "LOTTERY", "TECHNICAL_SUPPORT", "AUTHORITY", "OTHER"]}
-        scammers = set()
-        
-        for c in cases:
-            try:
-                # Handle ISO format Z (trailing Z)
-                ts_str = c.timestamp.replace('Z', '+00:00')
-                c_time = datetime.fromisoformat(ts_str)
-                
-                # Ensure c_time is aware if it's not
-                if c_time.tzinfo is None:
-                    c_time = c_time.replace(tzinfo=timezone.utc)
-                
-                if c_time > time_threshold:
-                    count += 1
-                    ctype = c.threat_level.upper() if c.threat_level else "OTHER"
-                    if ctype in breakdown:
-                        breakdown[ctype] += 1
-                    else:
-                        breakdown["OTHER"] += 1
-                    
-                    if c.scammer_name:
-                        scammers.add(c.scammer_name)
-            except Exception as e:
-                logging.error(f"Error parsing timestamp {c.timestamp}: {e}")
-                pass 
-        return count, breakdown, len(scammers)
-
-    t_count, t_types, t_scammers = get_stats_for_range(day_ago)
-    w_count, w_types, w_scammers = get_stats_for_range(week_ago)
-    m_count, m_types, m_scammers = get_stats_for_range(month_ago)
+async def get_stats(request: Request, db: AsyncSession = Depends(get_async_db)):
+    return await response_cache.respond(request, lambda: compute_stats(db), STATS_CACHE_TTL)
+
+async def compute_stats(db):
+    # Time-window stats from the hourly rollups (whole buckets + the partial edge hour)
+    windows = await db.run_sync(rollup_window_stats)
     
-    stats = get_or_create_stats(db)
+    counts = await db.run_sync(report_counts)
     
     return {
-        "reports_filed": stats.reports_filed,
-        "scams_detected": stats.scams_detected,
-        "types": stats.types_json,
-        "today": t_count,
-        "week": w_count,
-        "month": m_count,
-        "today_types": t_types,
-        "week_types": w_types,
-        "month_types": m_types,
-        "today_scammers": t_scammers,
-        "week_scammers": w_scammers,
-        "month_scammers": m_scammers
+        "reports_filed": counts["reports_filed"],
+        "scams_detected": counts["scams_detected"],
+        "types": counts["types"],
+        "today": windows["today"],
+        "week": windows["week"],
+        "month": windows["month"],
+        "today_types": windows["today_types"],
+        "week_types": windows["week_types"],
+        "month_types": windows["month_types"],
+        "today_scammers": windows["today_scammers"],
+        "week_scammers": windows["week_scammers"],
+        "month_scammers": windows["month_scammers"]
+    }, None
+
+@app.get("/api/cache/metrics")
+def get_cache_metrics(request: Request):
+    """
+    Hit/miss counters of this worker's caches: the /api/stats + /api/cases response cache
+    and the per-message NLP feature memo (null when FEATURE_CACHE_SIZE=0).
+    """
+    return {
+        "responses": response_cache.metrics(),
+        "features": FEATURE_CACHE.metrics() if FEATURE_CACHE is not None else None
     }
 
 # --- Cases Management ---
 
 @app.get("/api/cases")
 @limiter.limit("20/minute")
-def get_cases(request: Request, db: Session = Depends(get_db)):
-    cases = db.query(Case).all()
-    # Convert to list of dicts for JSON response
-    return [{
-        "id": c.id,
-        "scammerName": c.scammer_name,
-        "platform": c.platform,
-        "status": c.status,
-        "threatLevel": c.threat_level,
-        "iocs": c.iocs,
-        "transcript": c.transcript,
-        "timestamp": c.timestamp,
-        "autoReported": c.auto_reported
-    } for c in cases]
-
-@app.post("/api/report")
-@limiter.limit("10/minute")
-def submit_report(report: ReportRequest, request: Request, db: Session = Depends(get_db)):
+async def get_cases(
+    request: Request,
+    limit: Optional[int] = Query(None, ge=1),
+    cursor: Optional[str] = None,
+    fields: Optional[str] = None,
+    threat_level: Optional[str] = None,
+    platform: Optional[str] = None,
+    since: Optional[str] = None,
+    until: Optional[str] = None,
+    format: str = Query("json", pattern="^(json|ndjson)$"),
+    db: AsyncSession = Depends(get_async_db)
+):
     """
-    Receives official scam reports from the frontend honeypot.
+    Lists cases newest-first as a JSON array, one page at a time: pass the X-Next-Cursor
+    response header back as `cursor` for the next page (absent on the last one).
+    `fields` projects columns (e.g. fields=id,scammerName,threatLevel skips transcripts),
+    `threat_level` takes a comma-separated list, since/until bound the report time.
+    format=ndjson streams every matching case (or `limit` of them) for bulk export.
+    JSON pages are served from the response cache and carry an ETag for If-None-Match polls.
     """
-    logging.info(f"🚨 [REPORT RECEIVED] ID: {report.conversationId} | Type: {report.classification}")
-    
-    # Update Stats
-    stats = get_or_create_stats(db)
-    stats.reports_filed += 1
-    stats.scams_detected += 1 # Increment detected counter
-    
-    scam_type = report.classification.upper()
-    current_types = dict(stats.types_json) # Copy to modify
-    current_types[scam_type] = current_types.get(scam_type, 0) + 1
-    stats.types_json = current_types # Reassign to trigger update
+    try:
+        selected = parse_fields(fields)
+        after = decode_cursor(cursor) if cursor else None
+        since_at, until_at = parse_bound(since), parse_bound(until)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    threat_levels = [level.strip() for level in threat_level.split(",") if level.strip()] if threat_level else None
+    statement = case_select(selected, threat_levels=threat_levels, platform=platform, since=since_at, until=until_at, cursor=after)
+
+    if format == "ndjson":
+        if limit is not None:
+            statement = statement.limit(limit)
+
+        async def export():
+            # Own session: the request-scoped one may be closed before the body is streamed
+            async with AsyncSessionLocal() as stream_db:
+                async for line in stream_ndjson_async(stream_db, statement, selected, CASES_STREAM_BATCH):
+                    yield line
+        return StreamingResponse(export(), media_type="application/x-ndjson")
+
+    page_size = min(limit or CASES_PAGE_SIZE, CASES_MAX_PAGE_SIZE)
+
+    async def build_page():
+        cases, next_cursor = await db.run_sync(fetch_page, statement, selected, page_size)
+        return cases, {"X-Next-Cursor": next_cursor} if next_cursor else None
+    return await response_cache.respond(request, build_page, CASES_CACHE_TTL)
+
+SEARCH_FIELDS = ["id", "scammerName", "platform", "threatLevel", "timestamp"]
+
+# Registered before /api/cases/{case_id}, which would otherwise take "search" as a case id
+@app.get("/api/cases/search")
+@limiter.limit("30/minute")
+async def search_case_text(
+    request: Request,
+    q: str = Query(..., min_length=1, max_length=500),
+    limit: int = Query(20, ge=1, le=100),
+    offset: int = Query(0, ge=0, le=10000),
+    db: AsyncSession = Depends(get_async_db)
+):
+    """
+    Full-text search over case transcripts, scammer names and IOC values, best match (bm25) first.
+    Every word of `q` must match (a trailing * matches a prefix, "quoted text" a phrase); IOCs and
+    names weigh more than chat text. Each hit carries a snippet with the matched words in [brackets];
+    page with `offset` (nextOffset is null on the last page).
+    """
+    async def build_results():
+        try:
+            hits, more = await db.run_sync(search_cases, q, limit, offset)
+        except ValueError as e:
+            raise HTTPException(status_code=400, detail=str(e))
+        except LookupError as e:
+            raise HTTPException(status_code=501, detail=str(e))
+        cases = await db.run_sync(cases_by_id, [case_id for case_id, _, _ in hits], SEARCH_FIELDS)
+        results = [{**cases[case_id], "score": score, "snippet": snippet} for case_id, score, snippet in hits if case_id in cases]
+        return {"query": q, "hits": results, "nextOffset": offset + limit if more else None}, None
+    return await response_cache.respond(request, build_results, CASES_CACHE_TTL)
+
+@app.get("/api/cases/{case_id}")
+@limiter.limit("60/minute")
+async def get_case(case_id: str, request: Request, db: AsyncSession = Depends(get_async_db)):
+    case = await db.run_sync(case_detail, case_id)
+    if case is None:
+        raise HTTPException(status_code=404, detail="Case not found")
+    return case
+
+SIMILAR_FIELDS = ["id", "scammerName", "platform", "threatLevel", "timestamp"]
+
+@app.get("/api/cases/{case_id}/similar")
+@limiter.limit("60/minute")
+async def get_similar_cases(
+    case_id: str,
+    request: Request,
+    limit: int = Query(10, ge=1, le=100),
+    threshold: float = Query(SIMILARITY_THRESHOLD, ge=0.0, le=1.0),
+    db: AsyncSession = Depends(get_async_db)
+):
+    """
+    Cases (and known scam scripts, kind "script") whose transcripts are near-duplicates of this
+    case's, by MinHash-estimated Jaccard similarity of their word shingles, most similar first.
+    Only cases sharing an LSH bucket are compared, so the cost doesn't grow with the case count.
+    """
+    if case_id not in similarity_index:
+        case = await db.run_sync(case_detail, case_id)
+        if case is None:
+            raise HTTPException(status_code=404, detail="Case not found")
+        await run_in_threadpool(similarity_index.add, case_id, transcript_text(case["transcript"]))
+
+    matches = similarity_index.similar(case_id, limit=limit, threshold=threshold)
+    case_ids = [match_id for match_id, _ in matches if not match_id.startswith(SCRIPT_PREFIX)]
+    cases = await db.run_sync(cases_by_id, case_ids + [case_id], SIMILAR_FIELDS)
+    if case_id not in cases:
+        raise HTTPException(status_code=404, detail="Case not found")
+
+    results = []
+    for match_id, similarity in matches:
+        if match_id.startswith(SCRIPT_PREFIX):
+            results.append({"id": match_id[len(SCRIPT_PREFIX):], "kind": "script", "similarity": similarity})
+        elif match_id in cases:
+            results.append({**cases[match_id], "kind": "case", "similarity": similarity})
+    return {"caseId": case_id, "matches": results}
+
+def store_report(db, report):
+    """
+    Counts one report and stores its case (unless already stored) in the caller's transaction.
+    Returns the new Case, or None when it already existed.
+    """
+    # Update Stats (atomic per-counter upserts)
+    record_report_counts(db, [report.classification])
     
     # Save Case
-    existing_case = db.query(Case).filter(Case.id == report.conversationId).first()
+    existing_case = db.query(Case.id).filter(Case.id == report.conversationId).first()
     if not existing_case:
         new_case = Case(
             id=report.conversationId,
@@ -248,20 +480,125 @@ def submit_report(report: ReportRequest, request: Request, db: Session = Depends
             iocs=report.iocs,
             transcript=report.transcript,
             timestamp=report.timestamp,
+            reported_at=parse_case_timestamp(report.timestamp),
             auto_reported=True
         )
         db.add(new_case)
-    
-    db.commit()
+        record_case_rollup(db, new_case)
+        index_cases(db, [(new_case.id, report.scammerName, report.iocs, report.transcript)])
+        return new_case
+    return None
+
+@app.post("/api/report")
+@limiter.limit("10/minute")
+async def submit_report(report: ReportRequest, request: Request, db: AsyncSession = Depends(get_async_db)):
+    """
+    Receives official scam reports from the frontend honeypot.
+    """
+    logging.info(f"🚨 [REPORT RECEIVED] ID: {report.conversationId} | Type: {report.classification}")
+    new_case = await db.run_sync(store_report, report)
+    await db.commit()
+    await response_cache.invalidate_async()
+    if new_case:
+        # MinHash is CPU work under the index lock: keep it off the event loop
+        await run_in_threadpool(similarity_index.add, new_case.id, transcript_text(report.transcript))
+    publish_reports([report.classification], [new_case] if new_case else [])
     
     return {"status": "received", "case_id": f"CASE-{int(time.time())}"}
 
+MAX_BULK_REPORTS = 5000
+
+@app.post("/api/report/bulk")
+@limiter.limit("10/minute")
+def submit_reports_bulk(reports: List[ReportRequest], request: Request, db: Session = Depends(get_db)):
+    # Stays a sync endpoint: encoding thousands of transcripts is CPU work that belongs on the threadpool
+    """
+    Ingests a collector's buffered reports in one transaction: existing cases are found with one
+    IN query, new cases and transcripts go in as executemany inserts, and the report counters and
+    rollups get one upsert per key the batch touches. Returns a status per report, in request order:
+    "created", "exists" (case already stored) or "duplicate" (repeated earlier in this batch).
+    Every report counts towards the report stats, exactly as if it had been posted to /api/report.
+    """
+    if not reports:
+        raise HTTPException(status_code=400, detail="Provide at least one report")
+    if len(reports) > MAX_BULK_REPORTS:
+        raise HTTPException(status_code=413, detail=f"Bulk report exceeds {MAX_BULK_REPORTS} items")
+    logging.info(f"🚨 [BULK REPORT RECEIVED] {len(reports)} reports")
+
+    # Counters first: the batch takes the write lock up front instead of upgrading a read
+    record_report_counts(db, [report.classification for report in reports])
+
+    ids = {report.conversationId for report in reports}
+    existing = {case_id for (case_id,) in db.query(Case.id).filter(Case.id.in_(ids))}
+
+    results, cases, transcripts, seen = [], [], [], set()
+    for report in reports:
+        case_id = report.conversationId
+        if case_id in existing:
+            status = "exists"
+        elif case_id in seen:
+            status = "duplicate"
+        else:
+            status = "created"
+            seen.add(case_id)
+            cases.append({
+                "id": case_id,
+                "scammer_name": report.scammerName,
+                "platform": report.platform,
+                "status": "closed",
+                "threat_level": report.classification,
+                "iocs": report.iocs,
+                "timestamp": report.timestamp,
+                "reported_at": parse_case_timestamp(report.timestamp),
+                "auto_reported": True
+            })
+            transcripts.append({"case_id": case_id, "messages": report.transcript})
+        results.append({"conversationId": case_id, "status": status})
+
+    new_cases = [Case(**case) for case in cases]
+    if cases:
+        db.execute(insert(Case), cases)
+        db.execute(insert(CaseTranscript), transcripts)
+        record_case_rollups(db, new_cases)
+        index_cases(db, [(case["id"], case["scammer_name"], case["iocs"], transcript["messages"])
+                         for case, transcript in zip(cases, transcripts)])
+    try:
+        db.commit()
+    except IntegrityError:
+        # A concurrent request stored one of these cases after the IN check; nothing was written
+        db.rollback()
+        raise HTTPException(status_code=409, detail="Conflicting concurrent report for one of these cases; retry the batch")
+    response_cache.invalidate()
+    for transcript in transcripts:
+        similarity_index.add(transcript["case_id"], transcript_text(transcript["messages"]))
+    publish_reports([report.classification for report in reports], new_cases)
+
+    return {"received": len(reports), "created": len(cases), "results": results}
+
+@app.get("/api/stream")
+@limiter.limit("30/minute")
+async def stream_events(request: Request, cursor: Optional[str] = None):
+    """
+    Server-sent events for newly stored reports, instead of polling /api/stats and /api/cases:
+    `case.created` (the case's list fields) and `stats.delta` (increments to the /api/stats
+    lifetime counters, coalesced for slow clients). To resume after a disconnect, pass the
+    last event id as `cursor` (or the standard Last-Event-ID header) to replay what was missed;
+    a `resync` event means events were lost and the client should refetch, then carry on.
+    Events are per worker process.
+    """
+    last_event_id = cursor or request.headers.get("last-event-id")
+    return StreamingResponse(
+        sse_stream(push_hub, request, last_event_id, PUSH_KEEPALIVE),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
+
 # --- Authentication ---
 
 @app.post("/api/login")
 @limiter.limit("5/minute")
-def login(creds: LoginRequest, request: Request, db: Session = Depends(get_db)):
-    user = db.query(User).filter(User.username == creds.username).first()
+async def login(creds: LoginRequest, request: Request, db: AsyncSession = Depends(get_async_db)):
+    user = (await db.execute(select(User).where(User.username == creds.username))).scalars().first()
     
     # If user doesn't exist in DB, look them up in users.json to auto-create
     if not user:
@@ -274,16 +611,17 @@ def login(creds: LoginRequest, request: Request, db: Session = Depends(get_db)):
             valid_users = {"admin": "password123"}
             
         if creds.username in valid_users and creds.password == valid_users[creds.username]:
-            hashed_pw = security.get_password_hash(creds.password)
+            # bcrypt is deliberately slow CPU work: keep it off the event loop
+            hashed_pw = await run_in_threadpool(security.get_password_hash, creds.password)
             role = "admin" if creds.username == "admin" else "operator"
             new_user = User(username=creds.username, hashed_password=hashed_pw, role=role)
             db.add(new_user)
-            db.commit()
+            await db.commit()
             user = new_user
         else:
             raise HTTPException(status_code=401, detail="Invalid credentials")
     
-    if not security.verify_password(creds.password, user.hashed_password):
+    if not await run_in_threadpool(security.verify_password, creds.password, user.hashed_password):
         raise HTTPException(status_code=401, detail="Invalid credentials")
     
     access_token = security.create_access_token(data={"sub": user.username, "role": user.role})
@@ -0,0 +1,259 @@
+import os
+import zlib
+import logging
+import threading
+import contextlib
+import numpy as np
+from feature_cache import normalize_text
+
+try:
+    import fcntl
+except ImportError:  # Windows: concurrent saves from several workers are not serialized
+    fcntl = None
+
+MERSENNE_PRIME = (1 << 31) - 1
+SCRIPT_PREFIX = "script:"
+FORMAT_VERSION = 1
+
+def transcript_text(transcript):
+    """
+    The scammer's side of a stored transcript (every message if no sender is marked), as one text.
+    Accepts both {"sender": ...} and {"role": ...} message shapes.
+    """
+    messages = [m for m in transcript or [] if isinstance(m, dict) and isinstance(m.get("content"), str)]
+    scammer = [m["content"] for m in messages if (m.get("sender") or m.get("role")) == "scammer"]
+    return " ".join(scammer or [m["content"] for m in messages])
+
+def shingles(text, size=3):
+    """
+    32-bit hashes of the word `size`-grams of the normalized text (PII redacted, case-folded),
+    so copies of a script with different phone numbers or casing share their shingles.
+    """
+    words = normalize_text(text).split()
+    if not words:
+        return np.empty(0, dtype=np.uint64)
+    grams = {" ".join(words[i:i + size]) for i in range(max(len(words) - size + 1, 1))}
+    return np.fromiter((zlib.crc32(gram.encode("utf-8")) for gram in grams), dtype=np.uint64, count=len(grams))
+
+class MinHashLSH:
+    """
+    MinHash signatures + banded locality-sensitive hashing over case transcripts.
+    `num_perm` hash functions (a*x + b mod 2^31-1) give each document a signature whose
+    per-position agreement estimates Jaccard similarity of the shingle sets; signatures split into
+    `bands` bands of num_perm/bands rows, and two documents become candidates when any whole band
+    matches, so lookups only touch the few documents sharing a bucket.
+    Buckets live in per-band sorted key arrays (binary-searched) plus a dict of keys added since the
+    last compaction, which save() folds in; the arrays and signatures persist as one .npz file.
+    Documents without words get no signature but are remembered (and saved) as indexed, so
+    callers catching up on unindexed ids don't re-read them every time. `watermark` is a
+    caller-maintained high-water mark (e.g. the newest report time fully indexed), saved alongside.
+    """
+
+    def __init__(self, num_perm=128, bands=32, shingle_size=3, seed=24):
+        if num_perm % bands:
+            raise ValueError("num_perm must be a multiple of bands")
+        self.num_perm, self.bands, self.rows = num_perm, bands, num_perm // bands
+        self.shingle_size, self.seed = shingle_size, seed
+        rng = np.random.default_rng(seed)
+        self._a = rng.integers(1, MERSENNE_PRIME, num_perm, dtype=np.uint64)
+        self._b = rng.integers(0, MERSENNE_PRIME, num_perm, dtype=np.uint64)
+        # Random odd multipliers fold a band's rows into one 64-bit bucket key (wrapping multiply-add)
+        self._fold = rng.integers(1, 1 << 63, (bands, self.rows), dtype=np.uint64) | np.uint64(1)
+        self._lock = threading.RLock()
+        self.ids = []
+        self._positions = {}
+        self._signatures = np.empty((1024, num_perm), dtype=np.uint32)
+        self._band_keys = [np.empty(0, dtype=np.uint64) for _ in range(bands)]
+        self._band_docs = [np.empty(0, dtype=np.int64) for _ in range(bands)]
+        self._pending = [{} for _ in range(bands)]
+        self._compacted = 0
+        self._empty = set()
+        self.watermark = None
+
+    def __len__(self):
+        return len(self.ids)
+
+    def __contains__(self, doc_id):
+        return doc_id in self._positions or doc_id in self._empty
+
+    def signature(self, text):
+        """
+        MinHash signature of a text, or None when it has no words.
+        """
+        hashes = shingles(text, self.shingle_size)
+        if not len(hashes):
+            return None
+        with np.errstate(over="ignore"):
+            permuted = (np.outer(hashes, self._a) + self._b) % np.uint64(MERSENNE_PRIME)
+        return permuted.min(axis=0).astype(np.uint32)
+
+    def _bucket_keys(self, signature):
+        with np.errstate(over="ignore"):
+            return (signature.reshape(self.bands, self.rows).astype(np.uint64) * self._fold).sum(axis=1)
+
+    def add(self, doc_id, text):
+        """
+        Indexes one document; returns False if it has no words or is already indexed.
+        """
+        signature = self.signature(text)
+        with self._lock:
+            if signature is None:
+                self._empty.add(doc_id)
+                return False
+            if doc_id in self._positions:
+                return False
+            self._insert(doc_id, signature)
+        return True
+
+    def _insert(self, doc_id, signature):
+        position = len(self.ids)
+        if position == len(self._signatures):
+            self._signatures = np.concatenate([self._signatures, np.empty_like(self._signatures)])
+        self._signatures[position] = signature
+        self.ids.append(doc_id)
+        self._positions[doc_id] = position
+        for band, key in enumerate(self._bucket_keys(signature).tolist()):
+            self._pending[band].setdefault(key, []).append(position)
+
+    def advance_watermark(self, watermark):
+        with self._lock:
+            if watermark is not None and (self.watermark is None or watermark > self.watermark):
+                self.watermark = watermark
+
+    def similar(self, doc_id, limit=10, threshold=0.5):
+        """
+        Up to `limit` (id, estimated Jaccard similarity) pairs for an indexed document, most similar
+        first, excluding itself; only candidates sharing an LSH bucket are compared.
+        """
+        with self._lock:
+            position = self._positions.get(doc_id)
+            if position is None:
+                return []
+            return self._query(self._signatures[position], limit, threshold, exclude=position)
+
+    def query_text(self, text, limit=10, threshold=0.5):
+        signature = self.signature(text)
+        if signature is None:
+            return []
+        with self._lock:
+            return self._query(signature, limit, threshold)
+
+    def _query(self, signature, limit, threshold, exclude=None):
+        candidates = set()
+        bucket_keys = self._bucket_keys(signature)
+        for band, key in enumerate(bucket_keys.tolist()):
+            # Search with the uint64 scalar: a Python int above 2^63 would make numpy compare as floats
+            keys, probe = self._band_keys[band], bucket_keys[band]
+            lo, hi = keys.searchsorted(probe, "left"), keys.searchsorted(probe, "right")
+            candidates.update(self._band_docs[band][lo:hi].tolist())
+            candidates.update(self._pending[band].get(key, ()))
+        candidates.discard(exclude)
+        if not candidates:
+            return []
+        positions = np.fromiter(candidates, dtype=np.int64, count=len(candidates))
+        scores = (self._signatures[positions] == signature).mean(axis=1)
+        keep = scores >= threshold
+        positions, scores = positions[keep], scores[keep]
+        order = np.lexsort((positions, -scores))[:limit]
+        return [(self.ids[positions[i]], round(float(scores[i]), 4)) for i in order]
+
+    def compact(self):
+        """
+        Folds buckets added since the last compaction into the sorted per-band arrays.
+        """
+        with self._lock:
+            if self._compacted == len(self.ids):
+                return
+            for band in range(self.bands):
+                added = self._pending[band]
+                new_keys = np.fromiter((k for k, docs in added.items() for _ in docs), dtype=np.uint64)
+                new_docs = np.fromiter((d for docs in added.values() for d in docs), dtype=np.int64)
+                keys = np.concatenate([self._band_keys[band], new_keys])
+                docs = np.concatenate([self._band_docs[band], new_docs])
+                order = np.argsort(keys, kind="stable")
+                self._band_keys[band], self._band_docs[band] = keys[order], docs[order]
+                self._pending[band] = {}
+            self._compacted = len(self.ids)
+
+    def _params(self):
+        return np.array([FORMAT_VERSION, self.num_perm, self.bands, self.shingle_size, self.seed], dtype=np.int64)
+
+    def save(self, path):
+        """
+        Merges in what is already saved at `path` (other workers keep their own index and save to
+        the same file), then compacts and writes the union there, replacing it atomically. The
+        read-merge-write runs under an exclusive lock on `path`.lock, so concurrent saves don't
+        drop each other's documents.
+        """
+        with _locked(f"{path}.lock"), self._lock:
+            saved = self._read(path)
+            if saved is not None:
+                for doc_id, signature in zip(saved["ids"].tolist(), saved["signatures"]):
+                    if doc_id not in self._positions:
+                        self._insert(doc_id, signature)
+                self._empty.update(saved["empty"].tolist() if "empty" in saved else ())
+                self.advance_watermark(float(saved["watermark"]) if "watermark" in saved else None)
+            self.compact()
+            n = len(self.ids)
+            tmp_path = f"{path}.tmp"
+            with open(tmp_path, "wb") as f:
+                np.savez(f, params=self._params(), ids=np.array(self.ids, dtype=str), signatures=self._signatures[:n],
+                         band_keys=np.stack(self._band_keys) if n else np.empty((self.bands, 0), dtype=np.uint64),
+                         band_docs=np.stack(self._band_docs) if n else np.empty((self.bands, 0), dtype=np.int64),
+                         empty=np.array(sorted(self._empty), dtype=str),
+                         **({"watermark": np.float64(self.watermark)} if self.watermark is not None else {}))
+            os.replace(tmp_path, path)
+        logging.info(f"[Similarity] Saved {n} signatures to {path}")
+        return n
+
+    def _read(self, path):
+        """
+        The arrays of the index saved at `path`, or None when it is missing, unreadable or was
+        written with different parameters.
+        """
+        if not path or not os.path.exists(path):
+            return None
+        try:
+            with np.load(path) as data:
+                if not np.array_equal(data["params"], self._params()):
+                    logging.warning(f"[Similarity] Ignoring {path}: built with different parameters")
+                    return None
+                return {name: data[name] for name in data.files}
+        except (OSError, ValueError, KeyError) as e:
+            logging.warning(f"[Similarity] Ignoring unreadable index {path}: {e}")
+            return None
+
+    @classmethod
+    def load(cls, path, **params):
+        """
+        Loads a saved index, or returns an empty one when the file is missing, unreadable or was
+        written with different parameters.
+        """
+        index = cls(**params)
+        saved = index._read(path)
+        if saved is None:
+            return index
+        index.ids = saved["ids"].tolist()
+        index._signatures = saved["signatures"] if len(index.ids) else index._signatures
+        index._band_keys, index._band_docs = list(saved["band_keys"]), list(saved["band_docs"])
+        index._empty = set(saved["empty"].tolist()) if "empty" in saved else set()
+        index.watermark = float(saved["watermark"]) if "watermark" in saved else None
+        index._positions = {doc_id: i for i, doc_id in enumerate(index.ids)}
+        index._compacted = len(index.ids)
+        logging.info(f"[Similarity] Loaded {len(index.ids)} signatures from {path}")
+        return index
+
+    def metrics(self):
+        return {"documents": len(self.ids), "empty": len(self._empty), "pending": len(self.ids) - self._compacted,
+                "num_perm": self.num_perm, "bands": self.bands, "rows": self.rows}
+
+@contextlib.contextmanager
+def _locked(lock_path):
+    with open(lock_path, "a") as lock_file:
+        if fcntl is not None:
+            fcntl.flock(lock_file, fcntl.LOCK_EX)
+        try:
+            yield
+        finally:
+            if fcntl is not None:
+                fcntl.flock(lock_file, fcntl.LOCK_UN)
@@ -0,0 +1,252 @@
+import math
+import time
+import pickle
+import random
+import logging
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from analyzer import ScamAnalyzer
+from text_backend import RegexTextBackend, get_text_backend
+from batch_analyzer import BatchScorer
+from analysis_engine import AnalysisEngine, EngineSaturated
+from agent import HoneypotAgent
+
+logging.basicConfig(level=logging.INFO, format='%(message)s')
+
+def scammer(*messages):
+    return [{"role": "scammer", "content": m} for m in messages]
+
+def test_lexicon_index_single_pass():
+    print("=== Testing Compiled Lexicon Index ===\n")
+    analyzer = ScamAnalyzer()
+    lexicon = analyzer._compiled
+
+    words = ["send", "the", "otp", "now", "police", "now"]
+    counts = lexicon.category_counts(lexicon.mask_counts(words))
+    print(f"Category counts: {counts}")
+    assert counts["action_verbs"] == 1
+    assert counts["identity_assets"] == 1
+    assert counts["time_compression"] == 2
+    assert counts["coercion_vectors"] == 1
+
+    urgency_mask = lexicon.mask("time_compression", "coercion_vectors")
+    assert lexicon.hits(lexicon.mask_counts(words), urgency_mask) == 3
+
+def test_lexicon_hot_reload():
+    print("=== Testing Lexicon Hot Reload ===\n")
+    analyzer = ScamAnalyzer()
+    history = scammer("please pick up a gift voucher for me at the store later")
+    before = analyzer.analyze_behavior(history)
+
+    lexicons = {name: list(terms) for name, terms in analyzer.lexicons.items()}
+    lexicons["financial_assets"] += ["gift", "voucher"]
+    analyzer.reload_lexicons(lexicons)
+    after = analyzer.analyze_behavior(history)
+    print(f"Before reload: {before} | After reload: {after}")
+    assert before.classification == "benign"
+    assert after.classification != "benign"
+
+    try:
+        analyzer.reload_lexicons({"financial_assets": ["money"]})
+        assert False, "Incomplete lexicon set should be rejected"
+    except ValueError as e:
+        print(f"Rejected incomplete lexicon set: {e}")
+    assert "voucher" in analyzer.lexicons["financial_assets"]
+
+def test_incremental_matches_full_recompute():
+    print("=== Testing Incremental Conversation State ===\n")
+    analyzer = ScamAnalyzer(verify_incremental=True)
+    messages = [
+        {"role": "scammer", "content": "Hello, I am reaching out from CoinBase Support."},
+        {"role": "agent", "content": "Which app or service is this related to?"},
+        {"role": "scammer", "content": "Your account has been compromised. Please click"},
+        {"role": "scammer", "content": "the link to verify your wallet immediately"},
+        {"role": "scammer", "content": "Police will arrest you today! Send the btc now, hurry!"},
+    ]
+
+    state = analyzer.new_state()
+    history = []
+    for message in messages:
+        history.append(message)
+        incremental = analyzer.analyze_incremental(state, history)
+        full = analyzer.analyze_behavior(history)
+        print(f"Incremental: {incremental} | Full: {full}")
+        assert incremental == full
+    assert state.consumed == len(messages)
+
+    # A reloaded lexicon set invalidates the running state and forces a replay
+    analyzer.reload_lexicons({name: list(terms) for name, terms in analyzer.lexicons.items()})
+    assert analyzer.analyze_incremental(state, history) == analyzer.analyze_behavior(history)
+    assert state.lexicon is analyzer._compiled
+
+# Negations, modifiers, "!" and sentiment words, so message boundaries land mid-phrase
+FUZZ_WORDS = ["no", "not", "never", "don't", "really", "very", "extremely", "!", ",", ".", "?", "a", "the", "is", "you",
+              "happy", "sad", "good", "bad", "great", "awful", "stupid", "terrible", "amazing", "urgent", "police",
+              "won", "your", "send", "money", "now", "click", "link", "kindly", "btc", "wallet", "prize", "arrest", "otp"]
+
+def test_incremental_matches_full_recompute_randomized():
+    print("=== Testing Incremental State on Random Histories ===\n")
+    # Polarity carries across messages: "no" + "happy ..." is negated, "!" boosts the previous message's last word
+    analyzer = ScamAnalyzer(feature_cache=None)
+    history = scammer("no", "stupid terrible urgent sad the police is", "you ! really happy", "won , your")
+    assert analyzer.analyze_incremental(analyzer.new_state(), history) == analyzer.analyze_behavior(history)
+
+    for name, histories in (("regex", 3000), ("textblob", 300)):
+        analyzer = ScamAnalyzer(backend=get_text_backend(name), feature_cache=None)
+        rng = random.Random(2)
+        mismatches = 0
+        for _ in range(histories):
+            history, state = [], analyzer.new_state()
+            for _ in range(rng.randint(2, 6)):
+                role = "scammer" if rng.random() < 0.8 else "agent"
+                history.append({"role": role, "content": " ".join(rng.choice(FUZZ_WORDS) for _ in range(rng.randint(1, 7)))})
+                incremental, full = analyzer.analyze_incremental(state, history), analyzer.analyze_behavior(history)
+                mismatches += not (math.isclose(incremental.score, full.score, abs_tol=1e-9)
+                                   and incremental.classification == full.classification)
+        print(f"{name}: {histories} random histories, {mismatches} mismatching steps")
+        assert mismatches == 0
+
+def test_regex_text_backend():
+    print("=== Testing Regex Text Backend ===\n")
+    backend = RegexTextBackend()
+
+    words = backend.words("don't click http://bit.ly/fake-link, it's urgent!")
+    print(f"Tokens: {words}")
+    assert words == ["do", "n't", "click", "http", "bit.ly/fake-link", "it", "'s", "urgent"]
+
+    good, not_good = backend.sentiment("this is good"), backend.sentiment("this is not good")
+    print(f"'good': {good.polarity} | 'not good': {not_good.polarity}")
+    assert good.polarity > 0 > not_good.polarity
+    assert backend.sentiment("bad!").polarity < backend.sentiment("bad").polarity
+
+def test_batch_scorer_matches_single_analysis():
+    print("=== Testing Vectorized Batch Scorer ===\n")
+    analyzer = ScamAnalyzer()
+    histories = [
+        scammer("Send me the OTP"),
+        scammer("I love my family"),
+        scammer("you have won a lottery .click on this link to claim prize"),
+        scammer("kindly verify your wallet immediately", "click here now: http://sketchy-link.com", "urgent verify verify"),
+        scammer("I am from the court.", "You have a lawsuit.", "Pay the fine NOW or the police will arrest you!"),
+        [{"role": "agent", "content": "Is this the Google?"}],
+    ]
+
+    results = BatchScorer(analyzer).score(histories)
+    for history, result in zip(histories, results):
+        single = analyzer.analyze_behavior(history)
+        print(f"Batch: {result} | Single: {single}")
+        assert result == single
+
+def test_concurrent_results_are_isolated():
+    print("=== Testing Concurrent Analysis Isolation ===\n")
+    analyzer = ScamAnalyzer()
+    texts = [
+        "Send me the OTP",
+        "Go to the bank and wire money",
+        "I am from the court. You have a lawsuit. Police will arrest you.",
+        "your btc wallet needs crypto",
+        "you have won a lottery prize",
+        "Can you help me with my project today?",
+        "please tap this link for details",
+    ]
+    expected = {text: analyzer.analyze_behavior(scammer(text)) for text in texts}
+    intents = {result.intent for result in expected.values()}
+    print(f"Distinct intents under test: {sorted(intents)}")
+    assert len(intents) >= 5
+
+    # One shared analyzer hammered from many threads must never leak one request's result into another
+    jobs = [texts[i % len(texts)] for i in range(2000)]
+    with ThreadPoolExecutor(max_workers=16) as pool:
+        results = list(pool.map(lambda text: (text, analyzer.analyze_behavior(scammer(text))), jobs))
+
+    mismatches = [(text, result) for text, result in results if result != expected[text]]
+    print(f"{len(results)} concurrent analyses, {len(mismatches)} mismatches")
+    assert not mismatches
+
+    # Results cross process boundaries intact
+    result = expected[texts[2]]
+    assert pickle.loads(pickle.dumps(result)) == result
+
+def test_process_pool_engine_matches_in_process():
+    print("=== Testing Process-Pool Analysis Engine ===\n")
+    analyzer = ScamAnalyzer()
+    engine = AnalysisEngine(analyzer, workers=2, batch_size=8)
+    try:
+        histories = [scammer(text) for text in (
+            "Send me the OTP", "your btc wallet needs crypto", "you have won a lottery prize",
+            "I am from the court. You have a lawsuit. Police will arrest you.", "Can you help me with my project today?",
+        )] * 20
+        futures = [engine.submit("analyze", history) for history in histories]
+        for history, future in zip(histories, futures):
+            result, queue_wait, processing_time = future.result()
+            assert result == analyzer.analyze_behavior(history)
+            assert queue_wait >= 0 and processing_time >= 0
+        print(f"{len(futures)} pooled analyses match the in-process analyzer")
+
+        # Lexicon hot reloads reach the workers
+        history = scammer("please pick up a gift voucher for me at the store later")
+        lexicons = {name: list(terms) for name, terms in analyzer.lexicons.items()}
+        lexicons["financial_assets"] += ["gift", "voucher"]
+        analyzer.reload_lexicons(lexicons)
+        assert engine.analyze(history) == analyzer.analyze_behavior(history)
+        assert engine.analyze(history).classification != "benign"
+
+        # The agent offloads per-message features while keeping its incremental state local
+        agent = HoneypotAgent(engine=engine)
+        for text in ("Hello, I am from CoinBase Support.", "Verify your wallet immediately or police will arrest you"):
+            agent.ingest({"conversation_id": "c1", "text": text})
+        expected = agent.analyzer.analyze_behavior(agent.conversation_history["c1"])
+        print(f"Agent via engine: {agent.sophistication_cache['c1']}")
+        assert agent.sophistication_cache["c1"]["score"] == expected.score
+    finally:
+        engine.shutdown()
+
+def test_engine_shutdown_with_full_queue():
+    print("=== Testing Engine Shutdown With A Full Queue ===\n")
+    analyzer = ScamAnalyzer()
+    engine = AnalysisEngine(analyzer, workers=1, max_pending=4, batch_size=1, batch_window=0)
+    # Hold every in-flight slot so the dispatcher stalls and the queue fills up
+    for _ in range(engine.workers * 2):
+        engine._inflight.acquire()
+    history = scammer("Send me the OTP")
+    futures = []
+    try:
+        while True:
+            futures.append(engine.submit("analyze", history))
+    except EngineSaturated:
+        pass
+    print(f"Queue full after {len(futures)} jobs")
+
+    stopper = threading.Thread(target=engine.shutdown)
+    stopper.start()
+    # The sentinel goes in without waiting for the stalled dispatcher
+    deadline = time.time() + 5
+    while not any(f.done() for f in futures) and time.time() < deadline:
+        time.sleep(0.01)
+    dropped = [f for f in futures if f.done()]
+    assert dropped and all(isinstance(f.exception(), EngineSaturated) for f in dropped)
+    try:
+        engine.submit("analyze", history)
+        assert False, "submit should refuse jobs during shutdown"
+    except EngineSaturated:
+        pass
+
+    for _ in range(engine.workers * 2):
+        engine._inflight.release()
+    stopper.join(timeout=30)
+    assert not stopper.is_alive()
+    for future in futures:
+        if future not in dropped:
+            assert future.result()[0] == analyzer.analyze_behavior(history)
+    print(f"Shutdown dropped {len(dropped)} queued jobs and finished the rest")
+
+if __name__ == "__main__":
+    test_lexicon_index_single_pass()
+    test_lexicon_hot_reload()
+    test_incremental_matches_full_recompute()
+    test_incremental_matches_full_recompute_randomized()
+    test_regex_text_backend()
+    test_batch_scorer_matches_single_analysis()
+    test_concurrent_results_are_isolated()
+    test_process_pool_engine_matches_in_process()
+    test_engine_shutdown_with_full_queue()
@@ -0,0 +1,33 @@
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+from pydantic import ValidationError
+from api_models import BatchAnalysisRequest
+
+def test_batch_conversations_are_validated():
+    print("=== Testing Batch Request Validation ===\n")
+    payload = BatchAnalysisRequest(conversations=[[{"role": "scammer", "content": "Send the OTP", "id": "m1"}]])
+    assert [m.model_dump() for m in payload.conversations[0]] == [{"role": "scammer", "content": "Send the OTP"}]
+
+    for bad in ([{"role": "scammer"}], [{"content": "hi"}], [{"role": "scammer", "content": None}], ["hi"]):
+        try:
+            BatchAnalysisRequest(conversations=[bad])
+            assert False, f"accepted {bad}"
+        except ValidationError:
+            pass
+
+    # As a request body, a malformed message is a 422 before the handler (and its NDJSON stream) starts
+    app, calls = FastAPI(), []
+
+    @app.post("/batch")
+    def batch(payload: BatchAnalysisRequest):
+        calls.append(payload)
+        return {"ok": True}
+
+    client = TestClient(app)
+    response = client.post("/batch", json={"conversations": [[{"role": "scammer"}]]})
+    print(f"{response.status_code}: {response.json()['detail'][0]['loc']}")
+    assert response.status_code == 422 and not calls
+    assert client.post("/batch", json={"texts": ["hi"]}).status_code == 200
+
+if __name__ == "__main__":
+    test_batch_conversations_are_validated()
@@ -0,0 +1,224 @@
+import json
+import time
+import random
+from datetime import datetime, timedelta, timezone
+from sqlalchemy import create_engine, inspect, insert
+from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import StaticPool
+from database import Base, Case, CaseTranscript, CompressionDictionary, parse_case_timestamp
+from case_listing import parse_fields, encode_cursor, decode_cursor, case_select, case_detail, fetch_page, stream_ndjson
+from migrations import run_migrations, compress_case_transcripts, refresh_transcript_dictionaries
+from transcript_codec import TranscriptCodec
+
+def memory_session():
+    engine = create_engine("sqlite://", connect_args={"check_same_thread": False}, poolclass=StaticPool)
+    Base.metadata.create_all(bind=engine)
+    return sessionmaker(bind=engine)()
+
+def seed_cases(db, count, start):
+    rng = random.Random(14)
+    for i in range(count):
+        # Coarse timestamps so many cases tie on reported_at; every 20th is unparseable
+        ts = (start + timedelta(minutes=rng.randint(0, 40))).isoformat() if i % 20 else "not-a-timestamp"
+        db.add(Case(
+            id=f"case-{i:04d}", scammer_name=f"scammer-{i % 9}", platform=rng.choice(["sms", "chat", "email"]),
+            status="open", threat_level=rng.choice(["crypto", "job", "romance"]), iocs={"urls": []},
+            transcript=[{"role": "scammer", "content": "x" * 200}], timestamp=ts,
+            reported_at=parse_case_timestamp(ts), auto_reported=True
+        ))
+    db.commit()
+
+def test_cursor_pagination_and_projection():
+    print("=== Testing Keyset-Paginated Case Listing ===\n")
+    start = datetime(2026, 10, 1, tzinfo=timezone.utc)
+    db = memory_session()
+    seed_cases(db, 300, start)
+
+    # Newest first, ties broken by id, unparseable timestamps last
+    cases = db.query(Case).all()
+    expected = [c.id for c in sorted(cases, key=lambda c: (c.reported_at is not None, c.reported_at or start, c.id), reverse=True)]
+
+    fields = parse_fields("id,threatLevel")
+    seen, cursor, pages = [], None, 0
+    while True:
+        page, cursor = fetch_page(db, case_select(fields, cursor=cursor and decode_cursor(cursor)), fields, 41)
+        assert all(set(case) == {"id", "threatLevel"} for case in page)
+        seen += [case["id"] for case in page]
+        pages += 1
+        if cursor is None:
+            break
+    print(f"{len(seen)} cases over {pages} pages")
+    assert seen == expected
+
+    # Filters combine with paging
+    since, until = start + timedelta(minutes=10), start + timedelta(minutes=30)
+    fields = parse_fields(None)
+    statement = case_select(fields, threat_levels=["crypto", "job"], platform="sms", since=since, until=until)
+    page, _ = fetch_page(db, statement, fields, 1000)
+    matching = {c.id for c in cases if c.threat_level in ("crypto", "job") and c.platform == "sms"
+                and c.reported_at is not None and since <= c.reported_at < until}
+    assert {case["id"] for case in page} == matching
+    assert list(page[0]) == ["id", "scammerName", "platform", "status", "threatLevel", "iocs", "transcript", "timestamp", "autoReported"]
+
+    # Cursors survive the round trip, bad input is rejected
+    moment = datetime(2026, 10, 1, 8, 30, 15, 250000, tzinfo=timezone.utc)
+    assert decode_cursor(encode_cursor(moment, "case-7")) == (moment, "case-7")
+    assert decode_cursor(encode_cursor(None, "case-7")) == (None, "case-7")
+    for bad in ("zzz", encode_cursor(None, "x")[:-3]):
+        try:
+            decode_cursor(bad)
+            assert False, "bad cursor accepted"
+        except ValueError:
+            pass
+    try:
+        parse_fields("id,password")
+        assert False, "unknown field accepted"
+    except ValueError:
+        pass
+
+def test_ndjson_export():
+    print("\n=== Testing NDJSON Case Export ===\n")
+    db = memory_session()
+    seed_cases(db, 120, datetime(2026, 10, 1, tzinfo=timezone.utc))
+    fields = parse_fields("id,transcript")
+    lines = list(stream_ndjson(db, case_select(fields), fields, batch_size=16))
+    exported = [json.loads(line) for line in lines]
+    print(f"Exported {len(exported)} cases")
+    assert all(line.endswith("\n") for line in lines)
+    assert [case["id"] for case in exported] == [case["id"] for case in fetch_page(db, case_select(fields), fields, 1000)[0]]
+
+def test_transcripts_split_from_cases():
+    print("\n=== Testing Transcript Table Split + Migration ===\n")
+    transcript = [{"id": "m1", "sender": "scammer", "content": "Send the OTP", "timestamp": 1}]
+
+    # Legacy database: transcripts inline on the cases rows
+    engine = create_engine("sqlite://", connect_args={"check_same_thread": False}, poolclass=StaticPool)
+    with engine.begin() as conn:
+        conn.exec_driver_sql("CREATE TABLE cases (id VARCHAR PRIMARY KEY, scammer_name VARCHAR, platform VARCHAR, "
+                             "status VARCHAR, threat_level VARCHAR, iocs JSON, transcript JSON, timestamp VARCHAR, auto_reported BOOLEAN)")
+        conn.exec_driver_sql("INSERT INTO cases (id, threat_level, transcript, timestamp) VALUES (?, 'crypto', ?, '2026-10-17T10:00:00Z')",
+                             [("a", json.dumps(transcript)), ("b", "null"), ("c", None)])
+    Base.metadata.create_all(bind=engine)
+    run_migrations(engine)
+    run_migrations(engine)  # idempotent
+    columns = {column["name"] for column in inspect(engine).get_columns("cases")}
+    assert "transcript" not in columns
+
+    db = sessionmaker(bind=engine)()
+    print(f"Moved transcripts: {db.query(CaseTranscript.case_id).all()}")
+    assert db.query(CaseTranscript).count() == 1
+    # Moved through the model: stored encoded (a blob), as a BYTEA column on PostgreSQL needs
+    assert db.connection().exec_driver_sql("SELECT typeof(messages) FROM case_transcripts").scalar() == "blob"
+    assert case_detail(db, "a")["transcript"] == transcript
+    assert case_detail(db, "b")["transcript"] is None
+    assert case_detail(db, "missing") is None
+
+    # The ORM attribute still reads/writes like a column, backed by the child table
+    db.add(Case(id="d", threat_level="job", transcript=transcript))
+    db.commit()
+    assert db.get(Case, "d").transcript == transcript
+    assert db.get(Case, "c").transcript is None
+    db.delete(db.get(Case, "d"))
+    db.commit()
+    assert db.get(CaseTranscript, "d") is None
+
+def test_transcript_compression():
+    print("\n=== Testing Compressed Transcript Storage ===\n")
+    rng = random.Random(16)
+    scripts = ["Your parcel is held at customs, pay the fee at http://bit.ly/x", "Share the OTP to verify your wallet",
+               "Congratulations, you won the lottery!", "Who is this?", "I can send it tomorrow"]
+    samples = [[{"id": f"m{i}", "sender": "scammer" if i % 2 else "agent", "content": rng.choice(scripts)}
+                for i in range(rng.randint(4, 12))] for _ in range(300)]
+
+    plain = TranscriptCodec("zlib", use_dictionary=False)
+    trained = TranscriptCodec("zlib")
+    trained.load_dictionary(1, "zlib", trained.train(samples[:100]))
+    for transcript in samples[100:]:
+        assert plain.decode(plain.encode(transcript)) == transcript
+        assert trained.decode(trained.encode(transcript)) == transcript
+    sizes = [sum(len(codec.encode(t)) for t in samples[100:]) for codec in (plain, trained)]
+    raw = sum(len(json.dumps(t)) for t in samples[100:])
+    print(f"JSON {raw} bytes -> zlib {sizes[0]} -> zlib + dictionary {sizes[1]}")
+    assert sizes[1] < sizes[0] < raw
+
+    # Rows written under an older dictionary (or none, or as legacy JSON) still decode
+    old_blob, plain_blob = trained.encode(samples[0]), plain.encode(samples[0])
+    trained.load_dictionary(2, "zlib", trained.train(samples[100:]))
+    assert trained.active_id == 2
+    assert trained.decode(old_blob) == trained.decode(plain_blob) == samples[0]
+    assert trained.decode(json.dumps(samples[0])) == trained.decode(json.dumps(samples[0]).encode()) == samples[0]
+    try:
+        TranscriptCodec("zlib").decode(old_blob)
+        assert False, "decoded without its dictionary"
+    except ValueError:
+        pass
+
+    # Migration: trains a dictionary from the stored transcripts and re-encodes the legacy JSON rows
+    engine = create_engine("sqlite://", connect_args={"check_same_thread": False}, poolclass=StaticPool)
+    Base.metadata.create_all(bind=engine)
+    with engine.begin() as conn:
+        conn.exec_driver_sql("INSERT INTO cases (id) VALUES (?)", [(f"c{i:03d}",) for i in range(len(samples))])
+        conn.exec_driver_sql("INSERT INTO case_transcripts (case_id, messages) VALUES (?, ?)",
+                             [(f"c{i:03d}", json.dumps(t)) for i, t in enumerate(samples)])
+    codec = TranscriptCodec("zlib")
+    compress_case_transcripts(engine, codec)
+    compress_case_transcripts(engine, codec)  # idempotent
+    assert codec.active_id == 1
+    with engine.connect() as conn:
+        stored = conn.exec_driver_sql("SELECT messages FROM case_transcripts ORDER BY case_id").scalars().all()
+    assert all(blob[:1] == b"D" for blob in stored)
+    assert [codec.decode(blob) for blob in stored] == samples
+
+    # A process that started before the dictionary existed loads it on its periodic refresh (reads
+    # never query the database), and writes with it only once the delay has passed
+    late = TranscriptCodec("zlib")
+    try:
+        late.decode(stored[0])
+        assert False, "decoded without its dictionary"
+    except ValueError:
+        pass
+    refresh_transcript_dictionaries(engine, late, delay=0.2)
+    assert late.decode(stored[0]) == samples[0]
+    assert late.encode(samples[0])[:1] == b"Z" and late.active_id is None and not late.needs_dictionary
+    time.sleep(0.25)
+    assert late.encode(samples[0])[:1] == b"D" and late.active_id == 1
+
+    # A deployment that starts with too few transcripts trains its dictionary on a later refresh
+    engine = create_engine("sqlite://", connect_args={"check_same_thread": False}, poolclass=StaticPool)
+    Base.metadata.create_all(bind=engine)
+    fresh = TranscriptCodec("zlib")
+    compress_case_transcripts(engine, fresh)
+    assert fresh.needs_dictionary
+    with engine.begin() as conn:
+        conn.exec_driver_sql("INSERT INTO cases (id) VALUES (?)", [(f"c{i:03d}",) for i in range(len(samples))])
+        conn.exec_driver_sql("INSERT INTO case_transcripts (case_id, messages) VALUES (?, ?)",
+                             [(f"c{i:03d}", json.dumps(t)) for i, t in enumerate(samples)])
+    refresh_transcript_dictionaries(engine, fresh)
+    assert fresh.active_id == 1 and fresh.encode(samples[0])[:1] == b"D"
+
+    # Two workers training at once: the one that loses the insert adopts the winner's dictionary
+    engine = create_engine("sqlite://", connect_args={"check_same_thread": False}, poolclass=StaticPool)
+    Base.metadata.create_all(bind=engine)
+    with engine.begin() as conn:
+        conn.exec_driver_sql("INSERT INTO cases (id) VALUES (?)", [(f"c{i:03d}",) for i in range(len(samples))])
+        conn.exec_driver_sql("INSERT INTO case_transcripts (case_id, messages) VALUES (?, ?)",
+                             [(f"c{i:03d}", json.dumps(t)) for i, t in enumerate(samples)])
+
+    class RacedCodec(TranscriptCodec):
+        def train(self, samples):
+            with engine.begin() as conn:
+                conn.execute(insert(CompressionDictionary), {"algorithm": "zlib", "data": super().train(samples[:50])})
+            return super().train(samples)
+
+    codec = RacedCodec("zlib")
+    compress_case_transcripts(engine, codec)
+    with engine.connect() as conn:
+        assert conn.exec_driver_sql("SELECT id FROM compression_dictionaries").scalars().all() == [codec.active_id]
+        stored = conn.exec_driver_sql("SELECT messages FROM case_transcripts ORDER BY case_id").scalars().all()
+    assert all(blob[:1] == b"D" for blob in stored) and [codec.decode(blob) for blob in stored] == samples
+
+if __name__ == "__main__":
+    test_cursor_pagination_and_projection()
+    test_ndjson_export()
+    test_transcripts_split_from_cases()
+    test_transcript_compression()
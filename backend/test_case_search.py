@@ -0,0 +1,85 @@
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import StaticPool
+from database import Base, Case
+from migrations import run_migrations
+from case_search import index_cases, search_cases, match_expression, ioc_text
+
+def chat(*lines):
+    return [{"sender": "scammer" if i % 2 == 0 else "agent", "content": line} for i, line in enumerate(lines)]
+
+def add_case(db, case_id, scammer_name, iocs, transcript):
+    db.add(Case(id=case_id, scammer_name=scammer_name, platform="sms", status="closed", threat_level="crypto",
+                iocs=iocs, transcript=transcript, timestamp="2026-10-01T10:00:00Z", auto_reported=True))
+
+def test_full_text_search():
+    print("=== Testing Full-Text Case Search ===\n")
+    engine = create_engine("sqlite://", connect_args={"check_same_thread": False}, poolclass=StaticPool)
+    Base.metadata.create_all(bind=engine)
+    db = sessionmaker(bind=engine)()
+
+    # Cases stored before the index existed are backfilled by the migration
+    add_case(db, "old-1", "Officer Kumar", {"urls": ["http://secure-refund.com/claim"], "phones": ["555-123-4567"]},
+             chat("Your refund is pending, open the link", "which link?"))
+    add_case(db, "old-2", "Priya", {"urls": []}, chat("Café job offer: earn money from home, call 555-123-4567"))
+    db.commit()
+    run_migrations(engine)
+
+    add_case(db, "new-1", "Crypto Guru", {"wallets": ["bc1qxy2kgdygjrsqtzq2n0yrf2493p83kkfjhx0wlh"]},
+             chat("Send bitcoin to double your money", "how much?", "Refund guaranteed"))
+    index_cases(db, [("new-1", "Crypto Guru", {"wallets": ["bc1qxy2kgdygjrsqtzq2n0yrf2493p83kkfjhx0wlh"]},
+                      chat("Send bitcoin to double your money", "how much?", "Refund guaranteed"))])
+    db.commit()
+
+    def ids(query, limit=10, offset=0):
+        hits, more = search_cases(db, query, limit, offset)
+        return [case_id for case_id, _, _ in hits], more
+
+    # Phone numbers and URLs match as phrases; the IOC hit ranks above the chat mention
+    assert ids("555-123-4567")[0] == ["old-1", "old-2"]
+    assert ids("secure-refund.com")[0] == ["old-1"]
+    assert ids("refund")[0] == ["old-1", "new-1"]
+    assert ids("cafe")[0] == ["old-2"] and ids("kumar")[0] == ["old-1"]
+    assert ids("bitc*")[0] == ["new-1"] and ids('"double your money"')[0] == ["new-1"]
+    assert ids('"your money double"')[0] == [] and ids("refund bitcoin")[0] == ["new-1"]
+    hits, _ = search_cases(db, "bitcoin", 10)
+    print(f"Hit: {hits[0]}")
+    assert "[bitcoin]" in hits[0][2] and hits[0][1] > 0
+
+    # A word in most cases scores ~1e-6 in bm25; scores keep that precision and their order
+    for i in range(8):
+        add_case(db, f"bulk-{i}", "", {}, chat("money " * (i + 1)))
+        index_cases(db, [(f"bulk-{i}", "", {}, chat("money " * (i + 1)))])
+    db.commit()
+    hits, _ = search_cases(db, "money", 20)
+    scores = [score for _, score, _ in hits]
+    print(f"Common-word scores: {scores[:3]}")
+    assert all(score > 0 for score in scores) and scores == sorted(scores, reverse=True) and len(set(scores)) > 1
+    for i in range(8):
+        db.delete(db.get(Case, f"bulk-{i}"))
+    db.commit()
+
+    # Paging
+    assert ids("refund", limit=1) == (["old-1"], True)
+    assert ids("refund", limit=1, offset=1) == (["new-1"], False)
+
+    # Triggers follow edits and deletions
+    db.get(Case, "old-2").scammer_name = "Rahul"
+    db.get(Case, "old-2").iocs = {"urls": ["http://fake-jobs.net"]}
+    db.commit()
+    assert ids("rahul")[0] == ["old-2"] and ids("priya")[0] == [] and ids("fake-jobs.net")[0] == ["old-2"]
+    db.delete(db.get(Case, "old-1"))
+    db.commit()
+    assert ids("refund")[0] == ["new-1"]
+
+    # Query syntax never reaches FTS5 raw
+    assert match_expression('AND (NEAR "x y" col:z*') == '"AND" "(NEAR" "x y" "col:z"*'
+    try:
+        match_expression(" -- ** ")
+        assert False, "query without words accepted"
+    except ValueError:
+        pass
+    assert ioc_text({"urls": ["a.com"], "n": [5, True, None], "x": {"y": "z"}}) == "a.com 5 z"
+
+if __name__ == "__main__":
+    test_full_text_search()
@@ -0,0 +1,359 @@
+import os
+import random
+import logging
+import tempfile
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timedelta, timezone
+from sqlalchemy import create_engine, inspect, false
+from sqlalchemy.orm import Session, sessionmaker
+from sqlalchemy.pool import StaticPool
+from database import Base, Case, Stats, StatsCounter, parse_case_timestamp
+from case_stats import window_stats, rollup_window_stats, record_case_rollup, record_case_rollups, rebuild_rollups
+from case_stats import HLLScammerSketch, make_scammer_sketch, scammer_hash, record_report_counts, report_counts
+from hyperloglog import HyperLogLog, precision_for_error
+from migrations import run_migrations, build_stats_rollups
+
+logging.basicConfig(level=logging.INFO, format='%(message)s')
+
+def memory_session():
+    engine = create_engine("sqlite://", connect_args={"check_same_thread": False}, poolclass=StaticPool)
+    Base.metadata.create_all(bind=engine)
+    return sessionmaker(bind=engine)()
+
+def test_window_stats_sql_aggregation():
+    print("=== Testing SQL-Side Stats Aggregation ===\n")
+    now = datetime(2026, 10, 17, 12, 0, tzinfo=timezone.utc)
+    db = memory_session()
+    cases = [
+        # (timestamp string, threat_level, scammer_name)
+        ((now - timedelta(hours=2)).isoformat().replace("+00:00", "Z"), "crypto", "Rex"),
+        ((now - timedelta(hours=3)).replace(tzinfo=None).isoformat(), "ROMANCE", "Rex"),   # naive = UTC
+        ((now - timedelta(hours=20)).astimezone(timezone(timedelta(hours=5, minutes=30))).isoformat(), "scam", ""),
+        ((now - timedelta(days=3)).isoformat(), None, "Vic"),
+        ((now - timedelta(days=20)).isoformat(), "lottery", None),
+        ((now - timedelta(days=45)).isoformat(), "crypto", "Old"),                         # outside every window
+        ("not-a-timestamp", "crypto", "Ghost"),                                             # skipped, like before
+    ]
+    for i, (ts, level, name) in enumerate(cases):
+        db.add(Case(id=f"c{i}", scammer_name=name, threat_level=level, timestamp=ts, reported_at=parse_case_timestamp(ts)))
+    db.commit()
+
+    stats = window_stats(db, now)
+    print(f"Window stats: {stats}")
+    assert (stats["today"], stats["week"], stats["month"]) == (3, 4, 5)
+    assert stats["today_types"]["CRYPTO"] == 1 and stats["today_types"]["ROMANCE"] == 1
+    assert stats["today_types"]["OTHER"] == 1                 # unknown "scam" folds into OTHER
+    assert stats["week_types"]["OTHER"] == 2                  # missing threat_level too
+    assert stats["month_types"]["LOTTERY"] == 1
+    assert list(stats["month_types"])[-1] == "OTHER"
+    assert (stats["today_scammers"], stats["week_scammers"], stats["month_scammers"]) == (1, 2, 2)
+
+def test_reported_at_migration_backfills_legacy_rows():
+    print("=== Testing reported_at Migration ===\n")
+    engine = create_engine("sqlite://", connect_args={"check_same_thread": False}, poolclass=StaticPool)
+    with engine.begin() as conn:
+        conn.exec_driver_sql("CREATE TABLE cases (id VARCHAR PRIMARY KEY, scammer_name VARCHAR, platform VARCHAR, "
+                             "status VARCHAR, threat_level VARCHAR, iocs JSON, transcript JSON, timestamp VARCHAR, auto_reported BOOLEAN)")
+        conn.exec_driver_sql("INSERT INTO cases (id, threat_level, timestamp) VALUES "
+                             "('a', 'crypto', '2026-10-17T10:00:00.123Z'), ('b', 'job', '2026-10-17T15:30:00+05:30'), "
+                             "('c', 'job', '2026-10-17T10:00:00'), ('d', 'job', 'garbage')")
+
+    run_migrations(engine)
+    run_migrations(engine)  # idempotent
+    indexes = {index["name"] for index in inspect(engine).get_indexes("cases")}
+    print(f"Indexes: {indexes}")
+    assert "ix_cases_reported_at_threat_scammer" in indexes
+
+    db = sessionmaker(bind=engine)()
+    reported = {case.id: case.reported_at for case in db.query(Case)}
+    print(f"Backfilled: {reported}")
+    assert reported["a"] == datetime(2026, 10, 17, 10, 0, 0, 123000, tzinfo=timezone.utc)
+    assert reported["b"] == datetime(2026, 10, 17, 10, 0, tzinfo=timezone.utc)
+    assert reported["c"] == datetime(2026, 10, 17, 10, 0, tzinfo=timezone.utc)
+    assert reported["d"] is None
+    assert rollup_window_stats(db, datetime(2026, 10, 17, 12, 0, tzinfo=timezone.utc))["today"] == 3
+
+    # Time windows resolve as index range scans
+    with engine.connect() as conn:
+        plan = conn.exec_driver_sql("EXPLAIN QUERY PLAN SELECT threat_level, count(*) FROM cases "
+                                    "WHERE reported_at > ? GROUP BY threat_level", ("2026-10-17 00:00:00.000000",)).all()
+    print(f"Plan: {plan}")
+    assert "ix_cases_reported_at_threat_scammer" in str(plan)
+
+def test_hourly_rollups_match_full_scan():
+    print("=== Testing Hourly Stats Rollups ===\n")
+    rnd = random.Random(7)
+    now = datetime(2026, 10, 17, 12, 34, 56, 789000, tzinfo=timezone.utc)
+    db = memory_session()
+    levels = ["crypto", "ROMANCE", "job", "scam", None, "lottery", "authority"]
+    names = [f"scammer-{i}" for i in range(800)] + ["", None]
+
+    for i in range(1500):
+        reported_at = now - timedelta(seconds=rnd.uniform(-3600, 35 * 86400))
+        if i % 100 == 0:
+            reported_at = now - timedelta(days=rnd.choice([1, 7, 30]))   # exactly on a window bound
+        new_case = Case(id=f"c{i}", scammer_name=rnd.choice(names), threat_level=rnd.choice(levels),
+                        timestamp=reported_at.isoformat(), reported_at=reported_at)
+        db.add(new_case)
+        record_case_rollup(db, new_case)
+    db.commit()
+
+    for offset in (timedelta(0), timedelta(minutes=25), timedelta(hours=5, seconds=1), -timedelta(hours=1)):
+        at = now + offset
+        rolled, scanned = rollup_window_stats(db, at), window_stats(db, at)
+        print(f"now={at.isoformat()} rollup today/week/month: {rolled['today']}/{rolled['week']}/{rolled['month']} "
+              f"scammers {rolled['month_scammers']}")
+        assert rolled == scanned
+
+    # A rebuild from the raw cases reproduces the incrementally maintained rollups
+    before = rollup_window_stats(db, now)
+    rebuild_rollups(db)
+    assert rollup_window_stats(db, now) == before
+
+def test_hyperloglog_error_bound_and_merge():
+    print("=== Testing HyperLogLog Estimator ===\n")
+    assert precision_for_error(0.01) == 14
+    assert precision_for_error(0.05) == 9
+
+    left, right, union = (HyperLogLog(precision_for_error(0.01)) for _ in range(3))
+    n = 200000
+    for i in range(n):
+        h = scammer_hash(f"scammer-{i}")
+        (left if i % 2 else right).add(h)
+        union.add(h)
+    merged = HyperLogLog(left.precision, left.registers).merge(right)
+    assert merged.registers == union.registers
+    error = abs(merged.count() - n) / n
+    print(f"Estimate {merged.count()} for {n} distinct (error {error:.4f}, bound {3 * merged.standard_error:.4f})")
+    assert error < 3 * merged.standard_error
+    assert len(merged.registers) == 1 << 14
+
+def test_hll_rollup_mode():
+    print("=== Testing HyperLogLog Rollup Mode ===\n")
+    now = datetime(2026, 10, 17, 12, 30, tzinfo=timezone.utc)
+    rnd = random.Random(11)
+    sketch = HLLScammerSketch(0.01)
+    db = memory_session()
+    for i in range(1500):
+        reported_at = now - timedelta(seconds=rnd.uniform(0, 35 * 86400))
+        new_case = Case(id=f"c{i}", scammer_name=f"scammer-{rnd.randint(0, 1000)}", threat_level="crypto",
+                        timestamp=reported_at.isoformat(), reported_at=reported_at)
+        db.add(new_case)
+        record_case_rollup(db, new_case, sketch=sketch)
+    db.commit()
+
+    exact = window_stats(db, now)
+    estimated = rollup_window_stats(db, now, sketch=sketch)
+    print(f"Exact scammers: {[exact[w + '_scammers'] for w in ('today', 'week', 'month')]} | "
+          f"HLL: {[estimated[w + '_scammers'] for w in ('today', 'week', 'month')]}")
+    for window in ("today", "week", "month"):
+        assert estimated[window] == exact[window]
+        assert abs(estimated[f"{window}_scammers"] - exact[f"{window}_scammers"]) <= max(2, 0.03 * exact[f"{window}_scammers"])
+
+    # Upserted registers equal the ones a rebuild computes from scratch
+    rebuild_rollups(db, sketch=sketch)
+    assert rollup_window_stats(db, now, sketch=sketch) == estimated
+
+def test_sketch_switch_rebuilds_stale_sketch():
+    print("=== Testing Scammer Sketch Mode Switches ===\n")
+    now = datetime(2026, 10, 17, 12, 30, tzinfo=timezone.utc)
+    db = memory_session()
+    engine = db.get_bind()
+    exact, coarse, fine = make_scammer_sketch("exact"), make_scammer_sketch("hll", 0.05), make_scammer_sketch("hll", 0.01)
+
+    def report(sketch, first, count):
+        # Stands in for a server started with `sketch` configured
+        build_stats_rollups(engine, sketch)
+        for i in range(first, first + count):
+            new_case = Case(id=f"c{i}", scammer_name=f"scammer-{i}", threat_level="job",
+                            timestamp=now.isoformat(), reported_at=now - timedelta(minutes=i % 60))
+            db.add(new_case)
+            record_case_rollup(db, new_case, sketch=sketch)
+        db.commit()
+
+    report(exact, 0, 40)
+    report(coarse, 40, 40)       # exact rows now miss c40..c79
+    report(exact, 80, 40)        # switching back rebuilds them
+    expected = window_stats(db, now)
+    stats = rollup_window_stats(db, now, sketch=exact)
+    print(f"Exact after exact -> hll -> exact: {stats['today_scammers']} (scan: {expected['today_scammers']})")
+    assert stats == expected and stats["today_scammers"] == 120
+
+    report(fine, 120, 40)        # precision change rebuilds too
+    report(coarse, 160, 40)
+    assert abs(rollup_window_stats(db, now, sketch=coarse)["today_scammers"] - 200) <= 10
+
+    # A rebuild clears only its own precision
+    precisions = lambda: {p for p, in db.connection().exec_driver_sql("SELECT DISTINCT precision FROM stats_rollup_scammer_hll")}
+    assert precisions() == {coarse.precision, fine.precision}
+    rebuild_rollups(db, sketch=coarse)
+    assert precisions() == {coarse.precision, fine.precision}
+
+def test_batched_rollups_match_per_case():
+    print("=== Testing Batched Rollup Writes ===\n")
+    now = datetime(2026, 10, 17, 12, 30, tzinfo=timezone.utc)
+    rnd = random.Random(17)
+    cases = []
+    for i in range(600):
+        reported_at = now - timedelta(seconds=rnd.uniform(0, 3 * 86400)) if i % 50 else None
+        cases.append(Case(id=f"c{i}", scammer_name=rnd.choice(["", None, f"scammer-{rnd.randint(0, 80)}"]),
+                          threat_level=rnd.choice(["crypto", "job", None]), timestamp=str(reported_at), reported_at=reported_at))
+
+    for mode in ("exact", "hll"):
+        sketch = make_scammer_sketch(mode, 0.05)
+        one_by_one, batched = memory_session(), memory_session()
+        for case_row in cases:
+            record_case_rollup(one_by_one, case_row, sketch=sketch)
+        for start in range(0, len(cases), 97):
+            record_case_rollups(batched, cases[start:start + 97], sketch=sketch)
+        expected = rollup_window_stats(one_by_one, now, sketch=sketch)
+        print(f"{mode}: today {expected['today']}, scammers {expected['today_scammers']}")
+        assert rollup_window_stats(batched, now, sketch=sketch) == expected
+        for table in ("stats_rollup", "stats_rollup_scammers", "stats_rollup_scammer_hll"):
+            query = f"SELECT * FROM {table} ORDER BY 1, 2"
+            assert one_by_one.connection().exec_driver_sql(query).all() == batched.connection().exec_driver_sql(query).all()
+
+def test_generic_upsert_fallback():
+    print("=== Testing Portable Upserts (No ON CONFLICT) ===\n")
+    import case_stats
+    now = datetime(2026, 10, 17, 12, 30, tzinfo=timezone.utc)
+    rnd = random.Random(12)
+    cases = []
+    for i in range(300):
+        reported_at = now - timedelta(seconds=rnd.uniform(0, 2 * 86400))
+        cases.append(Case(id=f"c{i}", scammer_name=f"scammer-{rnd.randint(0, 40)}", threat_level=rnd.choice(["crypto", "job"]),
+                          timestamp=str(reported_at), reported_at=reported_at))
+    levels = [rnd.choice(["crypto", "job", "romance"]) for _ in range(50)]
+
+    sessions = {}
+    dialect_insert = case_stats._dialect_insert
+    for generic in (False, True):
+        # What a database without INSERT ... ON CONFLICT (e.g. MySQL) goes through
+        case_stats._dialect_insert = (lambda db: None) if generic else dialect_insert
+        try:
+            db = sessions[generic] = memory_session()
+            for mode in ("exact", "hll"):
+                sketch = make_scammer_sketch(mode, 0.05)
+                for start in range(0, len(cases), 40):
+                    record_case_rollups(db, cases[start:start + 40], sketch=sketch)
+            for start in range(0, len(levels), 7):
+                record_report_counts(db, levels[start:start + 7])
+            db.commit()
+        finally:
+            case_stats._dialect_insert = dialect_insert
+    # Another transaction inserts the row between the SELECT and the INSERT: the retry updates it instead
+    class RacingSession(Session):
+        raced = False
+        def query(self, *entities):
+            if not self.raced:
+                self.raced = True
+                return super().query(*entities).filter(false())
+            return super().query(*entities)
+    racing = RacingSession(bind=memory_session().get_bind())
+    racing.add(StatsCounter(name="reports_filed", count=5))
+    racing.commit()
+    case_stats._generic_upsert(racing, StatsCounter, {"name": "reports_filed", "count": 2}, {"count": StatsCounter.count + 2})
+    racing.commit()
+    assert racing.raced and racing.get(StatsCounter, "reports_filed").count == 7
+
+    print(f"Counters: {report_counts(sessions[True])}")
+    assert report_counts(sessions[True]) == report_counts(sessions[False])
+    for table in ("stats_rollup", "stats_rollup_scammers", "stats_rollup_scammer_hll", "stats_counters", "stats_type_counts"):
+        query = f"SELECT * FROM {table} ORDER BY 1, 2"
+        assert sessions[True].connection().exec_driver_sql(query).all() == sessions[False].connection().exec_driver_sql(query).all()
+
+def test_report_counters_no_lost_updates():
+    print("=== Testing Atomic Report Counters (100 Concurrent Reporters) ===\n")
+    reporters, reports_each = 100, 3
+    levels = ["crypto", "job", "Romance"]
+    now = datetime.now(timezone.utc)
+    with tempfile.TemporaryDirectory() as tmp:
+        engine = create_engine(f"sqlite:///{os.path.join(tmp, 'counters.db')}", connect_args={"check_same_thread": False, "timeout": 60})
+        Base.metadata.create_all(bind=engine)
+        Session = sessionmaker(bind=engine)
+        start = threading.Barrier(reporters)
+
+        def reporter(n):
+            # Same transaction shape as submit_report: counters, then the case and its rollup, one commit per report
+            start.wait()
+            for i in range(reports_each):
+                with Session() as db:
+                    record_report_counts(db, [levels[n % len(levels)]])
+                    new_case = Case(id=f"r{n}-{i}", scammer_name=f"s{n}", threat_level=levels[n % len(levels)],
+                                    timestamp=now.isoformat(), reported_at=now)
+                    db.add(new_case)
+                    record_case_rollup(db, new_case)
+                    db.commit()
+
+        with ThreadPoolExecutor(max_workers=reporters) as pool:
+            list(pool.map(reporter, range(reporters)))
+
+        with Session() as db:
+            counts = report_counts(db)
+            print(f"Counters after {reporters} x {reports_each} reports: {counts}")
+            total = reporters * reports_each
+            assert counts["reports_filed"] == counts["scams_detected"] == total
+            assert counts["types"] == {"CRYPTO": 34 * reports_each, "JOB": 33 * reports_each, "ROMANCE": 33 * reports_each}
+            assert rollup_window_stats(db)["today"] == db.query(Case).count() == total
+        engine.dispose()
+
+def test_report_counters_migration():
+    print("=== Testing Legacy Stats Row Migration ===\n")
+    db = memory_session()
+    db.add(Stats(reports_filed=7, scams_detected=6, types_json={"CRYPTO": 4, "JOB": 3}))
+    db.commit()
+    run_migrations(db.get_bind())
+    run_migrations(db.get_bind())  # idempotent: seeds only once
+    record_report_counts(db, ["job", "lottery"])
+    db.commit()
+    assert report_counts(db) == {"reports_filed": 9, "scams_detected": 8, "types": {"CRYPTO": 4, "JOB": 4, "LOTTERY": 1}}
+
+def test_concurrent_worker_migrations():
+    print("=== Testing Migrations From Workers Starting Together ===\n")
+    with tempfile.TemporaryDirectory() as tmp:
+        url = f"sqlite:///{os.path.join(tmp, 'legacy.db')}"
+        legacy = create_engine(url)
+        with legacy.begin() as conn:
+            conn.exec_driver_sql("CREATE TABLE cases (id VARCHAR PRIMARY KEY, scammer_name VARCHAR, platform VARCHAR, "
+                                 "status VARCHAR, threat_level VARCHAR, iocs JSON, transcript JSON, timestamp VARCHAR, auto_reported BOOLEAN)")
+            conn.exec_driver_sql("INSERT INTO cases (id, threat_level, transcript, timestamp) VALUES (?, 'job', ?, '2026-10-17T10:00:00Z')",
+                                 [(f"c{i}", '[{"sender": "scammer", "content": "pay"}]') for i in range(50)])
+            Stats.__table__.create(bind=conn)
+            conn.execute(Stats.__table__.insert(), {"reports_filed": 7, "scams_detected": 6, "types_json": {"JOB": 7}})
+        legacy.dispose()
+
+        workers = 4
+        start = threading.Barrier(workers)
+        def worker(_):
+            # Each worker process has its own engine; all start migrating at once
+            engine = create_engine(url, connect_args={"timeout": 60})
+            start.wait()
+            try:
+                run_migrations(engine)
+            finally:
+                engine.dispose()
+        with ThreadPoolExecutor(max_workers=workers) as pool:
+            list(pool.map(worker, range(workers)))
+
+        engine = create_engine(url)
+        with sessionmaker(bind=engine)() as db:
+            counts = report_counts(db)
+            print(f"Counters after {workers} concurrent migrations: {counts}")
+            assert counts == {"reports_filed": 7, "scams_detected": 6, "types": {"JOB": 7}}
+            assert db.query(Case).filter(Case.reported_at.isnot(None)).count() == 50
+            assert db.connection().exec_driver_sql("SELECT count(*) FROM case_transcripts").scalar() == 50
+        engine.dispose()
+
+if __name__ == "__main__":
+    test_window_stats_sql_aggregation()
+    test_reported_at_migration_backfills_legacy_rows()
+    test_hourly_rollups_match_full_scan()
+    test_hyperloglog_error_bound_and_merge()
+    test_hll_rollup_mode()
+    test_sketch_switch_rebuilds_stale_sketch()
+    test_batched_rollups_match_per_case()
+    test_generic_upsert_fallback()
+    test_report_counters_no_lost_updates()
+    test_report_counters_migration()
+    test_concurrent_worker_migrations()
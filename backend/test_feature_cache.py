@@ -0,0 +1,87 @@
+import os
+import random
+import tempfile
+from analyzer import ScamAnalyzer, MessageFeatures
+from feature_cache import FeatureCache, normalize_text
+
+def counting_extract(analyzer):
+    calls = []
+    def extract(text):
+        calls.append(text)
+        return analyzer.message_features(text)
+    return extract, calls
+
+def test_memo_is_transparent():
+    print("=== Testing Feature Memo On/Off Equivalence ===\n")
+    # Repeated PII makes up much of this message: redacting it would change the score
+    texts = ["URGENT pay now 5551234567 5551234567 5551234567 bank", "Send   BTC to 1BoatSLRHtKNngkdXEeobR76b53LETtpyT now",
+             "Mail john.doe@example.com or call (555) 987-6543 TODAY", "urgent pay now 5551234567 5551234567 5551234567 bank"]
+    rng = random.Random(23)
+    for _ in range(200):
+        texts.append(" ".join(rng.choice(["pay", "the", "fee", "URGENT", "police", "card", f"555-{rng.randint(100, 999)}-1234",
+                                          "agent@secure-help.com", "4111 1111 1111 1111", "now!", "not", "happy"])
+                              for _ in range(rng.randint(1, 8))))
+
+    cache = FeatureCache(max_entries=100)
+    memo, plain = ScamAnalyzer(feature_cache=cache), ScamAnalyzer(feature_cache=None)
+    for i, text in enumerate(texts):
+        history = [{"role": "scammer", "content": t} for t in texts[max(i - 2, 0):i + 1]]
+        assert memo.analyze_behavior(history) == plain.analyze_behavior(history), history
+        assert memo.analyze_behavior(history[-1:]) == plain.analyze_behavior(history[-1:])
+    print(f"{len(texts)} PII-laden messages score the same with and without the memo | {cache.metrics()}")
+    assert cache.hits > 0
+
+def test_normalized_memo_in_analyzer():
+    print("=== Testing Normalized Feature Memo ===\n")
+    assert normalize_text("  Send   the OTP\tto  John.Doe@Example.com ") == "send the otp to [redacted: email]"
+
+    cache = FeatureCache(max_entries=100, normalize=True)
+    analyzer = ScamAnalyzer(verify_incremental=True, feature_cache=cache)
+    extract, calls = counting_extract(analyzer)
+    analyzer.extract_features = extract
+
+    # With normalize on, the same script with different PII, case and spacing is featurized once
+    variants = ["URGENT: pay the fee to 555-123-4567 today", "urgent:  pay the FEE to (555) 987-6543 today"]
+    results = [analyzer.analyze_behavior([{"role": "scammer", "content": text}]) for text in variants]
+    print(f"Results: {results} | {cache.metrics()}")
+    assert results[0] == results[1] and len(calls) == 1
+    assert (cache.hits, cache.misses) == (1, 1)
+
+    # Incremental and full paths featurize through the same memo and still agree
+    history = [{"role": "scammer", "content": variants[0]}, {"role": "agent", "content": "who is this?"},
+               {"role": "scammer", "content": "Send   BTC to 1BoatSLRHtKNngkdXEeobR76b53LETtpyT now"}]
+    state = analyzer.new_state()
+    assert analyzer.analyze_incremental(state, history) == analyzer.analyze_behavior(history)
+
+    # Without PII the normalized memo changes nothing
+    plain = [{"role": "scammer", "content": "Police will arrest you today! Send the btc now, hurry!"}]
+    assert ScamAnalyzer(feature_cache=None).analyze_behavior(plain) == analyzer.analyze_behavior(plain)
+
+def test_eviction_policies_and_persistence():
+    print("\n=== Testing Feature Memo Eviction + Persistence ===\n")
+    extract = lambda text: MessageFeatures(text.split(), 0.5, 0.1)
+    lookup = lambda cache, text: cache.features(text, extract, "regex")
+
+    lru, lfu = FeatureCache(3, "lru"), FeatureCache(3, "lfu")
+    for cache in (lru, lfu):
+        for text in ["a", "a", "a", "b", "c", "b"]:
+            lookup(cache, text)
+        lookup(cache, "d")  # evicts: lru -> "a" (least recent), lfu -> "c" (used once, least recent)
+    assert lookup(lru, "b") and lru.misses == 4 and lookup(lru, "a") and lru.misses == 5
+    assert lfu.misses == 4 and lookup(lfu, "a") and lfu.misses == 4 and lookup(lfu, "c") and lfu.misses == 5
+    print(f"LRU {lru.metrics()} | LFU {lfu.metrics()}")
+    assert lru.evictions == 2 and lfu.evictions == 2
+
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "features.json")
+        assert lfu.save(path) == 3
+        restored = FeatureCache(2, "lfu", path)
+        assert restored.load() == 2
+        # The most used entries survive a smaller cap, and come back with identical features
+        assert lookup(restored, "a") == lookup(lfu, "a") and restored.hits == 1
+        assert FeatureCache(10, "lfu", os.path.join(tmp, "missing.json")).load() == 0
+
+if __name__ == "__main__":
+    test_memo_is_transparent()
+    test_normalized_memo_in_analyzer()
+    test_eviction_policies_and_persistence()
@@ -0,0 +1,86 @@
+import json
+import asyncio
+from push_hub import BroadcastHub, CASE_CREATED, STATS_DELTA, report_delta, sse_stream
+
+class FakeRequest:
+    def __init__(self):
+        self.disconnected = False
+
+    async def is_disconnected(self):
+        return self.disconnected
+
+def parse_sse(chunk):
+    fields = dict(line.split(": ", 1) for line in chunk.strip().splitlines() if not line.startswith(":"))
+    return fields.get("id"), fields.get("event"), json.loads(fields["data"]) if "data" in fields else None
+
+def test_fanout_coalescing_and_overflow():
+    print("=== Testing Push Hub Fan-out + Slow Consumers ===\n")
+
+    async def scenario():
+        hub = BroadcastHub(max_pending=4, history=100)
+        fast, _, _ = hub.subscribe()
+        slow, _, _ = hub.subscribe()
+
+        hub.publish(CASE_CREATED, {"id": "c1"})
+        hub.publish(STATS_DELTA, report_delta(["crypto"], 1))
+        dropped, events = await fast.next_batch(1)
+        assert dropped == 0 and [e["event"] for e in events] == [CASE_CREATED, STATS_DELTA]
+
+        # The slow client never reads: its stats deltas merge into one, trailing the newest case
+        for i in range(2, 4):
+            hub.publish(CASE_CREATED, {"id": f"c{i}"})
+            hub.publish(STATS_DELTA, report_delta(["crypto", "job"], 1))
+        dropped, events = await slow.next_batch(1)
+        assert dropped == 0
+        assert [e["event"] for e in events] == [CASE_CREATED, CASE_CREATED, CASE_CREATED, STATS_DELTA]
+        assert events[-1]["data"] == {"reports_filed": 5, "scams_detected": 5, "types": {"CRYPTO": 3, "JOB": 2}, "cases_created": 3}
+        assert events[-1]["id"] == hub.metrics()["last_id"]
+        # ...and the published history is untouched by the merge
+        assert hub._history[1]["data"]["reports_filed"] == 1
+
+        # Past max_pending the oldest events are dropped and counted
+        for i in range(10):
+            hub.publish(CASE_CREATED, {"id": f"burst-{i}"})
+        dropped, events = await slow.next_batch(1)
+        print(f"Slow client dropped {dropped}, kept {[e['data']['id'] for e in events]}")
+        assert dropped == 6 and [e["data"]["id"] for e in events] == [f"burst-{i}" for i in range(6, 10)]
+        assert await slow.next_batch(0.01) == (0, [])
+
+    asyncio.run(scenario())
+
+def test_resume_from_cursor():
+    print("\n=== Testing Push Feed Resume ===\n")
+
+    async def scenario():
+        hub = BroadcastHub(history=5)
+        for i in range(3):
+            hub.publish(CASE_CREATED, {"id": f"c{i}"})
+        first_id = f"{hub.epoch}-1"
+
+        # Reconnecting with the last seen id replays exactly what was missed, then goes live
+        request = FakeRequest()
+        stream = sse_stream(hub, request, first_id, keepalive=0.05)
+        replayed = [parse_sse(await stream.__anext__()) for _ in range(2)]
+        assert [data["id"] for _, _, data in replayed] == ["c1", "c2"]
+        hub.publish(CASE_CREATED, {"id": "c3"})
+        assert parse_sse(await stream.__anext__())[2] == {"id": "c3"}
+        assert (await stream.__anext__()).startswith(":")  # keepalive
+        request.disconnected = True
+        await stream.aclose()
+        assert hub.metrics()["subscribers"] == 0
+
+        # Ids that fell out of the history, or come from another process, get a resync instead
+        for i in range(4, 10):
+            hub.publish(CASE_CREATED, {"id": f"c{i}"})
+        for stale in (first_id, "0-1", "garbage"):
+            stream = sse_stream(hub, FakeRequest(), stale, keepalive=0.05)
+            event_id, event, data = parse_sse(await stream.__anext__())
+            assert event == "resync" and event_id == hub.metrics()["last_id"], stale
+            await stream.aclose()
+        print(f"Resume ok, last id {hub.metrics()['last_id']}")
+
+    asyncio.run(scenario())
+
+if __name__ == "__main__":
+    test_fanout_coalescing_and_overflow()
+    test_resume_from_cursor()
@@ -0,0 +1,117 @@
+import json
+import time
+import asyncio
+from starlette.requests import Request
+from response_cache import ResponseCache, LocalGeneration
+
+def make_request(path, query="", if_none_match=None):
+    headers = [(b"if-none-match", if_none_match.encode())] if if_none_match else []
+    return Request({"type": "http", "method": "GET", "path": path, "query_string": query.encode(), "headers": headers})
+
+def counting_build(payload):
+    calls = []
+    async def build():
+        calls.append(1)
+        return payload, {"X-Next-Cursor": "abc"}
+    return build, calls
+
+def test_cache_hits_etags_and_invalidation():
+    print("=== Testing Response Cache (TTL + generation + ETag) ===\n")
+    cache = ResponseCache()
+    build, calls = counting_build({"reports_filed": 3})
+
+    async def scenario():
+        first = await cache.respond(make_request("/api/stats"), build, ttl=60)
+        assert first.status_code == 200 and json.loads(first.body) == {"reports_filed": 3}
+        assert first.headers["x-next-cursor"] == "abc"
+        etag = first.headers["etag"]
+
+        # Same query (parameter order aside) is a hit; a matching If-None-Match is a bodiless 304
+        await cache.respond(make_request("/api/cases", "limit=5&fields=id"), build, ttl=60)
+        await cache.respond(make_request("/api/cases", "fields=id&limit=5"), build, ttl=60)
+        polled = await cache.respond(make_request("/api/stats", if_none_match=f'W/{etag}, "other"'), build, ttl=60)
+        assert polled.status_code == 304 and polled.body == b"" and polled.headers["etag"] == etag
+        assert len(calls) == 2
+
+        # A write bumps the generation: rebuilt, and an unchanged body keeps its ETag
+        cache.invalidate()
+        again = await cache.respond(make_request("/api/stats", if_none_match=etag), build, ttl=60)
+        assert again.status_code == 304 and len(calls) == 3
+
+        # Expired entries are rebuilt
+        await cache.respond(make_request("/api/stats", "expiring=1"), build, ttl=0)
+        await cache.respond(make_request("/api/stats", "expiring=1"), build, ttl=0)
+        assert len(calls) == 5
+
+    asyncio.run(scenario())
+    metrics = cache.metrics()
+    print(metrics)
+    assert (metrics["hits"], metrics["misses"], metrics["not_modified"], metrics["invalidations"]) == (2, 5, 2, 1)
+
+def test_shared_generation_and_bounds():
+    print("\n=== Testing Shared Invalidation + LRU Bound ===\n")
+    # Two workers' caches over one generation counter (what the Redis backend provides across processes)
+    shared = LocalGeneration()
+    worker_a, worker_b = ResponseCache(shared), ResponseCache(shared)
+    build, calls = counting_build([{"id": "c1"}])
+
+    async def scenario():
+        await worker_b.respond(make_request("/api/cases"), build, ttl=60)
+        await worker_b.respond(make_request("/api/cases"), build, ttl=60)
+        worker_a.invalidate()
+        await worker_b.respond(make_request("/api/cases"), build, ttl=60)
+        assert len(calls) == 2
+
+        bounded = ResponseCache(max_entries=3)
+        for i in range(10):
+            await bounded.respond(make_request("/api/cases", f"cursor={i}"), build, ttl=60)
+        assert bounded.metrics()["entries"] == 3
+
+        disabled = ResponseCache(enabled=False)
+        response = await disabled.respond(make_request("/api/stats"), build, ttl=60)
+        assert response.status_code == 200 and "etag" not in response.headers
+
+    asyncio.run(scenario())
+    print(f"Builds: {len(calls)}")
+
+class SlowGeneration(LocalGeneration):
+    # A network-backed counter (like RedisGeneration): every call takes a round trip
+    blocking = True
+
+    def current(self):
+        time.sleep(0.05)
+        return super().current()
+
+    def bump(self):
+        time.sleep(0.05)
+        return super().bump()
+
+def test_blocking_generation_keeps_event_loop_free():
+    print("\n=== Testing Blocking Generation Backend Off the Event Loop ===\n")
+    cache = ResponseCache(SlowGeneration())
+    build, calls = counting_build({"reports_filed": 1})
+
+    async def scenario():
+        ticks = 0
+        async def ticker():
+            nonlocal ticks
+            while True:
+                await asyncio.sleep(0.005)
+                ticks += 1
+        task = asyncio.create_task(ticker())
+        await asyncio.sleep(0)
+        for _ in range(3):
+            await cache.respond(make_request("/api/stats"), build, ttl=60)
+        await cache.invalidate_async()
+        await cache.respond(make_request("/api/stats"), build, ttl=60)
+        task.cancel()
+        return ticks
+
+    ticks = asyncio.run(scenario())
+    print(f"Event loop ticks during 5 x 50 ms generation calls: {ticks}; builds: {len(calls)}")
+    assert len(calls) == 2 and ticks >= 20
+
+if __name__ == "__main__":
+    test_cache_hits_etags_and_invalidation()
+    test_shared_generation_and_bounds()
+    test_blocking_generation_keeps_event_loop_free()
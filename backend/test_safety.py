@@ -0,0 +1,80 @@
+import logging
+import random
+from safety import SafetyGuard, RedactionEngine
+from keyword_matcher import KeywordAutomaton, KeywordMatcher, THREAT_KEYWORDS
+from agent import HoneypotAgent
+
+logging.basicConfig(level=logging.INFO, format='%(message)s')
+
+def test_single_pass_redaction():
+    print("=== Testing Single-Pass PII Redaction ===\n")
+    text = "Card 4111 1111 1111 1111, mail john.doe@example.com, call (555) 123-4567, ssn 123-45-6789"
+    redacted, spans = SafetyGuard.redact_pii_spans(text)
+    print(f"Redacted: {redacted}")
+    assert redacted == ("Card [REDACTED: CREDIT_CARD], mail [REDACTED: EMAIL], "
+                        "call [REDACTED: PHONE], ssn [REDACTED: SSN]")
+    assert [span.pii_type for span in spans] == ["CREDIT_CARD", "EMAIL", "PHONE", "SSN"]
+    assert [text[span.start:span.end] for span in spans] == [
+        "4111 1111 1111 1111", "john.doe@example.com", "(555) 123-4567", "123-45-6789"
+    ]
+    assert SafetyGuard.redact_pii(text) == redacted
+
+    # Wallet addresses are replaced whole - the prefix group must not leak into other text
+    wallet = "send 1 coin to 1BoatSLRHtKNngkdXEeobR76b53LETtpyT"
+    print(f"Redacted: {SafetyGuard.redact_pii(wallet)}")
+    assert SafetyGuard.redact_pii(wallet) == "send 1 coin to [REDACTED: CRYPTO_ADDRESS_BTC]"
+    assert SafetyGuard.redact_pii_spans("nothing sensitive here") == ("nothing sensitive here", [])
+
+def test_overlapping_patterns_leftmost_first():
+    print("=== Testing Redaction Pattern Precedence ===\n")
+    engine = RedactionEngine({"LONG": r"\d{6}", "SHORT": r"\d{3}"})
+    redacted, spans = engine.redact("123456 789")
+    print(f"Redacted: {redacted}")
+    assert redacted == "[REDACTED: LONG] [REDACTED: SHORT]"
+    assert [(span.start, span.end) for span in spans] == [(0, 6), (7, 10)]
+
+def test_keyword_automaton_reports_every_hit():
+    print("=== Testing Aho-Corasick Keyword Automaton ===\n")
+    automaton = KeywordAutomaton({"a": ["he", "she", "hers"], "b": ["his", "HE"]})
+    matches = automaton.find_all("Ushers his")
+    print(f"Matches: {matches}")
+    assert [(m.category, m.keyword, m.start, m.end) for m in matches] == [
+        ("a", "she", 1, 4), ("a", "he", 2, 4), ("b", "he", 2, 4), ("a", "hers", 2, 6), ("b", "his", 7, 10)
+    ]
+
+    # Same hits as a naive substring scan, on a vocabulary of thousands of phrases
+    rnd = random.Random(7)
+    keywords = ["".join(rnd.choice("abc ") for _ in range(rnd.randint(1, 6))) for _ in range(3000)]
+    automaton = KeywordAutomaton({"threat_intel": keywords})
+    for _ in range(50):
+        text = "".join(rnd.choice("abcd ") for _ in range(200))
+        expected = sorted((i, i + len(kw)) for kw in set(keywords) for i in range(len(text)) if text.startswith(kw, i))
+        assert sorted((m.start, m.end) for m in automaton.find_all(text)) == expected
+
+def test_keyword_reload_and_agent_classification():
+    print("=== Testing Shared Keyword Matcher ===\n")
+    agent = HoneypotAgent()
+    assert agent._classify("Your account is COMPROMISED, act now") == "scam"
+    assert agent._classify("see http://bit.ly/x") == "likely_scam"
+    assert agent._classify("hello grandma") == "benign"
+
+    violations = SafetyGuard.policy_violations("Send money to my bank account, what's the OTP?")
+    print(f"Violations: {violations}")
+    assert [m.keyword for m in violations] == ["send money", "bank account", "otp"]
+    assert SafetyGuard.check_policy("Is there an official page or reference link?")
+
+    matcher = KeywordMatcher({name: list(terms) for name, terms in THREAT_KEYWORDS.keywords.items()})
+    matcher.reload_keywords({**matcher.keywords, "scam": ["gift card"]})
+    assert [m.keyword for m in matcher.find_all("buy a Gift Card now", category="scam")] == ["gift card"]
+    try:
+        matcher.reload_keywords({"scam": ["x"]})
+        assert False, "Incomplete keyword set should be rejected"
+    except ValueError as e:
+        print(f"Rejected incomplete keyword set: {e}")
+    assert matcher.keywords["scam"] == ("gift card",)
+
+if __name__ == "__main__":
+    test_single_pass_redaction()
+    test_overlapping_patterns_leftmost_first()
+    test_keyword_automaton_reports_every_hit()
+    test_keyword_reload_and_agent_classification()
@@ -0,0 +1,84 @@
+import os
+import random
+import tempfile
+from similarity_index import MinHashLSH, transcript_text
+from mock_api import MockScammerAPI
+
+def script_copies(rng, n):
+    # Each case replays a known script, sometimes with a phone number, a shout or an extra line
+    scenarios = [s for s in MockScammerAPI.SCENARIOS if s["type"] == "scam"]
+    cases = {}
+    for i in range(n):
+        scenario = rng.choice(scenarios)
+        messages = list(scenario["messages"])
+        if rng.random() < 0.5:
+            messages[0] = messages[0].upper()
+        if rng.random() < 0.5:
+            messages.append(f"Call me on 555-{rng.randint(100, 999)}-{rng.randint(1000, 9999)}")
+        cases[f"case-{i}"] = (scenario["id"], [{"sender": "scammer", "content": m} for m in messages])
+    return cases
+
+def test_near_duplicates_and_persistence():
+    print("=== Testing MinHash/LSH Similar-Case Index ===\n")
+    rng = random.Random(24)
+    cases = script_copies(rng, 300)
+    index = MinHashLSH()
+    for case_id, (_, transcript) in cases.items():
+        assert index.add(case_id, transcript_text(transcript))
+    assert not index.add("case-0", "again") and not index.add("empty", "  ")
+    assert transcript_text([{"role": "agent", "content": "hi"}, {"role": "scammer", "content": "pay"}]) == "pay"
+
+    # Copies of the same script find each other; other scripts never show up
+    for case_id in ("case-0", "case-1", "case-2"):
+        script = cases[case_id][0]
+        matches = index.similar(case_id, limit=1000, threshold=0.5)
+        found = {match_id for match_id, _ in matches}
+        print(f"{case_id} ({script}): {len(matches)} matches, best {matches[0][1]}")
+        assert case_id not in found
+        assert all(cases[match_id][0] == script for match_id in found)
+        assert len(found) >= 0.9 * sum(1 for other, (s, _) in cases.items() if s == script and other != case_id)
+    assert index.query_text("Is the dinner reservation still on for tonight at eight?") == []
+
+    # Saved (half compacted, half pending) and reloaded, the index answers identically
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "similarity.npz")
+        index.save(path)
+        index.add("late", transcript_text(cases["case-5"][1]))
+        index.save(path)
+        restored = MinHashLSH.load(path)
+        assert len(restored) == len(index) == 301
+        # Wordless cases have no signature but stay indexed across restarts, so catch-up skips them
+        assert "empty" in restored and restored.similar("empty") == [] and restored.metrics()["empty"] == 1
+        for case_id in ("case-5", "late", "case-7"):
+            assert restored.similar(case_id, limit=1000) == index.similar(case_id, limit=1000)
+        restored.add("after-load", transcript_text(cases["case-7"][1]))
+        assert ("after-load", 1.0) in restored.similar("case-7", limit=1000)
+        # An index built with other parameters is not reused
+        assert len(MinHashLSH.load(path, num_perm=64, bands=16)) == 0
+
+def test_worker_saves_merge():
+    print("\n=== Testing Concurrent Worker Saves Merge ===\n")
+    rng = random.Random(7)
+    cases = list(script_copies(rng, 60).items())
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "similarity.npz")
+        # Two workers start from the same saved file, each indexes the reports it handled, both save on shutdown
+        MinHashLSH().save(path)
+        workers = [MinHashLSH.load(path), MinHashLSH.load(path)]
+        for i, (case_id, (_, transcript)) in enumerate(cases):
+            workers[i % 2].add(case_id, transcript_text(transcript))
+        workers[0].add("blank", "")
+        workers[0].advance_watermark(100.0)
+        workers[1].advance_watermark(50.0)
+        for worker in workers:
+            worker.save(path)
+        restored = MinHashLSH.load(path)
+        print(f"Saved by two workers: {len(restored)} signatures, watermark {restored.watermark}")
+        assert len(restored) == len(cases) and all(case_id in restored for case_id, _ in cases)
+        assert "blank" in restored and restored.watermark == 100.0
+        case_id = cases[0][0]
+        assert restored.similar(case_id, limit=100) == workers[1].similar(case_id, limit=100)
+
+if __name__ == "__main__":
+    test_near_duplicates_and_persistence()
+    test_worker_saves_merge()
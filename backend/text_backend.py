@@ -0,0 +1,194 @@
+import os
+import re
+import json
+import logging
+from collections import namedtuple
+
+Sentiment = namedtuple("Sentiment", ["polarity", "subjectivity", "assessments"])
+
+class TextBackend:
+    """
+    Pluggable tokenizer + sentiment backend used by the NLP core.
+    words() returns the word tokens of a text with punctuation dropped;
+    sentiment() returns a Sentiment whose polarity/subjectivity are the plain average
+    of its (words, polarity, subjectivity) assessments.
+    """
+    name = None
+
+    def words(self, text):
+        raise NotImplementedError
+
+    def sentiment(self, text):
+        raise NotImplementedError
+
+    def sentiment_scan(self):
+        """
+        A scan that texts are fed to one at a time; its polarity() is the polarity sentiment()
+        gives the texts fed so far joined with " ". This default rescores the joined text each time.
+        """
+        return JoinedSentimentScan(self)
+
+class JoinedSentimentScan:
+    def __init__(self, backend):
+        self.backend = backend
+        self.texts = []
+
+    def feed(self, text):
+        self.texts.append(text)
+        return self
+
+    def polarity(self):
+        return self.backend.sentiment(" ".join(self.texts)).polarity
+
+class RegexTextBackend(TextBackend):
+    """
+    Default backend: a regex tokenizer and a lexicon-driven sentiment scorer.
+    The lexicon (sentiment_lexicon.json) is derived from the PDDL-licensed pattern
+    en-sentiment.xml that TextBlob ships, so scores track TextBlob closely without
+    pulling nltk/pattern into the process.
+    """
+    name = "regex"
+
+    # "don't" -> "do", "n't" and "it's" -> "it", "'s", mirroring the Treebank splits TextBlob produces.
+    # URLs, domains and "500/day" style compounds stay single tokens.
+    WORD_PATTERN = re.compile(r"\w+(?=n't)|n't|\w+(?:[./@-]+\w+)*|(?<=\w)'\w+")
+    SENTIMENT_PATTERN = re.compile(r"\w+(?=n't)|n't|\w+(?:[./@-]+\w+)*|(?<=\w)'\w+|!")
+    NEGATIONS = frozenset(["no", "not", "n't", "never"])
+
+    def __init__(self, lexicon_path=None):
+        path = lexicon_path or os.path.join(os.path.dirname(os.path.abspath(__file__)), "sentiment_lexicon.json")
+        with open(path, "r", encoding="utf-8") as f:
+            # word -> [polarity, subjectivity, intensity, is_modifier]
+            self.lexicon = json.load(f)
+        logging.info(f"[NLP Core] Regex text backend loaded {len(self.lexicon)} sentiment terms")
+
+    def words(self, text):
+        return self.WORD_PATTERN.findall(text)
+
+    def sentiment(self, text):
+        return RegexSentimentScan(self, keep=True).feed(text).sentiment()
+
+    def sentiment_scan(self):
+        return RegexSentimentScan(self)
+
+class RegexSentimentScan:
+    """
+    RegexTextBackend's sentiment scorer as a resumable left-to-right scan. Texts fed one at a
+    time score exactly as sentiment() scores them joined with " ": a negation, modifier or "!"
+    at the end of one text still applies to the next. Only the last assessment (the one later
+    tokens can still change) is held; earlier ones are folded into running sums.
+    """
+    __slots__ = ("backend", "modifier", "negation", "last", "scored", "polarity_sum", "subjectivity_sum", "count")
+
+    def __init__(self, backend, keep=False):
+        self.backend = backend
+        self.modifier = None  # Preceding known adverb ("very good")
+        self.negation = None  # Preceding negation ("not good")
+        self.last = None      # [words, polarity, subjectivity, intensity, negated]
+        self.scored = [] if keep else None
+        self.polarity_sum = self.subjectivity_sum = 0
+        self.count = 0
+
+    @staticmethod
+    def _scored(assessment):
+        # "not good" = slightly bad, "not bad" = slightly good
+        words, p, s, i, n = assessment
+        return words, p * -0.5 if n < 0 else p, s
+
+    def _assess(self, assessment):
+        if self.last is not None:
+            words, p, s = self._scored(self.last)
+            self.polarity_sum += p
+            self.subjectivity_sum += s
+            self.count += 1
+            if self.scored is not None:
+                self.scored.append((words, p, s))
+        self.last = assessment
+
+    def feed(self, text):
+        lexicon, negations = self.backend.lexicon, self.backend.NEGATIONS
+        for w in self.backend.SENTIMENT_PATTERN.findall(text.lower()):
+            entry = lexicon.get(w)
+            if entry is not None:
+                p, s, i, is_modifier = entry
+                if self.modifier is None:
+                    self._assess([[w], p, s, i, 1])
+                else:
+                    last = self.last
+                    last[0].append(w)
+                    last[1] = max(-1.0, min(p * last[3], 1.0))
+                    last[2] = max(-1.0, min(s * last[3], 1.0))
+                    last[3] = i
+                if self.negation is not None:
+                    last = self.last
+                    last[0].insert(0, self.negation)
+                    last[3] = 1.0 / last[3]
+                    last[4] = -1
+                self.modifier = w if is_modifier else None
+                self.negation = w if w in negations else None
+                continue
+
+            if w in negations:
+                self.negation = w
+            elif self.negation and len(w.strip("'")) > 1:
+                # Retain negation across small words ("not a good")
+                self.negation = None
+            if self.negation is not None and self.modifier is not None:
+                # Negation preceded by a modifier ("really not good")
+                self.last[0].append(self.negation)
+                self.last[4] = -1
+                self.negation = None
+            elif self.modifier and len(w) > 2:
+                self.modifier = None
+            # Exclamation marks boost the previous assessment
+            if w == "!" and self.last is not None:
+                self.last[0].append("!")
+                self.last[1] = max(-1.0, min(self.last[1] * 1.25, 1.0))
+        return self
+
+    def _totals(self):
+        # Summed in assessment order, so a scan fed piecewise and one fed the joined text agree bit for bit
+        polarity, subjectivity, n = self.polarity_sum, self.subjectivity_sum, self.count
+        if self.last is not None:
+            _, p, s = self._scored(self.last)
+            polarity, subjectivity, n = polarity + p, subjectivity + s, n + 1
+        return polarity, subjectivity, n
+
+    def polarity(self):
+        polarity, _, n = self._totals()
+        return polarity / float(n or 1)
+
+    def sentiment(self):
+        polarity, subjectivity, n = self._totals()
+        scored = self.scored + ([self._scored(self.last)] if self.last is not None else [])
+        return Sentiment(polarity / float(n or 1), subjectivity / float(n or 1), scored)
+
+class TextBlobBackend(TextBackend):
+    """
+    Compatibility backend reproducing the original TextBlob scoring exactly.
+    TextBlob (and its nltk corpora) are imported lazily, only when this backend is selected.
+    """
+    name = "textblob"
+
+    def __init__(self):
+        from textblob import TextBlob
+        from textblob.en import sentiment as pattern_sentiment
+        self._blob = TextBlob
+        self._sentiment = pattern_sentiment
+
+    def words(self, text):
+        return [str(w) for w in self._blob(text).words]
+
+    def sentiment(self, text):
+        score = self._sentiment(text)
+        return Sentiment(score[0], score[1], [(a[0], a[1], a[2]) for a in score.assessments])
+
+TEXT_BACKENDS = {
+    RegexTextBackend.name: RegexTextBackend,
+    TextBlobBackend.name: TextBlobBackend
+}
+
+def get_text_backend(name):
+    if name not in TEXT_BACKENDS:
+        raise ValueError(f"Unknown text backend '{name}'. Available: {sorted(TEXT_BACKENDS)}")
+    return TEXT_BACKENDS[name]()
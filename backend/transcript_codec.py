@@ -0,0 +1,158 @@
+import json
+import time
+import zlib
+import struct
+import threading
+from collections import Counter
+from config import TRANSCRIPT_COMPRESSION, TRANSCRIPT_COMPRESSION_LEVEL, TRANSCRIPT_DICTIONARY, TRANSCRIPT_DICT_SIZE
+
+# Stored format: one tag byte, then (dictionary formats) a 4-byte dictionary id, then the payload.
+# Anything else is a legacy plain-JSON value and is decoded as such.
+ZLIB = b"Z"
+ZLIB_DICT = b"D"
+ZSTD = b"T"
+ZSTD_DICT = b"S"
+DICT_ID = struct.Struct(">I")
+ZLIB_MAX_DICT = 32768 # deflate can only reach back one 32 KB window
+ALGORITHMS = ("zlib", "zstd")
+
+def _json_bytes(value):
+    return json.dumps(value, separators=(",", ":"), ensure_ascii=False).encode("utf-8")
+
+def train_zlib_dictionary(samples, size=ZLIB_MAX_DICT):
+    """
+    Builds a zlib preset dictionary from sample transcripts: the message fields that recur across
+    conversations (pasted scam scripts, fixed sender values), serialized exactly as the encoder
+    writes them. Most frequent fragments go last, where deflate finds them at the shortest distance.
+    """
+    counts = Counter()
+    for transcript in samples:
+        for message in transcript if isinstance(transcript, list) else ():
+            if isinstance(message, dict):
+                for key, value in message.items():
+                    if isinstance(value, str):
+                        counts[_json_bytes({key: value})[1:-1]] += 1
+    picked, total = [], 0
+    for fragment, count in counts.most_common():
+        if count < 2:
+            break
+        if total + len(fragment) <= min(size, ZLIB_MAX_DICT):
+            picked.append(fragment)
+            total += len(fragment)
+    return b",".join(reversed(picked))
+
+class TranscriptCodec:
+    """
+    Compresses JSON documents (case transcripts) with zlib or zstd, optionally against a
+    preset dictionary trained from existing cases. Every dictionary ever trained stays
+    loadable so rows written under an older one still decode; new rows use the newest.
+    Lookups are in-memory only: a row encoded with a dictionary this process hasn't loaded fails
+    to decode, so a dictionary loaded with a `delay` (trained while other processes are running)
+    is only used for new rows once they have had time to load it too.
+    zstandard is imported lazily, only when the zstd algorithm is selected.
+    """
+
+    def __init__(self, algorithm="zlib", level=6, use_dictionary=True, dictionary_size=ZLIB_MAX_DICT):
+        if algorithm not in ALGORITHMS:
+            raise ValueError(f"Unknown transcript compression '{algorithm}'. Available: {list(ALGORITHMS)}")
+        self.algorithm = algorithm
+        self.level = level
+        self.use_dictionary = use_dictionary
+        self.dictionary_size = dictionary_size
+        self.dictionaries = {} # id -> (algorithm, bytes)
+        self.active_id = None
+        self._activations = [] # (monotonic time, id) of loaded dictionaries not yet encoded with
+        self._activation_lock = threading.Lock()
+        self._zstd_dicts = {}
+        if algorithm == "zstd":
+            self._zstd()
+
+    @staticmethod
+    def _zstd():
+        import zstandard
+        return zstandard
+
+    @property
+    def needs_dictionary(self):
+        return self.use_dictionary and self.active_id is None and not self._activations
+
+    def load_dictionary(self, dict_id, algorithm, data, delay=0.0):
+        """
+        Makes a dictionary available for decoding now, and (if it is for this codec's algorithm
+        and newer than the active one) for encoding new rows after `delay` seconds.
+        """
+        if dict_id in self.dictionaries:
+            return
+        self.dictionaries[dict_id] = (algorithm, bytes(data))
+        if self.use_dictionary and algorithm == self.algorithm:
+            with self._activation_lock:
+                self._activations.append((time.monotonic() + delay, dict_id))
+            self._activate()
+
+    def _activate(self):
+        now = time.monotonic()
+        with self._activation_lock:
+            due = [dict_id for at, dict_id in self._activations if at <= now]
+            self._activations = [(at, dict_id) for at, dict_id in self._activations if at > now]
+            for dict_id in due:
+                if self.active_id is None or dict_id > self.active_id:
+                    self.active_id = dict_id
+
+    def train(self, samples):
+        """
+        Trains a dictionary for this codec's algorithm from sample transcripts.
+        """
+        if self.algorithm == "zstd":
+            zstandard = self._zstd()
+            return zstandard.train_dictionary(self.dictionary_size, [_json_bytes(s) for s in samples]).as_bytes()
+        return train_zlib_dictionary(samples, self.dictionary_size)
+
+    def encode(self, value):
+        raw = _json_bytes(value)
+        if self._activations:
+            self._activate()
+        key = self.active_id
+        if self.algorithm == "zstd":
+            # zstd (de)compressor objects are not thread-safe, so only the parsed dictionaries are shared
+            payload = self._zstd().ZstdCompressor(level=self.level, dict_data=self._zstd_dict(key)).compress(raw)
+            return ZSTD_DICT + DICT_ID.pack(key) + payload if key is not None else ZSTD + payload
+        if key is not None:
+            compressor = zlib.compressobj(self.level, zdict=self.dictionaries[key][1])
+            return ZLIB_DICT + DICT_ID.pack(key) + compressor.compress(raw) + compressor.flush()
+        return ZLIB + zlib.compress(raw, self.level)
+
+    def decode(self, value):
+        if value is None:
+            return None
+        if isinstance(value, str):
+            return json.loads(value)
+        value = bytes(value)
+        tag = value[:1]
+        if tag == ZLIB:
+            return json.loads(zlib.decompress(value[1:]))
+        if tag in (ZLIB_DICT, ZSTD_DICT):
+            (dict_id,), payload = DICT_ID.unpack_from(value, 1), value[1 + DICT_ID.size:]
+            self._require_dictionary(dict_id)
+            if tag == ZLIB_DICT:
+                decompressor = zlib.decompressobj(zdict=self.dictionaries[dict_id][1])
+                return json.loads(decompressor.decompress(payload) + decompressor.flush())
+            return json.loads(self._zstd_decompressor(dict_id).decompress(payload))
+        if tag == ZSTD:
+            return json.loads(self._zstd_decompressor(None).decompress(value[1:]))
+        return json.loads(value)
+
+    def _require_dictionary(self, dict_id):
+        if dict_id not in self.dictionaries:
+            raise ValueError(f"Unknown transcript compression dictionary {dict_id}")
+
+    def _zstd_dict(self, dict_id):
+        if dict_id is None:
+            return None
+        if dict_id not in self._zstd_dicts:
+            self._zstd_dicts[dict_id] = self._zstd().ZstdCompressionDict(self.dictionaries[dict_id][1])
+        return self._zstd_dicts[dict_id]
+
+    def _zstd_decompressor(self, dict_id):
+        return self._zstd().ZstdDecompressor(dict_data=self._zstd_dict(dict_id))
+
+TRANSCRIPT_CODEC = TranscriptCodec(TRANSCRIPT_COMPRESSION, TRANSCRIPT_COMPRESSION_LEVEL, TRANSCRIPT_DICTIONARY, TRANSCRIPT_DICT_SIZE)
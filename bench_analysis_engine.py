@@ -0,0 +1,55 @@
+"""
+Benchmark: analyze_behavior throughput on a thread pool vs the process-pool AnalysisEngine.
+Run from the project root: python bench_analysis_engine.py [jobs] [processes]
+"""
+import os
+import sys
+import time
+import logging
+from concurrent.futures import ThreadPoolExecutor
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), 'backend'))
+from analyzer import ScamAnalyzer
+from analysis_engine import AnalysisEngine
+from bench_text_backends import build_corpus
+
+logging.disable(logging.CRITICAL)
+
+def run_threads(analyzer, histories, workers):
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        results = list(pool.map(analyzer.analyze_behavior, histories))
+    return results, time.perf_counter() - start
+
+def run_engine(engine, histories):
+    start = time.perf_counter()
+    futures = [engine.submit("analyze", history) for history in histories]
+    timings = [future.result() for future in futures]
+    elapsed = time.perf_counter() - start
+    waits = sorted(queue_wait for _, queue_wait, _ in timings)
+    return [result for result, _, _ in timings], elapsed, waits
+
+def main():
+    jobs = int(sys.argv[1]) if len(sys.argv) > 1 else 20000
+    processes = int(sys.argv[2]) if len(sys.argv) > 2 else (os.cpu_count() or 4)
+    _, conversations = build_corpus(jobs)
+    analyzer = ScamAnalyzer()
+
+    expected, elapsed = run_threads(analyzer, conversations, processes)
+    print(f"Thread pool ({processes} threads): {jobs / elapsed:>10.0f} analyses/s")
+
+    for batch_size in (1, 8, 32, 128):
+        start = time.perf_counter()
+        engine = AnalysisEngine(analyzer, workers=processes, max_pending=jobs, batch_size=batch_size)
+        ready = time.perf_counter() - start
+        try:
+            results, elapsed, waits = run_engine(engine, conversations)
+        finally:
+            engine.shutdown()
+        assert results == expected, "engine results diverged from the in-process analyzer"
+        print(f"Engine ({processes} procs, batch {batch_size:>3}): {jobs / elapsed:>10.0f} analyses/s | "
+              f"warm-up {ready:.2f}s | p50 wait {waits[len(waits) // 2] * 1000:.1f} ms | "
+              f"p95 wait {waits[int(len(waits) * 0.95)] * 1000:.1f} ms")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,184 @@
+"""
+Benchmark: the async endpoints (AsyncSession on aiosqlite) vs the previous threadpool model
+(sync `def` handlers on a Session, run by Starlette's threadpool) under rising client concurrency.
+Each model gets its own uvicorn process (one worker) on a throwaway database seeded through
+/api/report/bulk; clients then mix GET /api/stats, GET /api/cases pages, POST /api/report and
+POST /api/login for a fixed time per concurrency level. The threadpool model is the same app with
+those four routes swapped for sync handlers built from the same helpers.
+Run from the project root: python bench_async_db.py [seconds] [concurrency,...] [cases]
+"""
+import os
+import sys
+import time
+import uuid
+import random
+import socket
+import asyncio
+import logging
+import tempfile
+import subprocess
+
+import httpx
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), 'backend'))
+
+logging.disable(logging.CRITICAL)
+
+BACKEND_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'backend')
+HEADERS = {"X-Rakshak-Token": "rakshak-core-v1"}
+MIX = (("stats", 0.35), ("cases", 0.35), ("report", 0.2), ("login", 0.1))
+BENCH_USER = {"username": "bench-operator", "password": "bench-password"}
+ROUTES = {("/api/stats", "GET"), ("/api/cases", "GET"), ("/api/report", "POST"), ("/api/login", "POST")}
+
+def threadpool_routes(app):
+    # The handlers as they were before the async conversion: sync defs on a request Session
+    from typing import Optional
+    from fastapi import Depends, HTTPException, Request
+    from fastapi.responses import JSONResponse
+    from sqlalchemy.orm import Session
+    import server
+    import security
+    from database import User
+    from case_stats import rollup_window_stats, report_counts
+    from case_listing import parse_fields, case_select, fetch_page
+    from config import CASES_PAGE_SIZE, CASES_MAX_PAGE_SIZE
+
+    def get_stats(request: Request, db: Session = Depends(server.get_db)):
+        return {**report_counts(db), **rollup_window_stats(db)}
+
+    def get_cases(request: Request, limit: Optional[int] = None, fields: Optional[str] = None, db: Session = Depends(server.get_db)):
+        selected = parse_fields(fields)
+        page_size = min(limit or CASES_PAGE_SIZE, CASES_MAX_PAGE_SIZE)
+        cases, next_cursor = fetch_page(db, case_select(selected), selected, page_size)
+        return JSONResponse(cases, headers={"X-Next-Cursor": next_cursor} if next_cursor else None)
+
+    def submit_report(report: server.ReportRequest, request: Request, db: Session = Depends(server.get_db)):
+        server.store_report(db, report)
+        db.commit()
+        return {"status": "received"}
+
+    def login(creds: server.LoginRequest, request: Request, db: Session = Depends(server.get_db)):
+        user = db.query(User).filter(User.username == creds.username).first()
+        if not user or not security.verify_password(creds.password, user.hashed_password):
+            raise HTTPException(status_code=401, detail="Invalid credentials")
+        return {"status": "success", "token": security.create_access_token(data={"sub": user.username, "role": user.role})}
+
+    app.router.routes = [route for route in app.router.routes
+                         if not any((getattr(route, "path", None), method) in ROUTES for method in getattr(route, "methods", ()) or ())]
+    app.add_api_route("/api/stats", get_stats, methods=["GET"])
+    app.add_api_route("/api/cases", get_cases, methods=["GET"])
+    app.add_api_route("/api/report", submit_report, methods=["POST"])
+    app.add_api_route("/api/login", login, methods=["POST"])
+
+def serve(model, port):
+    # Child process: runs one model under uvicorn (SQLITE_DB_PATH / RATE_LIMIT_ENABLED come from the env)
+    sys.path.insert(0, BACKEND_DIR)
+    os.chdir(BACKEND_DIR)
+    import uvicorn
+    import server
+    import security
+    from database import SessionLocal, User
+    with SessionLocal() as db:
+        if not db.query(User).filter(User.username == BENCH_USER["username"]).first():
+            db.add(User(username=BENCH_USER["username"], hashed_password=security.get_password_hash(BENCH_USER["password"]), role="operator"))
+            db.commit()
+    if model == "threadpool":
+        threadpool_routes(server.app)
+    uvicorn.run(server.app, host="127.0.0.1", port=port, log_level="warning")
+
+def free_port():
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+def start_server(model, db_path):
+    port = free_port()
+    env = dict(os.environ, SQLITE_DB_PATH=db_path, RATE_LIMIT_ENABLED="0")
+    env.pop("DATABASE_URL", None)
+    proc = subprocess.Popen([sys.executable, os.path.abspath(__file__), "--serve", model, str(port)],
+                            env=env, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+    base = f"http://127.0.0.1:{port}"
+    deadline = time.time() + 120
+    while time.time() < deadline:
+        try:
+            if httpx.get(f"{base}/api/stats", headers=HEADERS, timeout=2).status_code == 200:
+                return proc, base
+        except httpx.HTTPError:
+            pass
+        time.sleep(0.5)
+    proc.kill()
+    raise RuntimeError("uvicorn did not come up")
+
+async def run_clients(base, seconds, concurrency, report_pool):
+    latencies = {name: [] for name, _ in MIX}
+    errors = {name: 0 for name, _ in MIX}
+    limits = httpx.Limits(max_connections=concurrency, max_keepalive_connections=concurrency)
+    async with httpx.AsyncClient(base_url=base, headers=HEADERS, limits=limits, timeout=60) as client:
+        stop_at = time.perf_counter() + seconds
+
+        async def worker(seed):
+            rnd = random.Random(seed)
+            while time.perf_counter() < stop_at:
+                op = rnd.choices([name for name, _ in MIX], weights=[w for _, w in MIX])[0]
+                start = time.perf_counter()
+                try:
+                    if op == "stats":
+                        response = await client.get("/api/stats")
+                    elif op == "cases":
+                        response = await client.get("/api/cases", params={"limit": 50, "fields": "id,scammerName,threatLevel,timestamp"})
+                    elif op == "report":
+                        response = await client.post("/api/report", json=dict(rnd.choice(report_pool), conversationId=str(uuid.uuid4())))
+                    else:
+                        response = await client.post("/api/login", json=BENCH_USER)
+                    ok = response.is_success
+                except httpx.HTTPError:
+                    ok = False
+                if ok:
+                    latencies[op].append(time.perf_counter() - start)
+                else:
+                    errors[op] += 1
+
+        await asyncio.gather(*(worker(i) for i in range(concurrency)))
+    return latencies, errors
+
+def percentile(samples, q):
+    return sorted(samples)[int(len(samples) * q)] * 1000 if samples else float("nan")
+
+def main():
+    from bench_bulk_report import build_reports
+    seconds = int(sys.argv[1]) if len(sys.argv) > 1 else 15
+    levels = [int(c) for c in sys.argv[2].split(",")] if len(sys.argv) > 2 else [8, 64, 256]
+    cases = int(sys.argv[3]) if len(sys.argv) > 3 else 10000
+    report_pool = build_reports(200, "load")
+    seed = build_reports(cases, "seed")
+    print(f"one uvicorn worker per model, {seconds}s per level, {cases} seeded cases (CPUs: {os.cpu_count()})")
+
+    results = {}
+    for model in ("threadpool", "async"):
+        with tempfile.TemporaryDirectory() as tmp:
+            proc, base = start_server(model, os.path.join(tmp, "bench.db"))
+            try:
+                for i in range(0, cases, 2000):
+                    httpx.post(f"{base}/api/report/bulk", json=seed[i:i + 2000], headers=HEADERS, timeout=120).raise_for_status()
+                for concurrency in levels:
+                    results[model, concurrency] = asyncio.run(run_clients(base, seconds, concurrency, report_pool))
+            finally:
+                proc.terminate()
+                proc.wait(timeout=30)
+
+    for concurrency in levels:
+        print(f"\n{concurrency} concurrent clients")
+        for model in ("threadpool", "async"):
+            latencies, errors = results[model, concurrency]
+            every = [sample for samples in latencies.values() for sample in samples]
+            print(f"  {model:<10} {len(every) / seconds:>6.0f} req/s  p50 {percentile(every, 0.5):>7.1f} ms  "
+                  f"p99 {percentile(every, 0.99):>7.1f} ms  errors {sum(errors.values())}")
+            for op, samples in latencies.items():
+                print(f"    {op:<7} {len(samples) / seconds:>6.0f} req/s  p50 {percentile(samples, 0.5):>7.1f} ms  "
+                      f"p99 {percentile(samples, 0.99):>7.1f} ms  errors {errors[op]}")
+
+if __name__ == "__main__":
+    if len(sys.argv) > 1 and sys.argv[1] == "--serve":
+        serve(sys.argv[2], int(sys.argv[3]))
+    else:
+        main()
@@ -0,0 +1,91 @@
+"""
+Benchmark: ingesting N reports as N POST /api/report calls vs POST /api/report/bulk batches.
+Runs the real endpoints in-process (rate limiting off) against a throwaway SQLite database.
+Run from the project root: python bench_bulk_report.py [reports] [batch_size]
+"""
+import os
+import sys
+import time
+import random
+import logging
+import tempfile
+from datetime import datetime, timedelta, timezone
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), 'backend'))
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+from fastapi.testclient import TestClient
+from database import Base, Case
+from migrations import run_migrations
+from bench_case_transcripts import build_transcript
+from bench_text_backends import build_corpus
+
+logging.disable(logging.CRITICAL)
+
+def build_reports(n, prefix, seed=5):
+    rnd = random.Random(seed)
+    pool, _ = build_corpus(0)
+    now = datetime.now(timezone.utc)
+    reports = []
+    for i in range(n):
+        ts = now - timedelta(seconds=rnd.uniform(0, 7 * 86400))
+        reports.append({
+            "conversationId": f"{prefix}-{i}",
+            "scammerName": f"scammer-{rnd.randint(0, n // 3)}",
+            "platform": "whatsapp",
+            "classification": rnd.choice(["crypto", "romance", "job", "lottery"]),
+            "confidenceScore": 0.9,
+            "transcript": build_transcript(rnd, pool, ts),
+            "iocs": {"urls": ["http://bit.ly/x"]},
+            "timestamp": ts.isoformat().replace("+00:00", "Z"),
+        })
+    return reports
+
+def use_database(server, path):
+    engine = create_engine(f"sqlite:///{path}", connect_args={"check_same_thread": False})
+    Base.metadata.create_all(bind=engine)
+    run_migrations(engine)
+    session_factory = sessionmaker(bind=engine)
+
+    def get_db():
+        db = session_factory()
+        try:
+            yield db
+        finally:
+            db.close()
+    server.app.dependency_overrides[server.get_db] = get_db
+    return session_factory
+
+def main():
+    n = int(sys.argv[1]) if len(sys.argv) > 1 else 5000
+    batch_size = int(sys.argv[2]) if len(sys.argv) > 2 else 1000
+    import server # imported here so other benchmarks can reuse build_reports without starting the app
+    server.limiter.enabled = False
+    client = TestClient(server.app, headers={"X-Rakshak-Token": "rakshak-core-v1"})
+
+    with tempfile.TemporaryDirectory() as tmp:
+        results = {}
+        for mode in ("single", "bulk"):
+            session_factory = use_database(server, os.path.join(tmp, f"{mode}.db"))
+            reports = build_reports(n, mode)
+            start = time.perf_counter()
+            if mode == "single":
+                for report in reports:
+                    assert client.post("/api/report", json=report).status_code == 200
+            else:
+                for i in range(0, n, batch_size):
+                    response = client.post("/api/report/bulk", json=reports[i:i + batch_size])
+                    assert response.status_code == 200 and response.json()["created"] == len(reports[i:i + batch_size])
+            results[mode] = time.perf_counter() - start
+            with session_factory() as db:
+                assert db.query(Case).count() == n
+                results[f"{mode}_stats"] = server.rollup_window_stats(db)
+
+    assert results["single_stats"] == results["bulk_stats"], "bulk ingestion diverged"
+    print(f"{n} reports, identical stats and rollups")
+    print(f"POST /api/report x{n}:            {results['single']:>7.2f}s ({n / results['single']:>7.0f} reports/s)")
+    print(f"POST /api/report/bulk x{n // batch_size} ({batch_size}/batch): {results['bulk']:>7.2f}s "
+          f"({n / results['bulk']:>7.0f} reports/s, {results['single'] / results['bulk']:.1f}x)")
+
+if __name__ == "__main__":
+    main()
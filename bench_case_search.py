@@ -0,0 +1,120 @@
+"""
+Benchmark: GET /api/cases/search queries through the case_search FTS5 index vs what search costs
+without one (scan every case, decode its compressed transcript and match the text), on a throwaway
+SQLite database of synthetic cases totalling ~1M chat messages. Also reports the indexing rate
+and how much the index adds to the database.
+Run from the project root: python bench_case_search.py [messages] [scan_queries]
+"""
+import os
+import sys
+import time
+import random
+import logging
+import tempfile
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), 'backend'))
+from sqlalchemy import create_engine, insert, select
+from sqlalchemy.orm import Session
+from database import Base, Case, CaseTranscript, apply_sqlite_profile
+from case_search import create_search_index, index_cases, search_cases, ioc_text, transcript_search_text
+from bench_text_backends import build_corpus
+
+logging.disable(logging.CRITICAL)
+
+NAMES = ["Officer Kumar", "Priya", "Crypto Guru", "Agent Smith", "Support Desk", "Rahul", "Dr. Mensah", "HR Team"]
+
+def build_cases(target_messages, seed=25):
+    rnd = random.Random(seed)
+    pool, _ = build_corpus(0)
+    cases, total = [], 0
+    while total < target_messages:
+        i = len(cases)
+        phone = f"{rnd.randint(200, 999)}-{rnd.randint(200, 999)}-{rnd.randint(1000, 9999)}"
+        url = f"http://secure-{rnd.choice(['refund', 'wallet', 'jobs', 'parcel'])}-{rnd.randint(1, 20000)}.com/verify"
+        messages = [{"sender": "scammer" if m % 2 == 0 else "agent", "content": rnd.choice(pool)} for m in range(rnd.randint(4, 12))]
+        messages[0]["content"] += f" Call {phone} or visit {url}"
+        cases.append({
+            "id": f"case-{i}", "scammer_name": f"{rnd.choice(NAMES)} {i}", "platform": "sms", "status": "closed",
+            "threat_level": rnd.choice(["crypto", "romance", "job", "lottery"]), "iocs": {"phones": [phone], "urls": [url]},
+            "timestamp": "2026-10-01T10:00:00Z", "auto_reported": True, "_messages": messages,
+        })
+        total += len(messages)
+    return cases, total
+
+def database_size(engine, tables):
+    with engine.connect() as conn:
+        sizes = dict(conn.exec_driver_sql("SELECT name, sum(pgsize) FROM dbstat GROUP BY name").all())
+    return sum(size for name, size in sizes.items() if any(name.startswith(t) for t in tables))
+
+def scan(db, query):
+    # No index: every case row and transcript read and decoded, every word looked for in its text
+    words = query.casefold().split()
+    statement = (select(Case.id, Case.scammer_name, Case.iocs, CaseTranscript.messages)
+                 .outerjoin(CaseTranscript, CaseTranscript.case_id == Case.id).execution_options(yield_per=5000))
+    hits = 0
+    for _, name, iocs, messages in db.execute(statement):
+        content = f"{name}\n{ioc_text(iocs)}\n{transcript_search_text(messages)}".casefold()
+        hits += all(word in content for word in words)
+    return hits
+
+def main():
+    target = int(sys.argv[1]) if len(sys.argv) > 1 else 1000000
+    scan_queries = int(sys.argv[2]) if len(sys.argv) > 2 else 3
+    cases, messages = build_cases(target)
+    print(f"{len(cases)} cases, {messages} messages (CPUs: {os.cpu_count()})")
+
+    with tempfile.TemporaryDirectory() as tmp:
+        engine = create_engine(f"sqlite:///{os.path.join(tmp, 'search.db')}")
+        apply_sqlite_profile(engine)
+        Base.metadata.create_all(bind=engine)
+        create_search_index(engine)
+
+        start = time.perf_counter()
+        with engine.begin() as conn:
+            for i in range(0, len(cases), 5000):
+                batch = cases[i:i + 5000]
+                conn.execute(insert(Case), [{k: v for k, v in case.items() if k != "_messages"} for case in batch])
+                conn.execute(insert(CaseTranscript), [{"case_id": case["id"], "messages": case["_messages"]} for case in batch])
+        stored = time.perf_counter() - start
+
+        start = time.perf_counter()
+        with Session(engine) as db:
+            for i in range(0, len(cases), 5000):
+                index_cases(db, [(c["id"], c["scammer_name"], c["iocs"], c["_messages"]) for c in cases[i:i + 5000]])
+            db.commit()
+        indexed = time.perf_counter() - start
+        base = database_size(engine, ("cases", "ix_cases", "case_transcripts", "sqlite_autoindex_cases", "sqlite_autoindex_case_transcripts"))
+        added = database_size(engine, ("case_search",))
+        print(f"store cases + compressed transcripts: {stored:.1f}s | index: {indexed:.1f}s ({messages / indexed:.0f} messages/s, "
+              f"{indexed / stored:.0%} on top of storing) | index size {added / 2**20:.0f} MB vs {base / 2**20:.0f} MB of case data")
+
+        rnd = random.Random(3)
+        sample = rnd.choice(cases)
+        queries = [
+            ("phone IOC", sample["iocs"]["phones"][0]),
+            ("url IOC", sample["iocs"]["urls"][0].split("/")[2]),
+            ("scammer name", sample["scammer_name"]),
+            ("common word", "bank"),
+            ("two words", "private key"),
+            ("prefix", "crypt*"),
+        ]
+        with Session(engine) as db:
+            for label, query in queries:
+                search_cases(db, query, 20)
+                start = time.perf_counter()
+                for _ in range(20):
+                    hits, more = search_cases(db, query, 20)
+                search_ms = (time.perf_counter() - start) * 1000 / 20
+                start = time.perf_counter()
+                search_cases(db, query, 20, offset=1000)
+                deep_ms = (time.perf_counter() - start) * 1000
+                print(f"{label:<13} {query!r:<32} FTS top 20: {search_ms:7.2f} ms, offset 1000: {deep_ms:7.2f} ms "
+                      f"({len(hits)} hits{'+' if more else ''})")
+            for label, query in queries[:scan_queries]:
+                start = time.perf_counter()
+                found = scan(db, query)
+                print(f"{label:<13} full scan with transcript decoding: {(time.perf_counter() - start) * 1000:9.0f} ms ({found} cases)")
+        engine.dispose()
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,123 @@
+"""
+Benchmark: /api/stats window aggregation - hourly rollups (case_stats.rollup_window_stats) vs a SQL
+GROUP BY over cases (case_stats.window_stats) vs the legacy load-every-case-three-times Python loop.
+Builds a throwaway SQLite database of synthetic cases.
+Run from the project root: python bench_case_stats.py [cases] [legacy_limit]
+"""
+import os
+import sys
+import time
+import random
+import logging
+import tempfile
+from datetime import datetime, timedelta, timezone
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), 'backend'))
+from sqlalchemy import create_engine, insert
+from sqlalchemy.orm import sessionmaker
+from database import Base, Case
+from migrations import run_migrations
+from case_stats import window_stats, rollup_window_stats, rebuild_rollups, make_scammer_sketch, THREAT_TYPES
+
+logging.disable(logging.CRITICAL)
+
+def legacy_window_stats(db, now):
+    # Pre-aggregation implementation of get_stats: full ORM load + Python parsing per window
+    def get_stats_for_range(time_threshold):
+        count, breakdown, scammers = 0, {t: 0 for t in THREAT_TYPES}, set()
+        for c in db.query(Case).all():
+            try:
+                c_time = datetime.fromisoformat(c.timestamp.replace('Z', '+00:00'))
+                if c_time.tzinfo is None:
+                    c_time = c_time.replace(tzinfo=timezone.utc)
+                if c_time > time_threshold:
+                    count += 1
+                    ctype = c.threat_level.upper() if c.threat_level else "OTHER"
+                    breakdown[ctype if ctype in breakdown else "OTHER"] += 1
+                    if c.scammer_name:
+                        scammers.add(c.scammer_name)
+            except Exception:
+                pass
+        return count, breakdown, len(scammers)
+
+    stats = {}
+    for name, days in (("today", 1), ("week", 7), ("month", 30)):
+        stats[name], stats[f"{name}_types"], stats[f"{name}_scammers"] = get_stats_for_range(now - timedelta(days=days))
+    return stats
+
+def populate(session_factory, n, now, seed=7):
+    rnd = random.Random(seed)
+    levels = ["romance", "crypto", "job", "impersonation", "lottery", "technical_support", "authority", "scam", "likely_scam"]
+    batch = []
+    with session_factory() as db:
+        for i in range(n):
+            ts = now - timedelta(seconds=rnd.uniform(0, 90 * 86400))
+            batch.append({
+                "id": f"case-{i}",
+                "scammer_name": f"scammer-{rnd.randint(0, n // 4)}",
+                "platform": "chat",
+                "status": "closed",
+                "threat_level": rnd.choice(levels),
+                "iocs": {"urls": ["http://bit.ly/x"]},
+                "timestamp": ts.isoformat().replace("+00:00", "Z"),
+                "reported_at": ts,
+                "auto_reported": True,
+            })
+            if len(batch) == 50000:
+                db.execute(insert(Case), batch)
+                batch.clear()
+        if batch:
+            db.execute(insert(Case), batch)
+        db.commit()
+
+def main():
+    n = int(sys.argv[1]) if len(sys.argv) > 1 else 1000000
+    legacy_limit = int(sys.argv[2]) if len(sys.argv) > 2 else 100000
+    now = datetime.now(timezone.utc)
+
+    with tempfile.TemporaryDirectory() as tmp:
+        engine = create_engine(f"sqlite:///{os.path.join(tmp, 'bench.db')}")
+        Base.metadata.create_all(bind=engine)
+        run_migrations(engine)
+        session_factory = sessionmaker(bind=engine)
+
+        start = time.perf_counter()
+        populate(session_factory, n, now)
+        print(f"Inserted {n} cases in {time.perf_counter() - start:.1f}s")
+
+        with session_factory() as db:
+            start = time.perf_counter()
+            stats = window_stats(db, now)
+            print(f"SQL GROUP BY:       {(time.perf_counter() - start) * 1000:>10.1f} ms "
+                  f"(today {stats['today']}, week {stats['week']}, month {stats['month']}, "
+                  f"month scammers {stats['month_scammers']})")
+
+            start = time.perf_counter()
+            buckets, sketches = rebuild_rollups(db)
+            print(f"Rollup rebuild:     {(time.perf_counter() - start) * 1000:>10.1f} ms "
+                  f"({buckets} type buckets, {sketches} scammer entries)")
+            start = time.perf_counter()
+            rolled = rollup_window_stats(db, now)
+            print(f"Hourly rollups:     {(time.perf_counter() - start) * 1000:>10.1f} ms")
+            assert rolled == stats, "rollup stats diverged from the full scan"
+
+            hll = make_scammer_sketch("hll")
+            rebuild_rollups(db, sketch=hll)
+            start = time.perf_counter()
+            estimated = rollup_window_stats(db, now, sketch=hll)
+            errors = ", ".join(f"{window} {abs(estimated[f'{window}_scammers'] - stats[f'{window}_scammers']) / max(stats[f'{window}_scammers'], 1):.2%}"
+                               for window in ("today", "week", "month"))
+            print(f"Rollups + HLL:      {(time.perf_counter() - start) * 1000:>10.1f} ms "
+                  f"(precision {hll.precision}, scammer error: {errors})")
+
+            if n > legacy_limit:
+                print(f"Legacy Python loop: skipped (over {legacy_limit} cases)")
+                return
+            start = time.perf_counter()
+            legacy = legacy_window_stats(db, now)
+            print(f"Legacy Python loop: {(time.perf_counter() - start) * 1000:>10.1f} ms")
+            assert legacy == stats, "SQL aggregation diverged from the legacy stats"
+            print("Responses identical")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,139 @@
+"""
+Benchmark: case list-query latency and database size with transcripts inline on the `cases` rows
+(legacy cases.transcript JSON column) vs moved out to case_transcripts by the migration.
+Builds a throwaway SQLite database of synthetic cases with realistic chat transcripts.
+Run from the project root: python bench_case_transcripts.py [cases]
+"""
+import os
+import sys
+import json
+import time
+import random
+import logging
+import tempfile
+from datetime import datetime, timedelta, timezone
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), 'backend'))
+from sqlalchemy import create_engine, insert
+from sqlalchemy.orm import sessionmaker
+from database import Base, Case
+from migrations import move_case_transcripts
+from case_listing import parse_fields, decode_cursor, case_select, case_detail, fetch_page, stream_ndjson
+from bench_text_backends import build_corpus
+
+logging.disable(logging.CRITICAL)
+
+LIST_FIELDS = parse_fields("id,scammerName,platform,status,threatLevel,timestamp,autoReported")
+PLATFORMS = ["whatsapp"] * 60 + ["sms"] * 25 + ["telegram"] * 13 + ["email"] * 2
+
+def build_transcript(rnd, pool, started):
+    messages = []
+    for i in range(rnd.randint(8, 30)):
+        messages.append({
+            "id": f"msg-{i}",
+            "sender": "scammer" if i % 2 == 0 else "agent",
+            "content": rnd.choice(pool),
+            "timestamp": int((started + timedelta(seconds=40 * i)).timestamp() * 1000),
+        })
+    return messages
+
+def populate_legacy(engine, n, now, seed=7):
+    # Current schema plus the legacy inline transcript column, filled the way submit_report used to
+    rnd = random.Random(seed)
+    pool, _ = build_corpus(0)
+    with engine.begin() as conn:
+        conn.exec_driver_sql("ALTER TABLE cases ADD COLUMN transcript JSON")
+        batch = []
+        for i in range(n):
+            ts = now - timedelta(seconds=rnd.uniform(0, 90 * 86400))
+            batch.append({
+                "id": f"case-{i}",
+                "scammer_name": f"scammer-{rnd.randint(0, n // 4)}",
+                "platform": rnd.choice(PLATFORMS),
+                "status": "closed",
+                "threat_level": rnd.choice(["crypto", "romance", "job", "lottery", "scam", "likely_scam"]),
+                "iocs": {"urls": ["http://bit.ly/x"]},
+                "timestamp": ts.isoformat().replace("+00:00", "Z"),
+                "reported_at": ts,
+                "auto_reported": True,
+            })
+            batch[-1]["_transcript"] = json.dumps(build_transcript(rnd, pool, ts))
+            if len(batch) == 20000 or i == n - 1:
+                conn.execute(insert(Case), [{k: v for k, v in row.items() if k != "_transcript"} for row in batch])
+                conn.exec_driver_sql("UPDATE cases SET transcript = ? WHERE id = ?",
+                                     [(row["_transcript"], row["id"]) for row in batch])
+                batch.clear()
+    with engine.connect().execution_options(isolation_level="AUTOCOMMIT") as conn:
+        conn.exec_driver_sql("VACUUM")
+
+def timed(fn, repeat=1):
+    start = time.perf_counter()
+    for _ in range(repeat):
+        fn()
+    return (time.perf_counter() - start) * 1000 / repeat
+
+def table_sizes(engine):
+    # Bytes per table (dbstat is compiled into the stock sqlite3 module)
+    with engine.connect() as conn:
+        return dict(conn.exec_driver_sql("SELECT name, sum(pgsize) FROM dbstat GROUP BY name").all())
+
+def measure(engine, ids, detail):
+    results = {}
+    with sessionmaker(bind=engine)() as db:
+        def walk_pages(pages=50):
+            cursor = None
+            for _ in range(pages):
+                _, next_cursor = fetch_page(db, case_select(LIST_FIELDS, cursor=cursor), LIST_FIELDS, 100)
+                cursor = decode_cursor(next_cursor)
+        results["50 list pages (100 rows)"] = timed(walk_pages)
+        results["rare-platform page"] = timed(lambda: fetch_page(db, case_select(LIST_FIELDS, platform="email"), LIST_FIELDS, 100), 5)
+        results["metadata export (all rows)"] = timed(lambda: sum(1 for _ in stream_ndjson(db, case_select(LIST_FIELDS), LIST_FIELDS, 1000)))
+        results["full scan: count by platform"] = timed(lambda: db.connection().exec_driver_sql(
+            "SELECT platform, count(*) FROM cases GROUP BY platform").all())
+        results["200 case details"] = timed(lambda: [detail(db, case_id) for case_id in ids])
+    return results
+
+def main():
+    n = int(sys.argv[1]) if len(sys.argv) > 1 else 200000
+    now = datetime.now(timezone.utc)
+    ids = [f"case-{i}" for i in random.Random(3).sample(range(n), 200)]
+
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "bench.db")
+        engine = create_engine(f"sqlite:///{path}")
+        Base.metadata.create_all(bind=engine)
+
+        start = time.perf_counter()
+        populate_legacy(engine, n, now)
+        print(f"Inserted {n} cases in {time.perf_counter() - start:.1f}s")
+
+        def legacy_detail(db, case_id):
+            return db.connection().exec_driver_sql("SELECT * FROM cases WHERE id = ?", (case_id,)).one()
+        def split_detail(db, case_id):
+            return db.connection().exec_driver_sql("SELECT cases.*, case_transcripts.messages FROM cases LEFT JOIN "
+                                                   "case_transcripts ON case_transcripts.case_id = cases.id "
+                                                   "WHERE cases.id = ?", (case_id,)).one()
+        with sessionmaker(bind=engine)() as db:
+            legacy_transcripts = {case_id: json.loads(legacy_detail(db, case_id).transcript) for case_id in ids}
+        before, before_size, before_tables = measure(engine, ids, legacy_detail), os.path.getsize(path), table_sizes(engine)
+
+        start = time.perf_counter()
+        move_case_transcripts(engine)
+        print(f"Migration (move + drop column + VACUUM): {time.perf_counter() - start:.1f}s")
+        after = measure(engine, ids, split_detail)
+        after_size, after_tables = os.path.getsize(path), table_sizes(engine)
+
+        with sessionmaker(bind=engine)() as db:
+            for case_id in ids:
+                assert case_detail(db, case_id)["transcript"] == legacy_transcripts[case_id], case_id
+
+        print(f"\n{'query':<30} {'inline ms':>11} {'split ms':>11} {'speedup':>9}")
+        for name in before:
+            print(f"{name:<30} {before[name]:>11.1f} {after[name]:>11.1f} {before[name] / after[name]:>8.1f}x")
+        mb = lambda size: f"{size / 2**20:.1f} MB"
+        print(f"\ncases table:      {mb(before_tables['cases']):>10} -> {mb(after_tables['cases'])}")
+        print(f"case_transcripts: {mb(before_tables.get('case_transcripts', 0)):>10} -> {mb(after_tables['case_transcripts'])}")
+        print(f"DB file:          {mb(before_size):>10} -> {mb(after_size)}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,78 @@
+"""
+Benchmark: ScamAnalyzer.analyze_behavior and incremental conversation scoring with and without the
+per-message feature memo, on scripted traffic: the scenario scripts re-sent many times with the
+phone numbers and email addresses in them, and their casing/spacing, varied per send. The default
+memo keys on the exact message; "normalized" keys on the PII-redacted text (FEATURE_CACHE_NORMALIZE=1),
+which shares entries across PII variants but changes scores.
+Run from the project root: python bench_feature_cache.py [messages] [cache_size]
+"""
+import os
+import sys
+import time
+import random
+import logging
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), 'backend'))
+from analyzer import ScamAnalyzer
+from feature_cache import FeatureCache
+from text_backend import TEXT_BACKENDS, get_text_backend
+from bench_text_backends import build_corpus
+
+logging.disable(logging.CRITICAL)
+
+def scripted_traffic(n, seed=11):
+    rnd = random.Random(seed)
+    pool, _ = build_corpus(0)
+    messages = []
+    for _ in range(n):
+        text = rnd.choice(pool)
+        if rnd.random() < 0.5:
+            text += f" Call {rnd.randint(200, 999)}-{rnd.randint(200, 999)}-{rnd.randint(1000, 9999)} or mail agent{rnd.randint(1, 999)}@secure-help.com"
+        if rnd.random() < 0.3:
+            text = text.upper() if rnd.random() < 0.5 else "  ".join(text.split())
+        messages.append(text)
+    return messages
+
+def run(analyzer, messages):
+    start = time.perf_counter()
+    results = [analyzer.analyze_behavior([{"role": "scammer", "content": text}]) for text in messages]
+    single = time.perf_counter() - start
+
+    start = time.perf_counter()
+    for i in range(0, len(messages), 8):
+        state, history = analyzer.new_state(), []
+        for text in messages[i:i + 8]:
+            history.append({"role": "scammer", "content": text})
+            analyzer.analyze_incremental(state, history)
+    return results, single, time.perf_counter() - start
+
+def main():
+    n = int(sys.argv[1]) if len(sys.argv) > 1 else 20000
+    size = int(sys.argv[2]) if len(sys.argv) > 2 else 50000
+    messages = scripted_traffic(n)
+    print(f"{n} messages, {len(set(messages))} distinct raw texts")
+
+    for name in TEXT_BACKENDS:
+        try:
+            backend = get_text_backend(name)
+        except Exception as e:
+            print(f"\n{name}: skipped ({type(e).__name__}: {e})")
+            continue
+        print(f"\n{name} backend")
+        baseline = None
+        for label, cache in (("no memo", None), ("lru", FeatureCache(size, "lru")), ("lfu", FeatureCache(size, "lfu")),
+                             ("lfu, 64 entries", FeatureCache(64, "lfu")), ("lfu, normalized", FeatureCache(size, "lfu", normalize=True))):
+            analyzer = ScamAnalyzer(backend=backend, feature_cache=cache)
+            results, single, incremental = run(analyzer, messages)
+            if baseline is None:
+                baseline = (single, incremental)
+            flips = sum(a != b for a, b in zip(results, baseline_results)) if cache else 0
+            if cache is None:
+                baseline_results = results
+            rate = f"hit rate {cache.metrics()['hit_rate']:.1%}" if cache else ""
+            print(f"  {label:<16} analyze {n / single:>8.0f} msg/s ({baseline[0] / single:4.1f}x)  "
+                  f"incremental {n / incremental:>8.0f} msg/s ({baseline[1] / incremental:4.1f}x)  "
+                  f"changed results {flips}  {rate}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,46 @@
+"""
+Benchmark: substring-loop keyword checks vs the shared Aho-Corasick automaton as keyword lists grow.
+Run from the project root: python bench_keyword_matcher.py [messages]
+"""
+import os
+import sys
+import time
+import random
+import logging
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), 'backend'))
+from keyword_matcher import KeywordAutomaton
+from bench_text_backends import build_corpus
+
+logging.disable(logging.CRITICAL)
+
+def synthetic_phrases(n, seed=7):
+    rnd = random.Random(seed)
+    vocab = ["wallet", "verify", "gift", "card", "urgent", "refund", "crypto", "account", "transfer", "prize",
+             "support", "remote", "access", "invoice", "customs", "parcel", "loan", "bonus", "tax", "kyc"]
+    return [" ".join(rnd.sample(vocab, rnd.randint(2, 3))) + f" {i}" for i in range(n)]
+
+def main():
+    n_messages = int(sys.argv[1]) if len(sys.argv) > 1 else 2000
+    messages, _ = build_corpus(0)
+    messages = (messages * (n_messages // len(messages) + 1))[:n_messages]
+
+    print(f"{'keywords':>9} {'loop ms':>10} {'automaton ms':>13} {'build ms':>9}")
+    for n in (10, 100, 1000, 5000):
+        keywords = synthetic_phrases(n)
+        start = time.perf_counter()
+        automaton = KeywordAutomaton({"threat_intel": keywords})
+        build = time.perf_counter() - start
+
+        start = time.perf_counter()
+        loop_hits = sum(1 for text in messages for kw in keywords if kw in text.lower())
+        loop = time.perf_counter() - start
+
+        start = time.perf_counter()
+        automaton_hits = sum(len(automaton.find_all(text)) for text in messages)
+        scan = time.perf_counter() - start
+        assert loop_hits == automaton_hits
+        print(f"{n:>9} {loop * 1000:>10.1f} {scan * 1000:>13.1f} {build * 1000:>9.1f}")
+
+if __name__ == "__main__":
+    main()
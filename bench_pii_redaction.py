@@ -0,0 +1,68 @@
+"""
+Benchmark: SafetyGuard.redact_pii (single compiled pass) vs the legacy per-pattern findall/replace loop.
+Run from the project root: python bench_pii_redaction.py [transcript_kb] [rounds]
+"""
+import os
+import re
+import sys
+import time
+import random
+import logging
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), 'backend'))
+from safety import SafetyGuard
+from config import SENSITIVE_PATTERNS
+from mock_api import MockScammerAPI
+
+logging.disable(logging.CRITICAL)
+
+PII_SAMPLES = [
+    "4111 1111 1111 1111", "5500-0000-0000-0004", "john.doe@example.com", "support@coinbase-help.net",
+    "(555) 123-4567", "555.987.6543", "123-45-6789", "1BoatSLRHtKNngkdXEeobR76b53LETtpyT",
+    "0x52908400098527886E0F7030069857D2E4169EE7",
+]
+
+def legacy_redact_pii(text):
+    # Pre-engine implementation: one findall per pattern, one str.replace per match
+    redacted_text = text
+    for pii_type, pattern in SENSITIVE_PATTERNS.items():
+        for match in re.findall(pattern, redacted_text):
+            match_str = "".join([m for m in match if m]) if isinstance(match, tuple) else match
+            if match_str:
+                redacted_text = redacted_text.replace(match_str, f"[REDACTED: {pii_type}]")
+    return redacted_text
+
+def build_transcript(kilobytes, seed=7):
+    rnd = random.Random(seed)
+    pool = [m for s in MockScammerAPI.SCENARIOS for m in s["messages"]]
+    parts, size = [], 0
+    while size < kilobytes * 1024:
+        line = rnd.choice(pool)
+        if rnd.random() < 0.3:
+            line += f" Reach me at {rnd.choice(PII_SAMPLES)}."
+        parts.append(line)
+        size += len(line) + 1
+    return "\n".join(parts)
+
+def best_of(fn, text, rounds):
+    best = float("inf")
+    for _ in range(rounds):
+        start = time.perf_counter()
+        fn(text)
+        best = min(best, time.perf_counter() - start)
+    return best
+
+def main():
+    kilobytes = int(sys.argv[1]) if len(sys.argv) > 1 else 256
+    rounds = int(sys.argv[2]) if len(sys.argv) > 2 else 5
+
+    print(f"{'transcript':>12} {'legacy ms':>11} {'engine ms':>11} {'speedup':>9} {'spans':>7}")
+    for size in (1, 16, kilobytes):
+        text = build_transcript(size)
+        legacy = best_of(legacy_redact_pii, text, rounds)
+        engine = best_of(SafetyGuard.redact_pii, text, rounds)
+        spans = len(SafetyGuard.redact_pii_spans(text)[1])
+        print(f"{size:>9} KB {legacy * 1000:>11.2f} {engine * 1000:>11.2f} {legacy / engine:>8.1f}x {spans:>7}")
+
+if __name__ == "__main__":
+    main()
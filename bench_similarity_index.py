@@ -0,0 +1,92 @@
+"""
+Benchmark: GET /api/cases/{id}/similar lookups through the MinHash/LSH index vs a brute-force scan
+of every stored signature, plus index build rate and save/load time vs rebuilding from transcripts.
+Synthetic cases replay a few hundred scripts (each mutated: messages dropped/added, PII swapped,
+casing changed) mixed with one-off conversations.
+Run from the project root: python bench_similarity_index.py [cases] [queries]
+"""
+import os
+import sys
+import time
+import random
+import logging
+import tempfile
+
+import numpy as np
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), 'backend'))
+from similarity_index import MinHashLSH
+from bench_text_backends import build_corpus
+
+logging.disable(logging.CRITICAL)
+
+def build_cases(n, scripts=300, seed=24):
+    rnd = random.Random(seed)
+    pool, _ = build_corpus(0)
+    templates = [[rnd.choice(pool) for _ in range(rnd.randint(3, 7))] for _ in range(scripts)]
+    cases = []
+    for i in range(n):
+        if rnd.random() < 0.3:
+            messages = [rnd.choice(pool) for _ in range(rnd.randint(2, 8))]
+        else:
+            messages = list(rnd.choice(templates))
+            if rnd.random() < 0.3:
+                messages.pop(rnd.randrange(len(messages)))
+            if rnd.random() < 0.3:
+                messages.insert(rnd.randrange(len(messages) + 1), rnd.choice(pool))
+            if rnd.random() < 0.5:
+                messages.append(f"Call {rnd.randint(200, 999)}-{rnd.randint(200, 999)}-{rnd.randint(1000, 9999)} now")
+            if rnd.random() < 0.2:
+                messages = [m.upper() for m in messages]
+        cases.append((f"case-{i}", " ".join(messages)))
+    return cases
+
+def brute_force(index, doc_id, limit, threshold):
+    # Every stored signature compared against the query's (what an index-free lookup has to do)
+    n = len(index)
+    signatures = index._signatures[:n]
+    position = index._positions[doc_id]
+    scores = (signatures == signatures[position]).mean(axis=1)
+    scores[position] = -1
+    hits = np.nonzero(scores >= threshold)[0]
+    order = hits[np.lexsort((hits, -scores[hits]))][:limit]
+    return [(index.ids[i], round(float(scores[i]), 4)) for i in order]
+
+def main():
+    n = int(sys.argv[1]) if len(sys.argv) > 1 else 200000
+    queries = int(sys.argv[2]) if len(sys.argv) > 2 else 500
+    cases = build_cases(n)
+    print(f"{n} cases (CPUs: {os.cpu_count()})")
+
+    index = MinHashLSH()
+    start = time.perf_counter()
+    for case_id, text in cases:
+        index.add(case_id, text)
+    build = time.perf_counter() - start
+    print(f"build: {build:.1f}s ({n / build:.0f} cases/s)")
+
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "similarity.npz")
+        start = time.perf_counter()
+        index.save(path)
+        save = time.perf_counter() - start
+        start = time.perf_counter()
+        index = MinHashLSH.load(path)
+        load = time.perf_counter() - start
+        print(f"save (with compaction): {save:.1f}s, load: {load:.2f}s vs rebuild {build:.1f}s, file {os.path.getsize(path) / 2**20:.0f} MB")
+
+    sample = [case_id for case_id, _ in random.Random(3).sample(cases, queries)]
+    for limit in (10, 1000):
+        start = time.perf_counter()
+        lsh = [index.similar(case_id, limit=limit, threshold=0.5) for case_id in sample]
+        lsh_ms = (time.perf_counter() - start) * 1000 / queries
+        start = time.perf_counter()
+        exact = [brute_force(index, case_id, limit, 0.5) for case_id in sample]
+        scan_ms = (time.perf_counter() - start) * 1000 / queries
+        found = sum(len({m for m, _ in a} & {m for m, _ in b}) for a, b in zip(lsh, exact))
+        total = sum(len(b) for b in exact)
+        print(f"limit {limit:>4}: LSH {lsh_ms:.2f} ms/query vs full scan {scan_ms:.2f} ms/query ({scan_ms / lsh_ms:.0f}x), "
+              f"recall {found / max(total, 1):.1%} of {total} matches >= 0.5")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,125 @@
+"""
+Benchmark: mixed read/write API throughput under uvicorn with several workers, SQLite defaults
+(rollback journal, synchronous=FULL, no busy timeout) vs the tuned profile (WAL, synchronous=NORMAL,
+busy_timeout, mmap, cache_size, temp_store=MEMORY). Each run starts uvicorn on a throwaway database,
+seeds it through /api/report/bulk, then clients mix GET /api/stats, GET /api/cases pages and
+POST /api/report for a fixed time.
+Run from the project root: python bench_sqlite_profile.py [seconds] [workers] [clients] [cases]
+"""
+import os
+import sys
+import time
+import uuid
+import random
+import socket
+import logging
+import tempfile
+import threading
+import subprocess
+
+import requests
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), 'backend'))
+from bench_bulk_report import build_reports
+
+logging.disable(logging.CRITICAL)
+
+BACKEND_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'backend')
+HEADERS = {"X-Rakshak-Token": "rakshak-core-v1"}
+MIX = (("stats", 0.4), ("cases", 0.4), ("report", 0.2))
+
+def free_port():
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+def start_server(db_path, tuned, workers):
+    port = free_port()
+    env = dict(os.environ, SQLITE_DB_PATH=db_path, SQLITE_TUNING="1" if tuned else "0", RATE_LIMIT_ENABLED="0")
+    env.pop("DATABASE_URL", None)
+    # One process creates/migrates the schema first so the workers don't race on it
+    subprocess.run([sys.executable, "-c", "import database; database.init_db()"], cwd=BACKEND_DIR, env=env,
+                   check=True, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+    proc = subprocess.Popen(
+        [sys.executable, "-m", "uvicorn", "server:app", "--port", str(port), "--workers", str(workers), "--log-level", "warning"],
+        cwd=BACKEND_DIR, env=env, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL
+    )
+    base = f"http://127.0.0.1:{port}"
+    deadline = time.time() + 120
+    while time.time() < deadline:
+        try:
+            if requests.get(f"{base}/api/stats", headers=HEADERS, timeout=2).status_code == 200:
+                return proc, base
+        except requests.RequestException:
+            pass
+        time.sleep(0.5)
+    proc.kill()
+    raise RuntimeError("uvicorn did not come up")
+
+def run_clients(base, seconds, clients, report_pool):
+    latencies = {name: [] for name, _ in MIX}
+    errors = {name: 0 for name, _ in MIX}
+    lock = threading.Lock()
+    stop_at = time.perf_counter() + seconds
+
+    def client(seed):
+        rnd = random.Random(seed)
+        session = requests.Session()
+        session.headers.update(HEADERS)
+        while time.perf_counter() < stop_at:
+            op = rnd.choices([name for name, _ in MIX], weights=[w for _, w in MIX])[0]
+            start = time.perf_counter()
+            try:
+                if op == "stats":
+                    ok = session.get(f"{base}/api/stats", timeout=30).ok
+                elif op == "cases":
+                    ok = session.get(f"{base}/api/cases", params={"limit": 50, "fields": "id,scammerName,threatLevel,timestamp"}, timeout=30).ok
+                else:
+                    report = dict(rnd.choice(report_pool), conversationId=str(uuid.uuid4()))
+                    ok = session.post(f"{base}/api/report", json=report, timeout=30).ok
+            except requests.RequestException:
+                ok = False
+            elapsed = time.perf_counter() - start
+            with lock:
+                if ok:
+                    latencies[op].append(elapsed)
+                else:
+                    errors[op] += 1
+
+    threads = [threading.Thread(target=client, args=(i,)) for i in range(clients)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    return latencies, errors
+
+def percentile(samples, q):
+    return sorted(samples)[int(len(samples) * q)] * 1000 if samples else float("nan")
+
+def main():
+    seconds = int(sys.argv[1]) if len(sys.argv) > 1 else 20
+    workers = int(sys.argv[2]) if len(sys.argv) > 2 else 4
+    clients = int(sys.argv[3]) if len(sys.argv) > 3 else 32
+    cases = int(sys.argv[4]) if len(sys.argv) > 4 else 20000
+    report_pool = build_reports(200, "load")
+    print(f"{workers} uvicorn workers, {clients} clients, {seconds}s per profile, {cases} seeded cases (CPUs: {os.cpu_count()})")
+
+    for name, tuned in (("SQLite defaults", False), ("tuned profile", True)):
+        with tempfile.TemporaryDirectory() as tmp:
+            proc, base = start_server(os.path.join(tmp, "bench.db"), tuned, workers)
+            try:
+                seed = build_reports(cases, "seed")
+                for i in range(0, cases, 2000):
+                    requests.post(f"{base}/api/report/bulk", json=seed[i:i + 2000], headers=HEADERS, timeout=120).raise_for_status()
+                latencies, errors = run_clients(base, seconds, clients, report_pool)
+            finally:
+                proc.terminate()
+                proc.wait(timeout=30)
+        done = sum(len(samples) for samples in latencies.values())
+        print(f"\n{name}: {done / seconds:.0f} req/s, {sum(errors.values())} failed requests")
+        for op, samples in latencies.items():
+            print(f"  {op:<7} {len(samples) / seconds:>7.0f} req/s  p50 {percentile(samples, 0.5):>7.1f} ms  "
+                  f"p95 {percentile(samples, 0.95):>7.1f} ms  p99 {percentile(samples, 0.99):>7.1f} ms  errors {errors[op]}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,93 @@
+"""
+Benchmark: per-message latency and score agreement of the NLP text backends.
+Run from the project root: python bench_text_backends.py [rounds]
+"""
+import os
+import sys
+import time
+import random
+import logging
+import statistics
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), 'backend'))
+from analyzer import ScamAnalyzer
+from text_backend import TEXT_BACKENDS, get_text_backend
+from mock_api import MockScammerAPI
+from config import PERSONA
+
+logging.disable(logging.CRITICAL)
+
+EXTRA_MESSAGES = [
+    "What is an OTP?", "Send me the OTP", "I am going to the bank", "Go to the bank and wire money",
+    "I love my family", "Honey, I need money for my ticket",
+    "you have won a lottery .click on this link to claim prize",
+    "My horse is sick, send vet fee immediately via card.",
+    "I am from the court. You have a lawsuit. Pay the fine.",
+    "Can you help me with my project today?", "kindly verify your wallet immediately",
+    "Police will ARREST you! This is not a joke, pay the fine NOW or face jail!!",
+    "Your btc wallet is frozen, send crypto to unlock it. This is really terrible.",
+    "Dear customer, your account is suspended. Kindly share your login code asap.",
+    "Don't worry, it's a very safe and easy investment with guaranteed returns.",
+]
+
+def build_corpus(n_conversations, seed=7):
+    rnd = random.Random(seed)
+    pool = [m for s in MockScammerAPI.SCENARIOS for m in s["messages"]] + EXTRA_MESSAGES
+    pool += [q for p in PERSONA.values() for q in p["safe_questions"]]
+    conversations = []
+    for _ in range(n_conversations):
+        conversations.append([{"role": "scammer", "content": rnd.choice(pool)} for _ in range(rnd.randint(1, 6))])
+    return pool, conversations
+
+def time_messages(analyzer, messages, rounds):
+    samples = []
+    for _ in range(rounds):
+        for msg in messages:
+            start = time.perf_counter()
+            analyzer.analyze_behavior([{"role": "scammer", "content": msg}])
+            samples.append((time.perf_counter() - start) * 1e6)
+    samples.sort()
+    return statistics.mean(samples), samples[len(samples) // 2], samples[int(len(samples) * 0.95)]
+
+def main():
+    rounds = int(sys.argv[1]) if len(sys.argv) > 1 else 20
+    messages, conversations = build_corpus(500)
+
+    analyzers = {}
+    for name in TEXT_BACKENDS:
+        start = time.perf_counter()
+        try:
+            analyzers[name] = ScamAnalyzer(backend=get_text_backend(name))
+        except Exception as e:
+            print(f"Skipping backend '{name}': {e}")
+            continue
+        analyzers[name].analyze_behavior([{"role": "scammer", "content": "warm up"}])
+        print(f"Backend '{name}' ready in {(time.perf_counter() - start) * 1000:.1f} ms")
+
+    print(f"\nPer-message latency ({len(messages)} messages x {rounds} rounds)")
+    print(f"{'backend':<10} {'mean us':>10} {'p50 us':>10} {'p95 us':>10}")
+    for name, analyzer in analyzers.items():
+        mean, p50, p95 = time_messages(analyzer, messages, rounds)
+        print(f"{name:<10} {mean:>10.1f} {p50:>10.1f} {p95:>10.1f}")
+
+    if len(analyzers) < 2:
+        return
+
+    names = list(analyzers)
+    print(f"\nAgreement over {len(messages)} messages + {len(conversations)} conversations")
+    for i, a in enumerate(names):
+        for b in names[i + 1:]:
+            same_class, same_intent, diffs = 0, 0, []
+            cases = [[{"role": "scammer", "content": m}] for m in messages] + conversations
+            for history in cases:
+                result_a = analyzers[a].analyze_behavior(history)
+                result_b = analyzers[b].analyze_behavior(history)
+                same_class += result_a.classification == result_b.classification
+                same_intent += result_a.intent == result_b.intent
+                diffs.append(abs(result_a.score - result_b.score))
+            n = len(cases)
+            print(f"{a} vs {b}: classification {same_class / n:.1%} | intent {same_intent / n:.1%} | "
+                  f"mean |score diff| {statistics.mean(diffs):.4f} | max {max(diffs):.4f}")
+
+if __name__ == "__main__":
+    main()
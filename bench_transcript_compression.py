@@ -0,0 +1,73 @@
+"""
+Benchmark: stored transcript size and encode/decode throughput - plain JSON text (legacy column)
+vs zlib vs zlib with a preset dictionary trained from other cases (vs zstd, if installed).
+Run from the project root: python bench_transcript_compression.py [cases]
+"""
+import os
+import sys
+import json
+import time
+import random
+import logging
+from datetime import datetime, timedelta, timezone
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), 'backend'))
+from transcript_codec import TranscriptCodec
+from bench_case_transcripts import build_transcript
+from bench_text_backends import build_corpus
+
+logging.disable(logging.CRITICAL)
+
+class PlainJSON:
+    # What the JSON column did: serialize to text on write, parse on read
+    def encode(self, value):
+        return json.dumps(value).encode("utf-8")
+
+    def decode(self, value):
+        return json.loads(value)
+
+def build_codecs(training):
+    codecs = {"plain JSON": PlainJSON()}
+    for level in (1, 6, 9):
+        codecs[f"zlib-{level}"] = TranscriptCodec("zlib", level, use_dictionary=False)
+    for level in (6, 9):
+        codec = TranscriptCodec("zlib", level)
+        codec.load_dictionary(1, "zlib", codec.train(training))
+        codecs[f"zlib-{level} + dict"] = codec
+    try:
+        for level, use_dictionary in ((3, False), (3, True), (19, True)):
+            codec = TranscriptCodec("zstd", level, use_dictionary=use_dictionary, dictionary_size=112640)
+            if use_dictionary:
+                codec.load_dictionary(1, "zstd", codec.train(training))
+            codecs[f"zstd-{level}" + (" + dict" if use_dictionary else "")] = codec
+    except ImportError:
+        print("zstd: skipped (zstandard not installed)")
+    return codecs
+
+def main():
+    n = int(sys.argv[1]) if len(sys.argv) > 1 else 20000
+    rnd = random.Random(11)
+    pool, _ = build_corpus(0)
+    now = datetime.now(timezone.utc)
+    transcripts = [build_transcript(rnd, pool, now - timedelta(minutes=i)) for i in range(n + 2000)]
+    training, corpus = transcripts[:2000], transcripts[2000:] # dictionaries never see the measured cases
+    raw_bytes = sum(len(json.dumps(t).encode("utf-8")) for t in corpus)
+    print(f"{n} transcripts, {raw_bytes / 2**20:.1f} MB as JSON text "
+          f"(avg {raw_bytes / n / 1024:.1f} KB, {sum(map(len, corpus)) / n:.0f} messages)\n")
+
+    codecs = build_codecs(training)
+    print(f"{'codec':<16} {'stored MB':>10} {'ratio':>7} {'encode MB/s':>12} {'decode MB/s':>12}")
+    for name, codec in codecs.items():
+        start = time.perf_counter()
+        encoded = [codec.encode(t) for t in corpus]
+        encode_time = time.perf_counter() - start
+        start = time.perf_counter()
+        decoded = [codec.decode(blob) for blob in encoded]
+        decode_time = time.perf_counter() - start
+        assert decoded == corpus, f"{name} did not round-trip"
+        stored = sum(map(len, encoded))
+        print(f"{name:<16} {stored / 2**20:>10.2f} {raw_bytes / stored:>6.1f}x "
+              f"{raw_bytes / 2**20 / encode_time:>12.1f} {raw_bytes / 2**20 / decode_time:>12.1f}")
+
+if __name__ == "__main__":
+    main()
@@ -12,33 +12,28 @@ def debug_stats():
     print(f"NOW: {now.isoformat()}")
     print(f"DAY_AGO: {day_ago.isoformat()}")
     
-    cur.execute('SELECT id, timestamp FROM cases ORDER BY timestamp DESC')
+    # reported_at holds naive UTC ("YYYY-MM-DD HH:MM:SS.ffffff"), so the window is a plain indexed comparison
+    day_ago_key = day_ago.replace(tzinfo=None).strftime('%Y-%m-%d %H:%M:%S.%f')
+    
+    cur.execute('SELECT id, timestamp, reported_at FROM cases ORDER BY reported_at DESC')
     rows = cur.fetchall()
     
     print(f"\nTotal Cases: {len(rows)}")
     
-    today_count = 0
-    older_count = 0
-    
-    for i, (cid, ts) in enumerate(rows):
-        try:
-            c_time = datetime.datetime.fromisoformat(ts.replace('Z', '+00:00'))
-            if c_time.tzinfo is None:
-                c_time = c_time.replace(tzinfo=datetime.timezone.utc)
-            
-            is_today = c_time > day_ago
-            if is_today:
-                today_count += 1
-            else:
-                older_count += 1
-                
-            if i < 10:
-                print(f"Case {cid[:8]}: {ts} | Is Today: {is_today}")
-        except Exception as e:
-            print(f"Error parsing case {cid[:8]}: {e}")
+    for cid, ts, reported_at in rows[:10]:
+        is_today = reported_at is not None and reported_at > day_ago_key
+        print(f"Case {cid[:8]}: {ts} | reported_at: {reported_at} | Is Today: {is_today}")
+    
+    cur.execute('SELECT COUNT(*) FROM cases WHERE reported_at > ?', (day_ago_key,))
+    today_count = cur.fetchone()[0]
+    cur.execute('SELECT COUNT(*) FROM cases WHERE reported_at <= ?', (day_ago_key,))
+    older_count = cur.fetchone()[0]
+    cur.execute('SELECT COUNT(*) FROM cases WHERE reported_at IS NULL')
+    unparsed_count = cur.fetchone()[0]
 
     print(f"\nCalculated Today: {today_count}")
     print(f"Calculated Older: {older_count}")
+    print(f"Unparseable Timestamps: {unparsed_count}")
     
     conn.close()
 
@@ -38,10 +38,36 @@ function App() {
 
   const [notification, setNotification] = useState<string | null>(null);
   const [persistentCases, setPersistentCases] = useState<CaseFile[]>([]);
+  const [casesCursor, setCasesCursor] = useState<string | null>(null);
+
+  // First page only; older cases are fetched page by page when the locker asks for more
+  const reloadCases = () => {
+    CyberCellService.getCasesPage().then(page => {
+      setPersistentCases(page.cases);
+      setCasesCursor(page.nextCursor);
+    });
+  };
+
+  const loadMoreCases = () => {
+    if (!casesCursor) return;
+    CyberCellService.getCasesPage(casesCursor).then(page => {
+      setPersistentCases(prev => [...prev, ...page.cases.filter(c => !prev.some(p => p.id === c.id))]);
+      setCasesCursor(page.nextCursor);
+    });
+  };
 
   useEffect(() => {
-    // Load persistent cases on boot
-    CyberCellService.getAllCases().then(cases => setPersistentCases(cases));
+    // Load persistent cases on boot, then follow new reports on the push feed
+    reloadCases();
+    return CyberCellService.subscribeFeed(feed => {
+      if (feed.event === 'case.created') {
+        CyberCellService.getCase(feed.data.id).then(created => {
+          if (created) setPersistentCases(prev => prev.some(c => c.id === created.id) ? prev : [created, ...prev]);
+        });
+      } else if (feed.event === 'resync') {
+        reloadCases();
+      }
+    });
   }, []);
 
   useEffect(() => {
@@ -214,7 +240,7 @@ function App() {
               }
             }).then(() => {
               // Refresh persistent cases after report
-              CyberCellService.getAllCases().then(setPersistentCases);
+              reloadCases();
             });
 
             console.warn(`%c[Shredder] ☢️ AUTOMATED DESTRUCTION COMPLETE`, 'color: #ef4444; font-weight: bold;');
@@ -609,7 +635,7 @@ function App() {
                       <h2 style={{ margin: 0, fontSize: '1.2rem', color: 'var(--text-primary)' }}>EVIDENCE LOCKER</h2>
                     </div>
                     <div style={{ flex: 1, overflow: 'hidden' }}>
-                      <EvidenceLocker cases={getCaseFiles()} onClose={() => setActiveView('DASHBOARD')} />
+                      <EvidenceLocker cases={getCaseFiles()} onLoadMore={casesCursor ? loadMoreCases : undefined} onClose={() => setActiveView('DASHBOARD')} />
                     </div>
                   </div>
                 </Suspense>
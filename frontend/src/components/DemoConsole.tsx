@@ -20,7 +20,7 @@ export const DemoConsole: React.FC = () => {
                     'Content-Type': 'application/json',
                     'X-Rakshak-Token': 'rakshak-core-v1'
                 },
-                body: JSON.stringify({ text: input })
+                body: JSON.stringify({ text: input, deep_scan: true })
             });
 
             if (res.ok) {
@@ -6,10 +6,11 @@ import type { CaseFile } from '../lib/types';
 
 interface EvidenceLockerProps {
     cases: CaseFile[];
+    onLoadMore?: () => void; // set while older cases remain on the backend
     onClose: () => void;
 }
 
-export const EvidenceLocker: React.FC<EvidenceLockerProps> = ({ cases, onClose }) => {
+export const EvidenceLocker: React.FC<EvidenceLockerProps> = ({ cases, onLoadMore, onClose }) => {
     const [selectedCaseId, setSelectedCaseId] = useState<string | null>(cases.length > 0 ? cases[0].id : null);
 
     // Auto-select first case if none selected and cases become available
@@ -134,6 +135,11 @@ export const EvidenceLocker: React.FC<EvidenceLockerProps> = ({ cases, onClose }
                                 </div>
                             </div>
                         ))}
+                        {onLoadMore && (
+                            <button onClick={onLoadMore} className="btn btn-secondary" style={{ width: '100%', justifyContent: 'center' }}>
+                                LOAD OLDER CASES
+                            </button>
+                        )}
                     </div>
 
                     <div className="locker-sidebar-footer">
@@ -1,8 +1,9 @@
-import React, { useEffect, useState } from 'react';
+import React, { useEffect, useRef, useState } from 'react';
 import { Activity, Cpu, Shield, Wifi, Server, Zap, Globe, Lock, AlertTriangle } from 'lucide-react';
 import { GlobalThreatMap } from './GlobalThreatMap';
 import { type GeoLocation } from '../lib/types';
 import { API_BASE_URL } from '../lib/config';
+import { CyberCellService } from '../lib/CyberCellService';
 
 interface SystemDashboardProps {
     activeThreats?: number;
@@ -18,13 +19,36 @@ export const SystemDashboard: React.FC<SystemDashboardProps> = ({ activeThreats
     const [neuralPoints, setNeuralPoints] = useState<number[]>(Array(30).fill(20));
     const [enhancedMonitoring, setEnhancedMonitoring] = useState<{ region: string, active: boolean }>({ region: '', active: false });
 
-    // 1. Fetch backend stats for target predictive baselines
+    // 1. Backend stats for target predictive baselines: fetched once, then kept current by the push feed
+    const activeReportsRef = useRef(0);
+
     useEffect(() => {
         fetchStats();
-        const interval = setInterval(fetchStats, 2000);
-        return () => clearInterval(interval);
+        const closeFeed = CyberCellService.subscribeFeed(feed => {
+            if (feed.event === 'stats.delta') activeReportsRef.current += feed.data.reports_filed || 0;
+            else if (feed.event === 'resync') fetchStats();
+        });
+        // Targets keep their 2s cadence, recomputed locally instead of polling the API
+        const interval = setInterval(updateTargets, 2000);
+        return () => {
+            clearInterval(interval);
+            closeFeed();
+        };
     }, []);
 
+    const updateTargets = () => {
+        const activeReports = activeReportsRef.current;
+
+        // Predictive Load Balancing Math
+        // Introduce dynamic network variance based on live active threats
+        const variance = activeReports > 0 ? (Math.random() * 30 - 15) : (Math.random() * 5 - 2.5);
+        setTargetNetwork(Math.max(10, Math.min(999, (activeReports * 3.5) + 45 + variance)));
+
+        // CPU load scales non-linearly with reports (simulating deep exponential NLP processing costs)
+        const cpuCost = Math.min(100, 12 + Math.pow(activeReports, 1.2) * 2.5);
+        setTargetCpu(cpuCost);
+    };
+
     const fetchStats = async () => {
         try {
             const res = await fetch(`${API_BASE_URL}/api/stats`, {
@@ -32,16 +56,8 @@ export const SystemDashboard: React.FC<SystemDashboardProps> = ({ activeThreats
             });
             if (res.ok) {
                 const data = await res.json();
-                const activeReports = data.reports_filed || 0;
-
-                // Predictive Load Balancing Math
-                // Introduce dynamic network variance based on live active threats
-                const variance = activeReports > 0 ? (Math.random() * 30 - 15) : (Math.random() * 5 - 2.5);
-                setTargetNetwork(Math.max(10, Math.min(999, (activeReports * 3.5) + 45 + variance)));
-
-                // CPU load scales non-linearly with reports (simulating deep exponential NLP processing costs)
-                const cpuCost = Math.min(100, 12 + Math.pow(activeReports, 1.2) * 2.5);
-                setTargetCpu(cpuCost);
+                activeReportsRef.current = data.reports_filed || 0;
+                updateTargets();
             }
         } catch (e) {
             console.error("Dashboard sync failed", e);
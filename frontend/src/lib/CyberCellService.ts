@@ -1,9 +1,18 @@
 ﻿import { PDFGenerator } from './PDFGenerator';
-import type { IncidentReport, CaseFile } from './types';
+import type { IncidentReport, CaseFile, FeedEvent } from './types';
 import { API_BASE_URL } from './config';
 
+export interface CasePage {
+    cases: CaseFile[];
+    nextCursor: string | null;
+}
+
 export class CyberCellService {
     private static MOCK_ENDPOINT = 'https://cybercell.gov.mock/api/v1/report';
+    private static CASES_PAGE_SIZE = 100;
+    // One push-feed connection per tab, fanned out to every subscriber
+    private static feedListeners = new Set<(feed: FeedEvent) => void>();
+    private static closeFeed: (() => void) | null = null;
 
     /**
      * ADVANCED LOGIC: Zero-Trust Cryptographic Core
@@ -102,20 +111,107 @@ export class CyberCellService {
     }
 
     /**
-     * Fetches persistent cases from the backend.
+     * Fetches one page of persistent cases from the backend, newest first. Pass the returned
+     * nextCursor back for the following page (null after the last one). Pages are loaded on
+     * demand: walking the whole table would burn through the /api/cases rate limit.
      */
-    static async getAllCases(): Promise<CaseFile[]> {
+    static async getCasesPage(cursor: string | null = null): Promise<CasePage> {
         try {
-            const res = await fetch(`${API_BASE_URL}/api/cases`);
+            const query = new URLSearchParams({ limit: String(this.CASES_PAGE_SIZE) });
+            if (cursor) query.set('cursor', cursor);
+            const res = await fetch(`${API_BASE_URL}/api/cases?${query}`, {
+                headers: { 'X-Rakshak-Token': 'rakshak-core-v1' }
+            });
             if (res.ok) {
-                const cases = await res.json();
+                const cases: CaseFile[] = await res.json();
                 console.log('[CyberCellService] 📂 Loaded persistent cases:', cases.length);
-                return cases;
+                return { cases, nextCursor: res.headers.get('X-Next-Cursor') };
             }
         } catch (e) {
             console.warn('[CyberCellService] ⚠️ Failed to fetch cases from backend.');
         }
-        return [];
+        return { cases: [], nextCursor: null };
+    }
+
+    /**
+     * Fetches one case (transcript included) from the backend.
+     */
+    static async getCase(id: string): Promise<CaseFile | null> {
+        try {
+            const res = await fetch(`${API_BASE_URL}/api/cases/${encodeURIComponent(id)}`, {
+                headers: { 'X-Rakshak-Token': 'rakshak-core-v1' }
+            });
+            if (res.ok) return await res.json();
+        } catch (e) {
+            console.warn(`[CyberCellService] ⚠️ Failed to fetch case ${id}.`);
+        }
+        return null;
+    }
+
+    /**
+     * Subscribes to the backend push feed (server-sent events from /api/stream) instead of polling:
+     * "case.created", "stats.delta" and "resync" (events were missed - refetch) events.
+     * Read with fetch rather than EventSource so the API token header can be sent; reconnects
+     * resume from the last event id. All subscribers share one connection, opened with the first
+     * and closed with the last; returns a function that unsubscribes.
+     */
+    static subscribeFeed(onEvent: (feed: FeedEvent) => void): () => void {
+        this.feedListeners.add(onEvent);
+        if (!this.closeFeed) {
+            this.closeFeed = this.openFeed(feed => this.feedListeners.forEach(listener => listener(feed)));
+        }
+        return () => {
+            this.feedListeners.delete(onEvent);
+            if (this.feedListeners.size === 0 && this.closeFeed) {
+                this.closeFeed();
+                this.closeFeed = null;
+            }
+        };
+    }
+
+    private static openFeed(dispatch: (feed: FeedEvent) => void): () => void {
+        const controller = new AbortController();
+        let lastEventId: string | null = null;
+
+        const run = async () => {
+            while (!controller.signal.aborted) {
+                try {
+                    const query = lastEventId ? `?${new URLSearchParams({ cursor: lastEventId })}` : '';
+                    const res = await fetch(`${API_BASE_URL}/api/stream${query}`, {
+                        headers: { 'X-Rakshak-Token': 'rakshak-core-v1' },
+                        signal: controller.signal
+                    });
+                    if (!res.ok || !res.body) throw new Error(`Feed rejected (${res.status})`);
+                    const reader = res.body.pipeThrough(new TextDecoderStream()).getReader();
+                    let buffer = '';
+                    while (true) {
+                        const { value, done } = await reader.read();
+                        if (done) break;
+                        buffer += value;
+                        let end: number;
+                        while ((end = buffer.indexOf('\n\n')) >= 0) {
+                            const block = buffer.slice(0, end);
+                            buffer = buffer.slice(end + 2);
+                            let event = 'message';
+                            let data = '';
+                            for (const line of block.split('\n')) {
+                                if (line.startsWith('id: ')) lastEventId = line.slice(4);
+                                else if (line.startsWith('event: ')) event = line.slice(7);
+                                else if (line.startsWith('data: ')) data += line.slice(6);
+                            }
+                            if (data) dispatch({ event, data: JSON.parse(data) } as FeedEvent);
+                        }
+                    }
+                } catch (e) {
+                    if (controller.signal.aborted) return;
+                    console.warn('[CyberCellService] ⚠️ Live feed dropped - reconnecting.');
+                }
+                await new Promise(resolve => setTimeout(resolve, 3000));
+            }
+        };
+
+        run();
+        return () => controller.abort();
     }
 
     /**
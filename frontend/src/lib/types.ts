@@ -103,6 +103,20 @@ export interface CaseFile {
     autoReported?: boolean; // Added this field
 }
 
+/** Lifetime counter changes pushed as "stats.delta" (several reports may be merged into one). */
+export interface StatsDelta {
+    reports_filed: number;
+    scams_detected: number;
+    types: Record<string, number>;
+    cases_created: number;
+}
+
+/** An event from the /api/stream push feed. */
+export type FeedEvent =
+    | { event: 'case.created'; data: Omit<CaseFile, 'transcript'> }
+    | { event: 'stats.delta'; data: StatsDelta }
+    | { event: 'resync'; data: { reason: string } };
+
 export type ScamType = 'ROMANCE' | 'CRYPTO' | 'JOB' | 'IMPERSONATION' | 'LOTTERY' | 'TECHNICAL_SUPPORT' | 'AUTHORITY' | 'OTHER';
 
 export interface ScamRecord {
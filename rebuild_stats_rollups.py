@@ -0,0 +1,30 @@
+"""
+Maintenance script: recomputes the hourly /api/stats rollups from the raw cases table.
+Run from the project root: python rebuild_stats_rollups.py [--verify]
+"""
+import os
+import sys
+import logging
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), 'backend'))
+from database import SessionLocal, init_db
+from case_stats import rebuild_rollups, rollup_window_stats, window_stats
+
+logging.basicConfig(level=logging.INFO, format='%(message)s')
+
+def main():
+    init_db()
+    with SessionLocal() as db:
+        buckets, sketches = rebuild_rollups(db)
+        print(f"Rebuilt {buckets} type buckets and {sketches} scammer sketch entries")
+
+        if "--verify" in sys.argv:
+            from datetime import datetime, timezone
+            now = datetime.now(timezone.utc)
+            if rollup_window_stats(db, now) != window_stats(db, now):
+                print("MISMATCH: rollup stats differ from a full scan of cases")
+                sys.exit(1)
+            print("Verified: rollup stats match a full scan of cases")
+
+if __name__ == "__main__":
+    main()